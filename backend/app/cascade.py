@@ -0,0 +1,92 @@
+"""Bulk cascade deletion of documents (and projects) with their stored files.
+
+Documents are processed in chunks of VOS_CASCADE_DELETE_CHUNK_SIZE: the storage
+identifiers of a chunk are gathered in two queries, its rows are removed with
+one `$in` delete per collection, then its files are deleted in bulk. Rows go
+before files, so an interrupted cascade leaves at most one chunk of orphaned
+files (never rows pointing at missing files) and can simply be run again.
+"""
+from __future__ import annotations
+
+from typing import Callable, Optional
+
+from pymongo.database import Database
+
+from .config import settings
+from . import crud, jobs
+from .progress import ProgressReporter
+from .storage import storage_service
+
+
+def delete_documents(
+    db: Database,
+    document_ids: list[str],
+    on_progress: Optional[Callable[[int], None]] = None,
+    should_stop: Optional[Callable[[], bool]] = None,
+) -> dict:
+    """Delete documents, their uploads, results, jobs and files; returns counts"""
+    summary = {"documents": 0, "uploads": 0, "files": 0, "failed_files": 0}
+    chunk_size = max(1, settings.cascade_delete_chunk_size)
+    processed = 0
+    for start in range(0, len(document_ids), chunk_size):
+        if should_stop is not None and should_stop():
+            break
+        chunk = document_ids[start : start + chunk_size]
+        paths = crud.document_storage_paths(db, chunk)
+        counts = crud.delete_documents_bulk(db, chunk)
+        failed = storage_service.delete_files(paths)
+        summary["documents"] += counts["documents"]
+        summary["uploads"] += counts["uploads"]
+        summary["files"] += len(paths) - len(failed)
+        summary["failed_files"] += len(failed)
+        if failed:
+            crud.log_event(db, "WARNING", f"Could not delete {len(failed)} files", context=", ".join(failed[:20]))
+        processed += len(chunk)
+        if on_progress is not None:
+            on_progress(processed)
+    return summary
+
+
+def delete_project(db: Database, project_id: str) -> Optional[dict]:
+    """Delete a project with everything under it; None when the project does not exist"""
+    if crud.get_project(db, project_id) is None:
+        return None
+    # The project row goes last, so an interrupted request can be repeated on what is left
+    summary = delete_documents(db, crud.list_document_ids(db, project_id))
+    crud.delete_project(db, project_id)
+    return summary
+
+
+@jobs.register("cascade_delete")
+def _handle_cascade_delete_job(db: Database, job: dict, should_stop: Callable[[], bool]) -> None:
+    job_id = str(job["_id"])
+    owner = job.get("lease_owner")
+    try:
+        # A project job re-lists its documents, so a retried job only sees what is left
+        document_ids = job.get("document_ids") or crud.list_document_ids(db, job["project_id"])
+        crud.update_validation_job_status(
+            db, job_id, "running", total_uploads=len(document_ids), processed_uploads=0, lease_owner=owner
+        )
+        reporter = ProgressReporter(db, job_id, len(document_ids), lease_owner=owner)
+        summary = delete_documents(db, document_ids, on_progress=reporter.advance, should_stop=should_stop)
+        reporter.flush()
+        stopped = should_stop()
+        crud.update_validation_job_status(
+            db,
+            job_id,
+            "cancelled" if stopped else "completed",
+            summary=summary,
+            processed_uploads=reporter.processed,
+            lease_owner=owner,
+        )
+        crud.log_event(
+            db,
+            "INFO",
+            f"Cascade delete job {job_id} {'cancelled' if stopped else 'completed'}: "
+            f"{summary['documents']} documents, {summary['uploads']} uploads, {summary['files']} files",
+        )
+    except jobs.LeaseLost:
+        raise
+    except Exception as e:
+        crud.log_event(db, "ERROR", f"Cascade delete job {job_id} failed", context=str(e))
+        crud.update_validation_job_status(db, job_id, "failed", error=str(e), lease_owner=owner)
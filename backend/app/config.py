@@ -14,6 +14,104 @@ class Settings(BaseSettings):
     minio_bucket: str | None = None
     minio_secure: bool = True
     minio_region: str | None = None
+    # Endpoint used in presigned download URLs when clients cannot reach minio_endpoint
+    minio_public_endpoint: str | None = None
+
+    # Downloads: "proxy" streams files through the API; "redirect" sends MINIO
+    # downloads to short-lived presigned URLs (LOCAL files are always served directly)
+    download_mode: str = "proxy"
+    presign_ttl_seconds: int = 300
+    download_chunk_bytes: int = 1024 * 1024
+
+    # Uploads are streamed to storage in chunks; larger files are rejected with 413
+    max_upload_bytes: int = 512 * 1024 * 1024
+    storage_chunk_bytes: int = 1024 * 1024
+    storage_multipart_part_bytes: int = 8 * 1024 * 1024
+    # Threads running storage calls for async routes
+    storage_io_workers: int = 16
+
+    # Archive ingestion: whole archive size, member count, and parallel storage writes
+    max_archive_bytes: int = 4 * 1024 * 1024 * 1024
+    max_archive_entries: int = 10000
+    archive_ingest_workers: int = 8
+
+    # Cascade deletes remove documents (rows, then files) in chunks of this many
+    cascade_delete_chunk_size: int = 200
+
+    # Storage reconciliation: files younger than the grace period are never collected (they may
+    # belong to an upload still being recorded); quarantined files are moved under the prefix
+    storage_gc_grace_seconds: int = 24 * 3600
+    storage_gc_batch_size: int = 1000
+    storage_gc_report_limit: int = 1000
+    storage_quarantine_prefix: str = "quarantine"
+
+    # Excel export: column widths are estimated from this many leading rows per sheet
+    export_width_sample_rows: int = 1000
+
+    # Validation concurrency
+    validation_max_workers: int = 4
+
+    # Per-endpoint OCR concurrency adapts (AIMD) between min and max from latency and errors;
+    # a circuit breaker fails calls fast after consecutive failures
+    ocr_max_concurrency_per_url: int = 4
+    ocr_min_concurrency_per_url: int = 1
+    ocr_initial_concurrency_per_url: int = 2
+    ocr_latency_target_seconds: float = 30.0
+    ocr_concurrency_decrease_factor: float = 0.5
+    ocr_breaker_failure_threshold: int = 5
+    ocr_breaker_reset_seconds: float = 30.0
+    ocr_breaker_half_open_probes: int = 1
+
+    # OCR HTTP client
+    ocr_connect_timeout: float = 5.0
+    ocr_read_timeout: float = 60.0
+    ocr_pool_max_connections: int = 20
+    ocr_pool_max_keepalive: int = 10
+    ocr_keepalive_expiry: float = 30.0
+    ocr_max_retries: int = 2
+    ocr_retry_backoff_base: float = 0.5
+    ocr_retry_backoff_max: float = 8.0
+    ocr_http2: bool = False
+
+    # OCR response cache
+    ocr_cache_enabled: bool = True
+    ocr_cache_ttl_seconds: int = 30 * 24 * 3600
+    ocr_cache_max_entries: int = 100_000
+    ocr_cache_max_entry_bytes: int = 8 * 1024 * 1024
+    ocr_model_version: str | None = None
+
+    # validation_results write tuning ("w" accepts a number or "majority")
+    validation_results_write_w: str = "1"
+    validation_results_write_journal: bool | None = None
+    validation_results_use_transactions: bool = True
+
+    # Job execution: "background" runs jobs inside the API process,
+    # "queue" leaves them to `python -m app.worker` processes
+    job_backend: str = "background"
+    job_lease_seconds: int = 60
+    job_heartbeat_seconds: int = 15
+    job_max_attempts: int = 3
+    worker_concurrency: int = 1
+    worker_poll_interval: float = 2.0
+    worker_metrics_port: int = 0
+
+    # Job progress: coalesce Mongo writes, push updates over SSE
+    progress_write_every: int = 10
+    progress_write_interval_ms: int = 1000
+    progress_stream_poll_seconds: float = 2.0
+
+    # Per-upload job results are written in batches of this size
+    job_results_batch_size: int = 50
+
+    # POST /api/validation/upload/{id} answers inline within this budget, otherwise queues a job
+    sync_validation_budget_ms: int = 3000
+
+    # Field comparison: "thread" scores in the validation threads, "process" ships
+    # chunks of comparisons to a process pool (pool size 0 = one process per CPU)
+    compare_backend: str = "thread"
+    compare_pool_size: int = 0
+    compare_chunk_size: int = 32
+    compare_linger_ms: int = 5
 
     class Config:
         env_prefix = "VOS_"
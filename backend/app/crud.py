@@ -1,10 +1,18 @@
-from typing import Optional
-from datetime import datetime
+import hashlib
+from typing import Iterator, Optional
+from datetime import datetime, timedelta
 
+from pymongo import ASCENDING, ReturnDocument, UpdateOne
+from pymongo.collection import Collection
 from pymongo.database import Database
-from bson import ObjectId
+from pymongo.errors import DuplicateKeyError
+from pymongo.write_concern import WriteConcern
+from bson import Binary, ObjectId
 
 from . import schemas
+from .config import settings
+from .metrics import MONGO_SECONDS, OCR_CACHE_REQUESTS
+from .progress import TERMINAL_STATUSES, LeaseLost, broker, job_event
 
 
 def _oid(val: int | str) -> ObjectId:
@@ -44,23 +52,26 @@ def update_project(db: Database, project_id: str, payload: schemas.ProjectUpdate
 
 
 def delete_project(db: Database, project_id: str) -> bool:
-    """Delete project and all associated documents and uploads"""
+    """Delete the project row and its batch jobs; documents are removed by app.cascade"""
     result = db["projects"].delete_one({"_id": _oid(project_id)})
     if result.deleted_count > 0:
-        # Delete all documents in this project
-        docs = db["documents"].find({"project_id": project_id})
-        doc_ids = [str(doc["_id"]) for doc in docs]
-        for doc_id in doc_ids:
-            delete_document(db, doc_id)
+        db["validation_jobs"].delete_many({"project_id": project_id, "kind": "batch_validation"})
         return True
     return False
 
 
+@MONGO_SECONDS.labels("list_document_ids").time()
+def list_document_ids(db: Database, project_id: str) -> list[str]:
+    return [str(doc["_id"]) for doc in db["documents"].find({"project_id": project_id}, {"_id": 1})]
+
+
 def create_document(db: Database, payload: schemas.DocumentCreate) -> dict:
     doc = {
         "project_id": payload.project_id,
         "name": payload.name,
         "ocr_url": payload.ocr_url,
+        "similarity_metric": payload.similarity_metric,
+        "field_metrics": payload.field_metrics,
         "sample_json_path": None,
         "created_at": datetime.utcnow(),
     }
@@ -86,15 +97,20 @@ def list_documents(db: Database, project_id: Optional[str] = None) -> list[dict]
     return [serialize_document(it) for it in items]
 
 
-def set_document_sample_json_path(db: Database, doc_id: str, path: str) -> Optional[dict]:
-    it = db["documents"].find_one_and_update({"_id": _oid(doc_id)}, {"$set": {"sample_json_path": path}}, return_document=True)
+def set_document_sample_json_path(db: Database, doc_id: str, path: str, sha256: Optional[str] = None) -> Optional[dict]:
+    it = db["documents"].find_one_and_update(
+        {"_id": _oid(doc_id)},
+        {"$set": {"sample_json_path": path, "sample_json_sha256": sha256}},
+        return_document=True,
+    )
     return it  # Return raw dict, not serialized
 
 
-def create_upload(db: Database, document_id: str, file_path: str) -> dict:
+def create_upload(db: Database, document_id: str, file_path: str, file_sha256: Optional[str] = None) -> dict:
     doc = {
         "document_id": document_id,
         "file_path": file_path,
+        "file_sha256": file_sha256,
         "user_input_json_path": None,
         "created_at": datetime.utcnow(),
     }
@@ -103,11 +119,53 @@ def create_upload(db: Database, document_id: str, file_path: str) -> dict:
     return serialize_upload(doc)
 
 
-def set_upload_user_input(db: Database, upload_id: str, user_input_path: str) -> Optional[dict]:
-    it = db["uploads"].find_one_and_update({"_id": _oid(upload_id)}, {"$set": {"user_input_json_path": user_input_path}}, return_document=True)
+@MONGO_SECONDS.labels("create_uploads").time()
+def create_uploads(db: Database, uploads: list[dict]) -> None:
+    """Insert many upload records (with pre-assigned `_id`s) in one round trip"""
+    if uploads:
+        db["uploads"].insert_many(uploads, ordered=False)
+
+
+def set_upload_user_input(db: Database, upload_id: str, user_input_path: str, sha256: Optional[str] = None) -> Optional[dict]:
+    it = db["uploads"].find_one_and_update(
+        {"_id": _oid(upload_id)},
+        {"$set": {"user_input_json_path": user_input_path, "user_input_sha256": sha256}},
+        return_document=True,
+    )
     return it  # Return raw dict, not serialized
 
 
+def set_upload_file_hash(db: Database, upload_id: str, file_sha256: str) -> None:
+    db["uploads"].update_one({"_id": _oid(upload_id)}, {"$set": {"file_sha256": file_sha256}})
+
+
+@MONGO_SECONDS.labels("set_upload_validation_state").time()
+def set_upload_validation_state(
+    db: Database,
+    upload_id: str,
+    *,
+    fingerprint: str,
+    user_input_sha256: str,
+    overall_accuracy: float,
+    ocr_processing_time: Optional[float],
+) -> None:
+    """Remember which inputs produced the stored results so unchanged uploads can be skipped"""
+    db["uploads"].update_one(
+        {"_id": _oid(upload_id)},
+        {
+            "$set": {
+                "user_input_sha256": user_input_sha256,
+                "validation_fingerprint": fingerprint,
+                "last_validation": {
+                    "overall_accuracy": overall_accuracy,
+                    "ocr_processing_time": ocr_processing_time,
+                    "validated_at": datetime.utcnow(),
+                },
+            }
+        },
+    )
+
+
 def get_document_raw(db: Database, document_id: str) -> Optional[dict]:
     return db["documents"].find_one({"_id": _oid(document_id)})
 
@@ -117,26 +175,97 @@ def get_upload_raw(db: Database, upload_id: str) -> Optional[dict]:
 
 
 def list_uploads_by_document(db: Database, document_id: str) -> list[dict]:
-    """Get all uploads for a document"""
-    items = db["uploads"].find({"document_id": document_id}).sort("created_at", -1)
-    return [serialize_upload(it) for it in items]
+    """Get all uploads for a document (raw Mongo documents, newest first)"""
+    return list(db["uploads"].find({"document_id": document_id}).sort([("created_at", -1), ("_id", -1)]))
+
+
+def iter_uploads_with_results(db: Database, document_id: str) -> Iterator[dict]:
+    """A document's uploads, newest first, each with its validation results (one aggregation)"""
+    return db["uploads"].aggregate(
+        [
+            {"$match": {"document_id": document_id}},
+            {"$sort": {"created_at": -1, "_id": -1}},
+            {"$addFields": {"upload_id": {"$toString": "$_id"}}},
+            {
+                "$lookup": {
+                    "from": "validation_results",
+                    "localField": "upload_id",
+                    "foreignField": "upload_id",
+                    "as": "results",
+                }
+            },
+            {
+                "$project": {
+                    "upload_id": 1,
+                    "file_path": 1,
+                    "created_at": 1,
+                    "results.field_name": 1,
+                    "results.user_value": 1,
+                    "results.ocr_value": 1,
+                    "results.accuracy": 1,
+                }
+            },
+        ],
+        allowDiskUse=True,
+    )
+
+
+def document_has_uploads(db: Database, document_id: str) -> bool:
+    return db["uploads"].find_one({"document_id": document_id}, {"_id": 1}) is not None
+
+
+def document_ids_with_uploads(db: Database, document_ids: list[str]) -> set[str]:
+    """Subset of document_ids that have at least one upload"""
+    return set(db["uploads"].distinct("document_id", {"document_id": {"$in": document_ids}}))
 
 
 def delete_document(db: Database, doc_id: str) -> bool:
     """Delete document and all associated uploads and validation results"""
-    result = db["documents"].delete_one({"_id": _oid(doc_id)})
-    if result.deleted_count > 0:
-        # Delete all uploads in this document
-        uploads = db["uploads"].find({"document_id": doc_id})
-        upload_ids = [str(upload["_id"]) for upload in uploads]
-        for upload_id in upload_ids:
-            delete_upload(db, upload_id)
-        # Delete all validation results for this document
-        db["validation_results"].delete_many({"document_id": doc_id})
-        # Delete all validation jobs for this document
-        db["validation_jobs"].delete_many({"document_id": doc_id})
-        return True
-    return False
+    return delete_documents_bulk(db, [doc_id])["documents"] > 0
+
+
+@MONGO_SECONDS.labels("document_storage_paths").time()
+def document_storage_paths(db: Database, document_ids: list[str]) -> list[str]:
+    """Storage identifiers of the documents' sample JSON and of their uploads' files and user inputs"""
+    paths = []
+    for doc in db["documents"].find({"_id": {"$in": [_oid(d) for d in document_ids]}}, {"sample_json_path": 1}):
+        if doc.get("sample_json_path"):
+            paths.append(doc["sample_json_path"])
+    for upload in db["uploads"].find(
+        {"document_id": {"$in": document_ids}}, {"file_path": 1, "user_input_json_path": 1}
+    ):
+        paths.extend(p for p in (upload.get("file_path"), upload.get("user_input_json_path")) if p)
+    for artifact in db["export_artifacts"].find({"document_id": {"$in": document_ids}}, {"file_path": 1}):
+        paths.append(artifact["file_path"])
+    return paths
+
+
+def iter_referenced_storage_paths(db: Database) -> Iterator[str]:
+    """Every storage identifier referenced by a document, an upload or an export artifact"""
+    for doc in db["documents"].find({"sample_json_path": {"$ne": None}}, {"sample_json_path": 1}):
+        yield doc["sample_json_path"]
+    for upload in db["uploads"].find({}, {"file_path": 1, "user_input_json_path": 1}):
+        for path in (upload.get("file_path"), upload.get("user_input_json_path")):
+            if path:
+                yield path
+    for artifact in db["export_artifacts"].find({}, {"file_path": 1}):
+        yield artifact["file_path"]
+
+
+@MONGO_SECONDS.labels("delete_documents_bulk").time()
+def delete_documents_bulk(db: Database, document_ids: list[str]) -> dict:
+    """Delete documents with their uploads, results and jobs: one delete_many per collection.
+
+    Document rows go last, so a cascade interrupted half way can be re-run from them.
+    """
+    in_ids = {"$in": document_ids}
+    uploads = db["uploads"].delete_many({"document_id": in_ids}).deleted_count
+    db["validation_results"].delete_many({"document_id": in_ids})
+    db["validation_job_results"].delete_many({"document_id": in_ids})
+    db["validation_jobs"].delete_many({"document_id": in_ids})
+    db["export_artifacts"].delete_many({"document_id": in_ids})
+    documents = db["documents"].delete_many({"_id": {"$in": [_oid(d) for d in document_ids]}}).deleted_count
+    return {"documents": documents, "uploads": uploads}
 
 
 def delete_upload(db: Database, upload_id: str) -> bool:
@@ -149,28 +278,113 @@ def delete_upload(db: Database, upload_id: str) -> bool:
     return False
 
 
-def add_validation_result(
+def list_upload_validation_results(db: Database, upload_id: str) -> list[dict]:
+    """Latest stored result per field of an upload, in the order they were written"""
+    items = db["validation_results"].find({"upload_id": upload_id}).sort([("created_at", -1), ("_id", 1)])
+    out: list[dict] = []
+    seen_fields: set[str] = set()
+    for it in items:
+        field_name = it.get("field_name")
+        if field_name in seen_fields:
+            continue
+        seen_fields.add(field_name)
+        out.append(it)
+    return out
+
+
+def _validation_results_collection(db: Database) -> Collection:
+    w: int | str = settings.validation_results_write_w
+    if isinstance(w, str) and w.isdigit():
+        w = int(w)
+    return db["validation_results"].with_options(
+        write_concern=WriteConcern(w=w, j=settings.validation_results_write_journal)
+    )
+
+
+@MONGO_SECONDS.labels("replace_validation_results").time()
+def replace_validation_results(
     db: Database,
     *,
     document_id: str,
     upload_id: str,
-    field_name: str,
-    user_value: str,
-    ocr_value: str,
-    accuracy: float,
-) -> dict:
-    vr = {
-        "document_id": document_id,
-        "upload_id": upload_id,
-        "field_name": field_name,
-        "user_value": user_value,
-        "ocr_value": ocr_value,
-        "accuracy": accuracy,
-        "created_at": datetime.utcnow(),
+    rows: list[dict],
+) -> list[dict]:
+    """Replace all stored results of an upload with `rows` in a single batched write.
+
+    Each row holds field_name/user_value/ocr_value/accuracy. On a replica set the
+    delete and insert run in one transaction. Otherwise the new run is inserted
+    first and older runs are deleted afterwards, so readers never see an empty
+    or half-written result set.
+    """
+    from .database import supports_transactions
+
+    now = datetime.utcnow()
+    run_id = ObjectId()
+    docs = [
+        {
+            "document_id": document_id,
+            "upload_id": upload_id,
+            "run_id": run_id,
+            "field_name": row["field_name"],
+            "user_value": row["user_value"],
+            "ocr_value": row["ocr_value"],
+            "accuracy": row["accuracy"],
+            "created_at": now,
+        }
+        for row in rows
+    ]
+    coll = _validation_results_collection(db)
+
+    if settings.validation_results_use_transactions and supports_transactions():
+        with db.client.start_session() as session:
+            with session.start_transaction():
+                coll.delete_many({"upload_id": upload_id}, session=session)
+                if docs:
+                    coll.insert_many(docs, ordered=False, session=session)
+        return docs
+
+    if docs:
+        coll.insert_many(docs, ordered=False)
+    coll.delete_many({"upload_id": upload_id, "run_id": {"$ne": run_id}})
+    return docs
+
+
+@MONGO_SECONDS.labels("get_cached_ocr").time()
+def get_cached_ocr(db: Database, key: str) -> Optional[bytes]:
+    """Return the compressed OCR payload for a cache key and mark it as recently used"""
+    it = db["ocr_cache"].find_one_and_update(
+        {"key": key},
+        {"$set": {"last_used_at": datetime.utcnow()}, "$inc": {"hits": 1}},
+        projection={"payload": 1},
+    )
+    OCR_CACHE_REQUESTS.labels("hit" if it else "miss").inc()
+    return bytes(it["payload"]) if it else None
+
+
+def has_cached_ocr(db: Database, key: str) -> bool:
+    return db["ocr_cache"].count_documents({"key": key}, limit=1) > 0
+
+
+@MONGO_SECONDS.labels("put_cached_ocr").time()
+def put_cached_ocr(db: Database, key: str, payload: bytes, *, ocr_url: str, ttl_seconds: int, max_entries: int) -> None:
+    """Store a compressed OCR payload, then evict least recently used entries beyond max_entries"""
+    now = datetime.utcnow()
+    entry = {
+        "payload": Binary(payload),
+        "ocr_url": ocr_url,
+        "size": len(payload),
+        "created_at": now,
+        "last_used_at": now,
+        "expires_at": now + timedelta(seconds=ttl_seconds),
     }
-    res = db["validation_results"].insert_one(vr)
-    vr["_id"] = res.inserted_id
-    return vr
+    try:
+        db["ocr_cache"].update_one({"key": key}, {"$set": entry, "$setOnInsert": {"hits": 0}}, upsert=True)
+    except DuplicateKeyError:
+        pass  # A concurrent writer stored the same content first
+    overflow = db["ocr_cache"].estimated_document_count() - max_entries
+    if overflow > 0:
+        stale = db["ocr_cache"].find({}, {"_id": 1}).sort("last_used_at", ASCENDING).limit(overflow)
+        db["ocr_cache"].delete_many({"_id": {"$in": [it["_id"] for it in stale]}})
 
 
 def log_event(db: Database, level: str, message: str, context: Optional[str] = None) -> dict:
@@ -180,11 +394,18 @@ def log_event(db: Database, level: str, message: str, context: Optional[str] = N
     return entry
 
 
-def create_validation_job(db: Database, document_id: str) -> dict:
-    """Create a new validation job"""
+def _new_job(db: Database, kind: str, **fields) -> dict:
+    """Insert a pending job of `kind` into the queue; `fields` are its kind-specific settings"""
     job = {
-        "document_id": document_id,
+        "document_id": None,
+        "parent_job_id": None,
         "status": "pending",
+        "kind": kind,
+        "attempts": 0,
+        "max_attempts": settings.job_max_attempts,
+        "lease_owner": None,
+        "lease_expires_at": None,
+        "cancel_requested": False,
         "created_at": datetime.utcnow(),
         "started_at": None,
         "completed_at": None,
@@ -192,47 +413,302 @@ def create_validation_job(db: Database, document_id: str) -> dict:
         "result": None,
         "total_uploads": None,
         "processed_uploads": None,
+        **fields,
     }
     res = db["validation_jobs"].insert_one(job)
     job["_id"] = res.inserted_id
     return job
 
 
+def create_validation_job(
+    db: Database,
+    document_id: str,
+    max_workers: Optional[int] = None,
+    bypass_ocr_cache: bool = False,
+    incremental: bool = False,
+    parent_job_id: Optional[str] = None,
+    upload_ids: Optional[list[str]] = None,
+) -> dict:
+    """Create a new validation job; `upload_ids` restricts it to some of the document's uploads"""
+    return _new_job(
+        db,
+        "validation",
+        document_id=document_id,
+        upload_ids=upload_ids,
+        parent_job_id=parent_job_id,
+        max_workers=max_workers,
+        bypass_ocr_cache=bypass_ocr_cache,
+        incremental=incremental,
+    )
+
+
+def create_batch_validation_job(
+    db: Database,
+    document_ids: list[str],
+    project_id: Optional[str] = None,
+    max_workers: Optional[int] = None,
+    bypass_ocr_cache: bool = False,
+    incremental: bool = False,
+) -> dict:
+    """Create a batch job with one child validation job per document"""
+    # Insert the parent last so a worker cannot claim it before its children exist
+    parent_id = ObjectId()
+    children = [
+        create_validation_job(
+            db, document_id, max_workers, bypass_ocr_cache, incremental, parent_job_id=str(parent_id)
+        )
+        for document_id in document_ids
+    ]
+    return _new_job(
+        db,
+        "batch_validation",
+        _id=parent_id,
+        project_id=project_id,
+        document_ids=document_ids,
+        child_job_ids=[str(child["_id"]) for child in children],
+        max_workers=max_workers,
+        bypass_ocr_cache=bypass_ocr_cache,
+        incremental=incremental,
+    )
+
+
+def create_cascade_delete_job(
+    db: Database, project_id: Optional[str] = None, document_ids: Optional[list[str]] = None
+) -> dict:
+    """Create a job deleting a project's documents (or the given documents) with their files"""
+    return _new_job(db, "cascade_delete", project_id=project_id, document_ids=document_ids)
+
+
+def create_storage_gc_job(db: Database, dry_run: bool, action: str, grace_seconds: int) -> dict:
+    """Create a storage reconciliation job (see app.reconcile)"""
+    return _new_job(db, "storage_gc", dry_run=dry_run, action=action, grace_seconds=grace_seconds)
+
+
+def create_export_job(db: Database, document_id: str, export_version: str, link_template: str) -> dict:
+    """Create a job building the Excel report artifact of a document (see app.export)"""
+    return _new_job(
+        db, "export", document_id=document_id, export_version=export_version, link_template=link_template
+    )
+
+
+def latest_export_job(db: Database, document_id: str, export_version: str) -> Optional[dict]:
+    """Most recent export job for a report version, whatever its status"""
+    return db["validation_jobs"].find_one(
+        {"kind": "export", "document_id": document_id, "export_version": export_version},
+        {"result": 0},
+        sort=[("created_at", -1), ("_id", -1)],
+    )
+
+
+@MONGO_SECONDS.labels("export_version").time()
+def export_version(db: Database, document_id: str) -> str:
+    """Identifies the report content of a document: changes with every validation run and upload change"""
+    latest_run = db["validation_results"].find_one(
+        {"document_id": document_id}, {"run_id": 1, "created_at": 1}, sort=[("run_id", -1), ("created_at", -1)]
+    )
+    newest_upload = db["uploads"].find_one({"document_id": document_id}, {"_id": 1}, sort=[("_id", -1)])
+    parts = [
+        str(latest_run.get("run_id") or latest_run.get("created_at")) if latest_run else "-",
+        str(db["validation_results"].count_documents({"document_id": document_id})),
+        str(newest_upload["_id"]) if newest_upload else "-",
+        str(db["uploads"].count_documents({"document_id": document_id})),
+    ]
+    return hashlib.sha256(":".join(parts).encode()).hexdigest()[:24]
+
+
+def get_export_artifact(db: Database, document_id: str, export_version: str) -> Optional[dict]:
+    return db["export_artifacts"].find_one({"document_id": document_id, "version": export_version})
+
+
+def save_export_artifact(
+    db: Database,
+    document_id: str,
+    export_version: str,
+    file_path: str,
+    size: int,
+    job_id: Optional[str],
+    built_at: datetime,
+) -> tuple[dict, list[str]]:
+    """Record the artifact of a report version; returns it with the storage paths of the artifacts it replaces.
+
+    `built_at` is when the build started reading results. Only artifacts of
+    builds that started earlier are replaced, so a slow build of an old
+    version can never remove the artifact of a newer one.
+    """
+    artifact = db["export_artifacts"].find_one_and_update(
+        {"document_id": document_id, "version": export_version},
+        {
+            "$set": {
+                "file_path": file_path,
+                "size": size,
+                "job_id": job_id,
+                "built_at": built_at,
+                "created_at": datetime.utcnow(),
+            }
+        },
+        upsert=True,
+        return_document=ReturnDocument.AFTER,
+    )
+    stale_filter = {"document_id": document_id, "version": {"$ne": export_version}, "built_at": {"$lt": built_at}}
+    stale = [it["file_path"] for it in db["export_artifacts"].find(stale_filter, {"file_path": 1})]
+    db["export_artifacts"].delete_many(stale_filter)
+    return artifact, stale
+
+
+def list_child_validation_jobs(db: Database, parent_job_id: str) -> list[dict]:
+    """Child jobs of a batch job in creation order, without their legacy embedded results"""
+    return list(
+        db["validation_jobs"]
+        .find({"parent_job_id": parent_job_id}, {"result": 0})
+        .sort([("created_at", ASCENDING), ("_id", ASCENDING)])
+    )
+
+
+def count_pending_jobs(db: Database) -> int:
+    """Jobs waiting for a worker (children of a batch run inside their parent and are not counted)"""
+    return db["validation_jobs"].count_documents({"status": "pending", "parent_job_id": None})
+
+
 def get_validation_job(db: Database, job_id: str) -> Optional[dict]:
     """Get validation job by ID"""
     return db["validation_jobs"].find_one({"_id": _oid(job_id)})
 
 
+def clear_validation_job_results(db: Database, job_id: str) -> None:
+    db["validation_job_results"].delete_many({"job_id": job_id})
+
+
+def lease_child_validation_jobs(db: Database, parent_job_id: str, lease_owner: str) -> None:
+    """Hand the unfinished children of a batch job to the worker holding the parent's lease"""
+    db["validation_jobs"].update_many(
+        {"parent_job_id": parent_job_id, "status": {"$nin": list(TERMINAL_STATUSES)}},
+        {"$set": {"lease_owner": lease_owner}},
+    )
+
+
+def _check_lease(db: Database, job_id: str, lease_owner: Optional[str]) -> None:
+    if lease_owner is None:
+        return
+    if db["validation_jobs"].count_documents({"_id": _oid(job_id), "lease_owner": lease_owner}, limit=1) == 0:
+        raise LeaseLost(job_id)
+
+
+@MONGO_SECONDS.labels("add_validation_job_results").time()
+def add_validation_job_results(
+    db: Database,
+    job_id: str,
+    document_id: str,
+    items: list[tuple[int, dict]],
+    lease_owner: Optional[str] = None,
+) -> None:
+    """Store per-upload job results; `index` is the upload's position in the job.
+
+    Rows are upserted by (job_id, index), so a row written by a worker that
+    lost its lease is overwritten by the new owner's result for that upload.
+    """
+    if not items:
+        return
+    _check_lease(db, job_id, lease_owner)
+    now = datetime.utcnow()
+    ops = [
+        UpdateOne(
+            {"job_id": job_id, "index": index},
+            {"$set": {"document_id": document_id, "result": result, "created_at": now}},
+            upsert=True,
+        )
+        for index, result in items
+    ]
+    db["validation_job_results"].bulk_write(ops, ordered=False)
+
+
+def list_validation_job_results(
+    db: Database,
+    job_id: str,
+    *,
+    after: Optional[int] = None,
+    limit: int = 100,
+    include_field_results: bool = True,
+    field_names: Optional[list[str]] = None,
+) -> list[dict]:
+    """Page through a job's per-upload results in upload order (keyset pagination on index).
+
+    `field_names` keeps only those fields in each upload's per-field results;
+    the filtering happens in the projection, so other fields never leave Mongo.
+    """
+    q: dict = {"job_id": job_id}
+    if after is not None:
+        q["index"] = {"$gt": after}
+    projection: dict = {"_id": 0, "index": 1, "result": 1}
+    if not include_field_results:
+        # Exclusion-only projection: drop the per-field lists, keep each upload's summary
+        projection = {"_id": 0, "result.results": 0}
+    elif field_names is not None:
+        kept = {
+            "$filter": {
+                "input": {"$ifNull": ["$result.results", []]},
+                "cond": {"$in": ["$$this.field_name", {"$literal": list(field_names)}]},
+            }
+        }
+        projection = {"_id": 0, "index": 1, "result": {"$mergeObjects": ["$result", {"results": kept}]}}
+    return list(db["validation_job_results"].find(q, projection).sort("index", ASCENDING).limit(limit))
+
+
+def get_validation_job_status(db: Database, job_id: str) -> Optional[dict]:
+    """Get validation job without its (potentially large) result payload"""
+    return db["validation_jobs"].find_one({"_id": _oid(job_id)}, {"result": 0})
+
+
 def update_validation_job_status(
     db: Database,
     job_id: str,
     status: str,
     error: Optional[str] = None,
     result: Optional[dict] = None,
+    summary: Optional[dict] = None,
     total_uploads: Optional[int] = None,
     processed_uploads: Optional[int] = None,
+    lease_owner: Optional[str] = None,
 ) -> Optional[dict]:
-    """Update validation job status"""
+    """Update validation job status in one round trip and notify progress subscribers.
+
+    With `lease_owner`, only a job still leased to that worker is updated and
+    LeaseLost is raised when nothing matched.
+    """
     updates: dict = {"status": status}
     
-    # Set started_at when status changes to running (only if not already set)
-    if status == "running":
-        existing = db["validation_jobs"].find_one({"_id": _oid(job_id)})
-        if existing and not existing.get("started_at"):
-            updates["started_at"] = datetime.utcnow()
-    
-    if status in ("completed", "failed"):
+    if status in TERMINAL_STATUSES:
         updates["completed_at"] = datetime.utcnow()
+        updates["lease_owner"] = None
+        updates["lease_expires_at"] = None
     if error is not None:
         updates["error"] = error
     if result is not None:
         updates["result"] = result
+    if summary is not None:
+        updates["summary"] = summary
     if total_uploads is not None:
         updates["total_uploads"] = total_uploads
     if processed_uploads is not None:
         updates["processed_uploads"] = processed_uploads
     
-    it = db["validation_jobs"].find_one_and_update({"_id": _oid(job_id)}, {"$set": updates}, return_document=True)
+    # Pipeline update: values are wrapped in $literal so user data is never read as an expression,
+    # and started_at is only set the first time the job goes to running
+    stage: dict = {k: {"$literal": v} for k, v in updates.items()}
+    if status == "running":
+        stage["started_at"] = {"$ifNull": ["$started_at", {"$literal": datetime.utcnow()}]}
+    query: dict = {"_id": _oid(job_id)}
+    if lease_owner is not None:
+        query["lease_owner"] = lease_owner
+    it = db["validation_jobs"].find_one_and_update(
+        query,
+        [{"$set": stage}],
+        projection={"result": 0},
+        return_document=ReturnDocument.AFTER,
+    )
+    if it is None and lease_owner is not None:
+        raise LeaseLost(job_id)
+    if it:
+        broker.publish(str(it["_id"]), job_event(it))
     return it
 
 
@@ -242,7 +718,12 @@ def serialize_validation_job(it: Optional[dict]) -> Optional[dict]:
         return None
     return {
         "job_id": serialize_id(it.get("_id")),
+        "kind": it.get("kind") or "validation",
         "document_id": it.get("document_id"),
+        "upload_ids": it.get("upload_ids"),
+        "project_id": it.get("project_id"),
+        "parent_job_id": it.get("parent_job_id"),
+        "child_job_ids": it.get("child_job_ids"),
         "status": it.get("status"),
         "created_at": it.get("created_at"),
         "started_at": it.get("started_at"),
@@ -250,6 +731,8 @@ def serialize_validation_job(it: Optional[dict]) -> Optional[dict]:
         "error": it.get("error"),
         "total_uploads": it.get("total_uploads"),
         "processed_uploads": it.get("processed_uploads"),
+        "attempts": it.get("attempts"),
+        "cancel_requested": bool(it.get("cancel_requested")),
     }
 
 
@@ -278,6 +761,8 @@ def serialize_document(it: Optional[dict]) -> Optional[dict]:
         "name": it.get("name"),
         "ocr_url": it.get("ocr_url"),
         "sample_json_path": it.get("sample_json_path"),
+        "similarity_metric": it.get("similarity_metric"),
+        "field_metrics": it.get("field_metrics"),
         "created_at": it.get("created_at"),
     }
 
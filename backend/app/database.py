@@ -6,6 +6,7 @@ from .config import settings
 
 client: MongoClient | None = None
 db: Database | None = None
+_transactions_supported: bool | None = None
 
 
 def get_db() -> Database:
@@ -17,6 +18,20 @@ def get_db() -> Database:
     return db
 
 
+def supports_transactions() -> bool:
+    """True when connected to a replica set or sharded cluster (standalone servers reject transactions)"""
+    global _transactions_supported
+    if _transactions_supported is None:
+        get_db()
+        assert client is not None
+        try:
+            hello = client.admin.command("hello")
+            _transactions_supported = bool(hello.get("setName")) or hello.get("msg") == "isdbgrid"
+        except Exception:
+            _transactions_supported = False
+    return _transactions_supported
+
+
 def init_db() -> None:
     # ensure indexes and collections
     database = get_db()
@@ -24,10 +39,20 @@ def init_db() -> None:
     database["documents"].create_index([("project_id", ASCENDING)])
     database["uploads"].create_index([("document_id", ASCENDING)])
     database["validation_results"].create_index([("document_id", ASCENDING)])
+    database["validation_results"].create_index([("upload_id", ASCENDING), ("run_id", ASCENDING)])
     database["validation_results"].create_index([("created_at", ASCENDING)])
+    database["validation_results"].create_index([("document_id", ASCENDING), ("run_id", ASCENDING)])
     database["validation_jobs"].create_index([("document_id", ASCENDING)])
     database["validation_jobs"].create_index([("status", ASCENDING)])
+    database["validation_jobs"].create_index([("status", ASCENDING), ("created_at", ASCENDING)])
     database["validation_jobs"].create_index([("created_at", ASCENDING)])
+    database["validation_jobs"].create_index([("parent_job_id", ASCENDING)])
+    database["validation_job_results"].create_index([("job_id", ASCENDING), ("index", ASCENDING)], unique=True)
+    database["validation_job_results"].create_index([("document_id", ASCENDING)])
+    database["export_artifacts"].create_index([("document_id", ASCENDING), ("version", ASCENDING)], unique=True)
     database["logs"].create_index([("created_at", ASCENDING)])
+    database["ocr_cache"].create_index([("key", ASCENDING)], unique=True)
+    database["ocr_cache"].create_index([("expires_at", ASCENDING)], expireAfterSeconds=0)
+    database["ocr_cache"].create_index([("last_used_at", ASCENDING)])
 
 
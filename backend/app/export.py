@@ -0,0 +1,233 @@
+"""Excel validation report, written in openpyxl write-only mode.
+
+Uploads and their results come from one aggregation and are written row by
+row as they arrive, so memory stays flat however many uploads a document has.
+Cell styles are named styles registered once per workbook. Write-only sheets
+need column widths before the first row, so they are estimated from the first
+VOS_EXPORT_WIDTH_SAMPLE_ROWS rows, which are held back until then.
+
+Export jobs store the finished workbook through StorageService as an artifact
+keyed by document and report version (crud.export_version), so it is built
+once per validation run and served from storage until the results change.
+"""
+from __future__ import annotations
+
+import os
+import tempfile
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Optional
+
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Alignment, Border, Font, NamedStyle, PatternFill, Side
+from openpyxl.utils import get_column_letter
+from pymongo.database import Database
+
+from .config import settings
+from . import crud, jobs
+from .storage import storage_service
+
+
+MAX_COLUMN_WIDTH = 50
+
+# Stands for the upload id in download link templates
+UPLOAD_ID_PLACEHOLDER = "__upload_id__"
+
+XLSX_MEDIA_TYPE = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+SUMMARY_HEADERS = ["File Name", "Upload Date", "Overall Accuracy", "Total Fields", "Status", "Download Link"]
+DETAIL_HEADERS = ["File Name", "Upload Date", "Field Name", "User Value", "OCR Value", "Accuracy"]
+
+
+def _register_styles(wb: Workbook) -> None:
+    side = Side(style="thin")
+    border = Border(left=side, right=side, top=side, bottom=side)
+    center = Alignment(horizontal="center", vertical="center")
+    styles = [
+        NamedStyle(
+            "report_header",
+            font=Font(bold=True, color="FFFFFF"),
+            fill=PatternFill(start_color="366092", end_color="366092", fill_type="solid"),
+            alignment=center,
+            border=border,
+        ),
+        NamedStyle("report_cell", border=border),
+        NamedStyle("report_link", font=Font(color="0563C1", underline="single"), alignment=center, border=border),
+    ]
+    for name, color in (("high", "C6EFCE"), ("medium", "FFEB9C"), ("low", "FFC7CE")):
+        styles.append(
+            NamedStyle(
+                f"report_accuracy_{name}",
+                fill=PatternFill(start_color=color, end_color=color, fill_type="solid"),
+                alignment=center,
+                border=border,
+            )
+        )
+    for style in styles:
+        wb.add_named_style(style)
+
+
+def _accuracy_style(accuracy: float) -> str:
+    if accuracy >= 0.9:
+        return "report_accuracy_high"
+    if accuracy >= 0.7:
+        return "report_accuracy_medium"
+    return "report_accuracy_low"
+
+
+def _format_date(value: Any) -> str:
+    return value.strftime("%Y-%m-%d %H:%M:%S") if value else "N/A"
+
+
+class _SheetWriter:
+    """Appends styled rows to a write-only sheet, sizing columns from the first rows"""
+
+    def __init__(self, wb: Workbook, title: str, headers: list[str], sample_rows: int) -> None:
+        self.ws = wb.create_sheet(title)
+        self.widths = [0] * len(headers)
+        self.sample_rows = sample_rows
+        self.pending: Optional[list[list[WriteOnlyCell]]] = []
+        self.append(headers, ["report_header"] * len(headers))
+
+    def append(self, values: list[Any], styles: list[str], hyperlinks: Optional[dict[int, str]] = None) -> None:
+        row = []
+        for column, (value, style) in enumerate(zip(values, styles)):
+            cell = WriteOnlyCell(self.ws, value=value)
+            cell.style = style
+            if hyperlinks and column in hyperlinks:
+                cell.hyperlink = hyperlinks[column]
+            row.append(cell)
+        if self.pending is None:
+            self.ws.append(row)
+            return
+        for column, value in enumerate(values):
+            self.widths[column] = max(self.widths[column], len(str(value)))
+        self.pending.append(row)
+        if len(self.pending) > self.sample_rows:
+            self.flush()
+
+    def flush(self) -> None:
+        if self.pending is None:
+            return
+        for column, width in enumerate(self.widths, start=1):
+            self.ws.column_dimensions[get_column_letter(column)].width = min(width + 2, MAX_COLUMN_WIDTH)
+        for row in self.pending:
+            self.ws.append(row)
+        self.pending = None
+
+
+def write_excel_report(db: Database, document_id: str, path: Path, download_url: Callable[[str], str]) -> int:
+    """Write the Summary / Detailed Results workbook for a document to `path`; returns the number of uploads"""
+    wb = Workbook(write_only=True)
+    _register_styles(wb)
+    sample_rows = max(1, settings.export_width_sample_rows)
+    summary = _SheetWriter(wb, "Summary", SUMMARY_HEADERS, sample_rows)
+    details = _SheetWriter(wb, "Detailed Results", DETAIL_HEADERS, sample_rows)
+    cell = "report_cell"
+
+    uploads = 0
+    for upload in crud.iter_uploads_with_results(db, document_id):
+        uploads += 1
+        file_name = Path(upload.get("file_path", "")).name
+        upload_date = _format_date(upload.get("created_at"))
+        results = upload.get("results") or []
+        overall = sum(r.get("accuracy", 0) for r in results) / len(results) if results else 0.0
+        summary.append(
+            [
+                file_name,
+                upload_date,
+                f"{overall * 100:.2f}%",
+                len(results),
+                "Validated" if results else "Not Validated",
+                "Download",
+            ],
+            [cell, cell, _accuracy_style(overall), cell, cell, "report_link"],
+            hyperlinks={5: download_url(upload["upload_id"])},
+        )
+        for r in results:
+            accuracy = r.get("accuracy", 0.0)
+            details.append(
+                [
+                    file_name,
+                    upload_date,
+                    r.get("field_name"),
+                    r.get("user_value"),
+                    r.get("ocr_value"),
+                    f"{accuracy * 100:.2f}%",
+                ],
+                [cell, cell, cell, cell, cell, _accuracy_style(accuracy)],
+            )
+
+    summary.flush()
+    details.flush()
+    wb.save(path)
+    return uploads
+
+
+def link_builder(link_template: str) -> Callable[[str], str]:
+    return lambda upload_id: link_template.replace(UPLOAD_ID_PLACEHOLDER, upload_id)
+
+
+def build_export_artifact(
+    db: Database, document_id: str, export_version: str, link_template: str, job_id: Optional[str] = None
+) -> tuple[Optional[dict], int]:
+    """Write the report to storage and record it as the document's artifact; returns it with the upload count.
+
+    The artifact is None when the results changed while the report was
+    written: the build no longer matches `export_version` and is dropped.
+    """
+    built_at = datetime.utcnow()
+    fd, tmp_name = tempfile.mkstemp(prefix="vos-export-", suffix=".xlsx")
+    os.close(fd)
+    try:
+        uploads = write_excel_report(db, document_id, Path(tmp_name), link_builder(link_template))
+        if crud.export_version(db, document_id) != export_version:
+            return None, uploads
+        with open(tmp_name, "rb") as fh:
+            identifier, _, size = storage_service.save_stream(
+                f"exports/doc_{document_id}_{export_version}.xlsx", fh, XLSX_MEDIA_TYPE
+            )
+    finally:
+        os.unlink(tmp_name)
+    artifact, stale = crud.save_export_artifact(
+        db, document_id, export_version, identifier, size, job_id, built_at=built_at
+    )
+    # Artifacts of earlier builds are never served again
+    failed = storage_service.delete_files(path for path in stale if path != identifier)
+    if failed:
+        crud.log_event(db, "WARNING", f"Could not delete {len(failed)} stale export artifacts", context=", ".join(failed))
+    return artifact, uploads
+
+
+@jobs.register("export")
+def _handle_export_job(db: Database, job: dict, should_stop: Callable[[], bool]) -> None:
+    job_id = str(job["_id"])
+    owner = job.get("lease_owner")
+    document_id = job["document_id"]
+    try:
+        crud.update_validation_job_status(db, job_id, "running", lease_owner=owner)
+        artifact = crud.get_export_artifact(db, document_id, job["export_version"])
+        uploads = None
+        if artifact is None:
+            artifact, uploads = build_export_artifact(
+                db, document_id, job["export_version"], job["link_template"], job_id=job_id
+            )
+        if artifact is None:
+            # The results changed during the build; a new export covers the new version
+            summary = {"superseded": True, "uploads": uploads}
+        else:
+            summary = {"bytes": int(artifact.get("size") or 0)}
+            if uploads is not None:
+                summary["uploads"] = uploads
+        crud.update_validation_job_status(db, job_id, "completed", summary=summary, lease_owner=owner)
+        crud.log_event(
+            db,
+            "INFO",
+            f"Export job {job_id} {'superseded' if artifact is None else 'completed'} for document {document_id}",
+        )
+    except jobs.LeaseLost:
+        raise
+    except Exception as e:
+        crud.log_event(db, "ERROR", f"Export job {job_id} failed", context=str(e))
+        crud.update_validation_job_status(db, job_id, "failed", error=str(e), lease_owner=owner)
@@ -0,0 +1,228 @@
+"""Mongo-backed job queue on top of the validation_jobs collection.
+
+A job is claimed atomically with find_one_and_update, which grants the claiming
+worker a lease. While the job runs, a heartbeat thread keeps extending the
+lease; if the worker dies, the lease expires and another worker re-claims the
+job until it has used up max_attempts. Handlers are registered per job `kind`.
+
+Every write a handler makes to its job is filtered on `lease_owner`; once
+another worker owns the job, the write matches nothing and raises LeaseLost,
+which aborts the handler without touching the job again.
+"""
+from __future__ import annotations
+
+import logging
+import os
+import socket
+import threading
+from datetime import datetime, timedelta
+from typing import Callable, Optional
+
+from fastapi import BackgroundTasks
+from pymongo import ReturnDocument
+from pymongo.database import Database
+
+from .config import settings
+from . import crud
+from .metrics import JOBS_IN_FLIGHT
+from .progress import TERMINAL_STATUSES, LeaseLost  # noqa: F401  (re-exported for job handlers)
+
+
+logger = logging.getLogger("app.jobs")
+
+
+JOBS = "validation_jobs"
+
+JobHandler = Callable[[Database, dict, Callable[[], bool]], None]
+HANDLERS: dict[str, JobHandler] = {}
+
+
+def register(kind: str) -> Callable[[JobHandler], JobHandler]:
+    def decorator(fn: JobHandler) -> JobHandler:
+        HANDLERS[kind] = fn
+        return fn
+
+    return decorator
+
+
+def default_worker_id() -> str:
+    return f"{socket.gethostname()}-{os.getpid()}"
+
+
+def _claimable_filter(now: datetime) -> dict:
+    return {
+        "cancel_requested": {"$ne": True},
+        # Children of a batch job run inside their parent's handler
+        "parent_job_id": None,
+        "$or": [
+            {"status": "pending"},
+            # Lease expired (worker died) or job left running by a pre-queue release
+            {"status": "running", "lease_expires_at": {"$lt": now}},
+            {"status": "running", "lease_expires_at": None},
+        ],
+        "$expr": {
+            "$lt": [
+                {"$ifNull": ["$attempts", 0]},
+                {"$ifNull": ["$max_attempts", settings.job_max_attempts]},
+            ]
+        },
+    }
+
+
+def claim_job(db: Database, worker_id: str, job_id: Optional[str] = None) -> Optional[dict]:
+    """Atomically lease the oldest claimable job (or a specific one) to `worker_id`"""
+    now = datetime.utcnow()
+    query = _claimable_filter(now)
+    if job_id is not None:
+        query["_id"] = crud._oid(job_id)
+    update = [
+        {
+            "$set": {
+                "status": "running",
+                "lease_owner": worker_id,
+                "lease_expires_at": now + timedelta(seconds=settings.job_lease_seconds),
+                "heartbeat_at": now,
+                "started_at": {"$ifNull": ["$started_at", now]},
+                "attempts": {"$add": [{"$ifNull": ["$attempts", 0]}, 1]},
+            }
+        }
+    ]
+    return db[JOBS].find_one_and_update(
+        query, update, sort=[("created_at", 1)], return_document=ReturnDocument.AFTER
+    )
+
+
+def fail_exhausted_jobs(db: Database) -> int:
+    """Fail jobs whose lease expired after their last allowed attempt"""
+    now = datetime.utcnow()
+    res = db[JOBS].update_many(
+        {
+            "status": "running",
+            "lease_expires_at": {"$lt": now},
+            "$expr": {
+                "$gte": [
+                    {"$ifNull": ["$attempts", 0]},
+                    {"$ifNull": ["$max_attempts", settings.job_max_attempts]},
+                ]
+            },
+        },
+        {
+            "$set": {
+                "status": "failed",
+                "error": "Job lease expired after the maximum number of attempts",
+                "completed_at": now,
+                "lease_owner": None,
+                "lease_expires_at": None,
+            }
+        },
+    )
+    return res.modified_count
+
+
+def request_cancel(db: Database, job_id: str) -> Optional[dict]:
+    """Cancel a pending job immediately, or flag a running one so its worker stops"""
+    now = datetime.utcnow()
+    it = db[JOBS].find_one_and_update(
+        {"_id": crud._oid(job_id), "status": "pending"},
+        {"$set": {"status": "cancelled", "cancel_requested": True, "completed_at": now}},
+        return_document=ReturnDocument.AFTER,
+    )
+    if it:
+        # Children of a batch that never started are cancelled with it
+        db[JOBS].update_many(
+            {"parent_job_id": job_id, "status": "pending"},
+            {"$set": {"status": "cancelled", "cancel_requested": True, "completed_at": now}},
+        )
+        return it
+    it = db[JOBS].find_one_and_update(
+        {"_id": crud._oid(job_id), "status": "running"},
+        {"$set": {"cancel_requested": True}},
+        return_document=ReturnDocument.AFTER,
+    )
+    return it or crud.get_validation_job(db, job_id)
+
+
+class Lease:
+    """Heartbeat thread that extends a job lease and notices cancellation or lease loss"""
+
+    def __init__(self, db: Database, job_id: str, worker_id: str) -> None:
+        self.db = db
+        self.job_id = job_id
+        self.worker_id = worker_id
+        self.cancelled = False
+        self.lost = False
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, name=f"lease-{job_id}", daemon=True)
+
+    def __enter__(self) -> "Lease":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._stopped.set()
+        self._thread.join()
+
+    def should_stop(self) -> bool:
+        """True once cancellation was requested; raises LeaseLost once another worker owns the job"""
+        if self.lost:
+            raise LeaseLost(self.job_id)
+        return self.cancelled
+
+    def beat(self) -> None:
+        now = datetime.utcnow()
+        it = self.db[JOBS].find_one_and_update(
+            {"_id": crud._oid(self.job_id), "lease_owner": self.worker_id, "status": "running"},
+            {"$set": {"lease_expires_at": now + timedelta(seconds=settings.job_lease_seconds), "heartbeat_at": now}},
+            projection={"cancel_requested": 1},
+        )
+        if it is None:
+            self.lost = True
+        elif it.get("cancel_requested"):
+            self.cancelled = True
+
+    def _run(self) -> None:
+        while not self._stopped.wait(settings.job_heartbeat_seconds):
+            try:
+                self.beat()
+            except Exception:
+                pass  # Transient Mongo error: retry on the next beat; the lease covers several beats
+
+
+def run_job(db: Database, job: dict, worker_id: str) -> None:
+    """Run a claimed job under a heartbeat lease"""
+    job_id = str(job["_id"])
+    kind = job.get("kind") or "validation"
+    handler = HANDLERS.get(kind)
+    try:
+        if handler is None:
+            crud.update_validation_job_status(
+                db, job_id, "failed", error=f"No handler for job kind '{kind}'", lease_owner=worker_id
+            )
+            return
+        with Lease(db, job_id, worker_id) as lease, JOBS_IN_FLIGHT.labels(kind).track_inprogress():
+            handler(db, job, lease.should_stop)
+    except LeaseLost:
+        # The new owner runs the job from the start; nothing more is written here
+        logger.warning("Worker %s lost the lease on job %s", worker_id, job_id)
+
+
+def run_claimed(job_id: str) -> None:
+    """Claim a specific job and run it in this process (BackgroundTasks execution)"""
+    from .database import get_db
+
+    db = get_db()
+    worker_id = default_worker_id()
+    job = claim_job(db, worker_id, job_id)
+    if job is not None:
+        run_job(db, job, worker_id)
+
+
+def enqueue(job: dict, background_tasks: BackgroundTasks) -> None:
+    """Hand a freshly created pending job to the configured executor.
+
+    With VOS_JOB_BACKEND=queue the job stays pending until an `app.worker`
+    process claims it; otherwise it runs in this API process after the response.
+    """
+    if settings.job_backend.lower() == "queue":
+        return
+    background_tasks.add_task(run_claimed, str(job["_id"]))
@@ -1,8 +1,13 @@
-from fastapi import FastAPI
+from fastapi import Depends, FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
+from pymongo.database import Database
 
-from .database import init_db
-from .routers import projects, documents, validation, logs
+from . import metrics
+from .database import get_db, init_db
+from .storage import storage_service
+from .utils.compare_pool import comparer
+from .utils.ocr import ocr_client
+from .routers import projects, documents, validation, logs, maintenance
 
 
 app = FastAPI(title="Validation OCR System", version="0.1.0")
@@ -21,10 +26,19 @@ def on_startup() -> None:
     init_db()
 
 
+@app.on_event("shutdown")
+async def on_shutdown() -> None:
+    ocr_client.close()
+    await ocr_client.aclose()
+    comparer.close()
+    storage_service.close()
+
+
 app.include_router(projects.router, prefix="/api/projects", tags=["projects"])
 app.include_router(documents.router, prefix="/api/documents", tags=["documents"])
 app.include_router(validation.router, prefix="/api/validation", tags=["validation"])
 app.include_router(logs.router, prefix="/api/logs", tags=["logs"])
+app.include_router(maintenance.router, prefix="/api/maintenance", tags=["maintenance"])
 
 
 @app.get("/health")
@@ -32,3 +46,7 @@ def health() -> dict:
     return {"status": "ok"}
 
 
+@app.get("/metrics", include_in_schema=False)
+def prometheus_metrics(db: Database = Depends(get_db)) -> Response:
+    payload, content_type = metrics.render(db)
+    return Response(content=payload, media_type=content_type)
@@ -0,0 +1,122 @@
+"""Prometheus instrumentation for the validation hot path.
+
+Stage histograms cover the steps of validating one upload (input read, OCR,
+compare, persist); storage, OCR and Mongo calls are timed where they happen.
+The API exposes everything on /metrics; `python -m app.worker --metrics-port`
+serves a worker's own metrics.
+"""
+from __future__ import annotations
+
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator
+
+import httpx
+from prometheus_client import CONTENT_TYPE_LATEST, Counter, Gauge, Histogram, generate_latest
+from pymongo.database import Database
+
+
+# Seconds; OCR calls can take tens of seconds, comparisons well under a millisecond
+_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+
+VALIDATION_STAGE_SECONDS = Histogram(
+    "vos_validation_stage_seconds",
+    "Time spent per stage of validating one upload",
+    ["stage"],
+    buckets=_BUCKETS,
+)
+STORAGE_SECONDS = Histogram(
+    "vos_storage_operation_seconds",
+    "Storage backend call duration",
+    ["operation", "backend"],
+    buckets=_BUCKETS,
+)
+MONGO_SECONDS = Histogram(
+    "vos_mongo_operation_seconds",
+    "Duration of hot-path MongoDB operations",
+    ["operation"],
+    buckets=_BUCKETS,
+)
+OCR_REQUEST_SECONDS = Histogram(
+    "vos_ocr_request_seconds",
+    "OCR service call duration, including retries",
+    ["ocr_url"],
+    buckets=_BUCKETS,
+)
+OCR_ERRORS = Counter(
+    "vos_ocr_errors_total",
+    "Failed OCR service calls",
+    ["ocr_url", "reason"],
+)
+OCR_CACHE_REQUESTS = Counter(
+    "vos_ocr_cache_requests_total",
+    "OCR cache lookups",
+    ["result"],
+)
+OCR_CONCURRENCY_LIMIT = Gauge(
+    "vos_ocr_concurrency_limit",
+    "Current adaptive concurrency limit per OCR endpoint",
+    ["ocr_url"],
+)
+OCR_CIRCUIT_STATE = Gauge(
+    "vos_ocr_circuit_state",
+    "OCR endpoint circuit breaker state: 0 closed, 1 half-open, 2 open",
+    ["ocr_url"],
+)
+JOBS_IN_FLIGHT = Gauge(
+    "vos_jobs_in_flight",
+    "Jobs currently running in this process",
+    ["kind"],
+)
+JOB_QUEUE_DEPTH = Gauge(
+    "vos_job_queue_depth",
+    "Pending jobs waiting to be claimed",
+)
+
+
+class StageTimer:
+    """Accumulates per-stage durations of one upload and feeds the stage histogram"""
+
+    def __init__(self) -> None:
+        self.timings: Dict[str, float] = {}
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - started
+            self.timings[name] = self.timings.get(name, 0.0) + elapsed
+            VALIDATION_STAGE_SECONDS.labels(name).observe(elapsed)
+
+    def rounded(self) -> Dict[str, float]:
+        return {name: round(seconds, 6) for name, seconds in self.timings.items()}
+
+
+def ocr_error_reason(exc: BaseException) -> str:
+    from .utils.ocr import OCRDeadlineExceeded
+    from .utils.ocr_limits import CircuitOpenError
+
+    if isinstance(exc, CircuitOpenError):
+        return "circuit_open"
+    if isinstance(exc, OCRDeadlineExceeded):
+        return "deadline"
+    if isinstance(exc, httpx.TimeoutException):
+        return "timeout"
+    if isinstance(exc, httpx.HTTPStatusError):
+        return f"http_{exc.response.status_code}"
+    if isinstance(exc, httpx.TransportError):
+        return "connection"
+    return "other"
+
+
+def render(db: Database) -> tuple[bytes, str]:
+    """Exposition payload and content type; refreshes the gauges that are read from Mongo"""
+    from . import crud
+
+    try:
+        JOB_QUEUE_DEPTH.set(crud.count_pending_jobs(db))
+    except Exception:
+        pass  # Keep serving the other metrics while Mongo is unreachable
+    return generate_latest(), CONTENT_TYPE_LATEST
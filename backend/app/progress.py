@@ -0,0 +1,126 @@
+"""Job progress fan-out.
+
+`broker` is an in-process pub/sub that pushes job events to streaming clients
+(Server-Sent Events) without touching Mongo. `ProgressReporter` coalesces the
+progress writes a running job makes to its validation_jobs document, so that
+Mongo is updated at most every N uploads or T milliseconds.
+"""
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+from contextlib import asynccontextmanager
+from datetime import datetime
+from typing import AsyncIterator, Optional
+
+from bson import ObjectId
+from pymongo.database import Database
+
+from .config import settings
+
+
+TERMINAL_STATUSES = ("completed", "failed", "cancelled")
+
+
+class LeaseLost(Exception):
+    """A job write matched nothing because the job is no longer leased to this worker"""
+
+
+def job_event(job: dict) -> dict:
+    """Compact progress payload of a validation_jobs document"""
+    return {
+        "job_id": str(job.get("_id")),
+        "status": job.get("status"),
+        "total_uploads": job.get("total_uploads"),
+        "processed_uploads": job.get("processed_uploads"),
+        "error": job.get("error"),
+    }
+
+
+class ProgressBroker:
+    """Thread-safe publisher feeding asyncio subscriber queues"""
+
+    def __init__(self) -> None:
+        self._subscribers: dict[str, list[tuple[asyncio.AbstractEventLoop, asyncio.Queue]]] = {}
+        self._lock = threading.Lock()
+
+    def publish(self, job_id: str, event: dict) -> None:
+        with self._lock:
+            subscribers = list(self._subscribers.get(job_id, ()))
+        for loop, queue in subscribers:
+            try:
+                loop.call_soon_threadsafe(queue.put_nowait, event)
+            except RuntimeError:
+                pass  # Subscriber's loop already closed
+
+    @asynccontextmanager
+    async def subscribe(self, job_id: str) -> AsyncIterator[asyncio.Queue]:
+        entry = (asyncio.get_running_loop(), asyncio.Queue())
+        with self._lock:
+            self._subscribers.setdefault(job_id, []).append(entry)
+        try:
+            yield entry[1]
+        finally:
+            with self._lock:
+                subscribers = self._subscribers.get(job_id, [])
+                if entry in subscribers:
+                    subscribers.remove(entry)
+                if not subscribers:
+                    self._subscribers.pop(job_id, None)
+
+
+broker = ProgressBroker()
+
+
+class ProgressReporter:
+    """Publishes every progress step in-process and persists it in coalesced batches"""
+
+    def __init__(
+        self,
+        db: Database,
+        job_id: str,
+        total_uploads: Optional[int],  # None when the total is not known up front
+        every: Optional[int] = None,
+        interval_ms: Optional[int] = None,
+        lease_owner: Optional[str] = None,
+    ) -> None:
+        self.db = db
+        self.job_id = job_id
+        self.lease_owner = lease_owner
+        self.total_uploads = total_uploads
+        self.every = max(1, every or settings.progress_write_every)
+        self.interval = (interval_ms if interval_ms is not None else settings.progress_write_interval_ms) / 1000.0
+        self.processed = 0
+        self._written = 0
+        self._written_at = time.monotonic()
+
+    def advance(self, processed: int) -> None:
+        self.processed = processed
+        broker.publish(
+            self.job_id,
+            {
+                "job_id": self.job_id,
+                "status": "running",
+                "total_uploads": self.total_uploads,
+                "processed_uploads": processed,
+                "error": None,
+            },
+        )
+        due = processed - self._written >= self.every or time.monotonic() - self._written_at >= self.interval
+        if due:
+            self.flush()
+
+    def flush(self) -> None:
+        if self.processed == self._written:
+            return
+        query: dict = {"_id": ObjectId(self.job_id)}
+        if self.lease_owner is not None:
+            query["lease_owner"] = self.lease_owner
+        res = self.db["validation_jobs"].update_one(
+            query, {"$set": {"processed_uploads": self.processed, "progress_at": datetime.utcnow()}}
+        )
+        if self.lease_owner is not None and res.matched_count == 0:
+            raise LeaseLost(self.job_id)
+        self._written = self.processed
+        self._written_at = time.monotonic()
@@ -0,0 +1,140 @@
+"""Storage reconciliation: find and collect stored files nothing refers to.
+
+Orphans come from re-uploads written under a new date-prefixed key, from
+deletes whose storage call failed, and from interrupted cascades. The job
+loads the identifiers referenced by `documents`, `uploads` and
+`export_artifacts` into a set, streams the bucket or local tree page by page,
+and deletes or quarantines unreferenced files in batches. Only the folders
+this service writes (`<dd-mm-yyyy>/uploads|samples|user_inputs|exports/...`)
+are considered, and files younger than the grace period are left alone: an
+upload's file is saved before its record is inserted.
+"""
+from __future__ import annotations
+
+import re
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Optional
+
+from pymongo.database import Database
+
+from .config import settings
+from . import crud, jobs
+from .progress import ProgressReporter
+from .storage import StoredFile, storage_service
+
+
+MANAGED_FOLDERS = {"uploads", "samples", "user_inputs", "exports"}
+_DATE_PREFIX = re.compile(r"^\d{2}-\d{2}-\d{4}$")
+
+
+def is_managed_key(key: str) -> bool:
+    parts = key.split("/")
+    return len(parts) >= 3 and bool(_DATE_PREFIX.match(parts[0])) and parts[1] in MANAGED_FOLDERS
+
+
+def referenced_keys(db: Database) -> set[str]:
+    keys = (storage_service.key_of(path) for path in crud.iter_referenced_storage_paths(db))
+    return {key for key in keys if key}
+
+
+def reconcile_storage(
+    db: Database,
+    *,
+    dry_run: bool,
+    action: str,
+    grace_seconds: int,
+    on_progress: Optional[Callable[[int], None]] = None,
+    should_stop: Optional[Callable[[], bool]] = None,
+) -> tuple[dict, list[dict]]:
+    """Scan storage for orphans; returns (summary, first orphans found).
+
+    Unless `dry_run`, orphans are removed in batches with `action` "delete" or "quarantine".
+    """
+    cutoff = datetime.now(timezone.utc) - timedelta(seconds=grace_seconds)
+    referenced = referenced_keys(db)
+    summary = {
+        "scanned": 0,
+        "unmanaged": 0,
+        "referenced": 0,
+        "recent": 0,
+        "orphaned": 0,
+        "orphaned_bytes": 0,
+        "removed": 0,
+        "failed": 0,
+    }
+    orphans: list[dict] = []
+    batch: list[StoredFile] = []
+    batch_size = max(1, settings.storage_gc_batch_size)
+
+    def collect() -> None:
+        keys = [item.key for item in batch]
+        failed = storage_service.delete_keys(keys) if action == "delete" else storage_service.quarantine_keys(keys)
+        summary["removed"] += len(keys) - len(failed)
+        summary["failed"] += len(failed)
+        batch.clear()
+
+    for item in storage_service.iter_files(page_size=batch_size):
+        summary["scanned"] += 1
+        if not is_managed_key(item.key):
+            summary["unmanaged"] += 1
+        elif item.key in referenced:
+            summary["referenced"] += 1
+        elif item.modified > cutoff:
+            summary["recent"] += 1
+        else:
+            summary["orphaned"] += 1
+            summary["orphaned_bytes"] += item.size
+            if len(orphans) < settings.storage_gc_report_limit:
+                orphans.append({"key": item.key, "size": item.size, "modified": item.modified})
+            if not dry_run:
+                batch.append(item)
+                if len(batch) >= batch_size:
+                    collect()
+        if summary["scanned"] % batch_size == 0:
+            if on_progress is not None:
+                on_progress(summary["scanned"])
+            if should_stop is not None and should_stop():
+                break
+    if batch:
+        collect()
+    return summary, orphans
+
+
+@jobs.register("storage_gc")
+def _handle_storage_gc_job(db: Database, job: dict, should_stop: Callable[[], bool]) -> None:
+    job_id = str(job["_id"])
+    owner = job.get("lease_owner")
+    dry_run = bool(job.get("dry_run", True))
+    try:
+        crud.update_validation_job_status(db, job_id, "running", processed_uploads=0, lease_owner=owner)
+        reporter = ProgressReporter(db, job_id, None, lease_owner=owner)
+        summary, orphans = reconcile_storage(
+            db,
+            dry_run=dry_run,
+            action=job.get("action") or "quarantine",
+            grace_seconds=int(job.get("grace_seconds", settings.storage_gc_grace_seconds)),
+            on_progress=reporter.advance,
+            should_stop=should_stop,
+        )
+        stopped = should_stop()
+        crud.update_validation_job_status(
+            db,
+            job_id,
+            "cancelled" if stopped else "completed",
+            summary=summary,
+            result={"orphans": orphans},
+            processed_uploads=summary["scanned"],
+            lease_owner=owner,
+        )
+        crud.log_event(
+            db,
+            "INFO",
+            f"Storage reconciliation job {job_id} {'(dry run) ' if dry_run else ''}"
+            f"{'cancelled' if stopped else 'completed'}: {summary['orphaned']} orphans "
+            f"({summary['orphaned_bytes']} bytes) of {summary['scanned']} files, {summary['removed']} removed",
+        )
+    except jobs.LeaseLost:
+        raise
+    except Exception as e:
+        crud.log_event(db, "ERROR", f"Storage reconciliation job {job_id} failed", context=str(e))
+        crud.update_validation_job_status(db, job_id, "failed", error=str(e), lease_owner=owner)
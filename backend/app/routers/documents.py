@@ -1,26 +1,65 @@
 import json
-from pathlib import Path
+import os
+import tempfile
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from pathlib import Path, PurePosixPath
 from datetime import datetime
-from io import BytesIO
+from typing import IO, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Request
-from fastapi.responses import StreamingResponse
+from bson import ObjectId
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, UploadFile, File, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import FileResponse, JSONResponse
 from pymongo.database import Database
-from openpyxl import Workbook
-from openpyxl.styles import Font, PatternFill, Alignment, Border, Side
+from starlette.background import BackgroundTask
 
 from ..config import settings
 from ..database import get_db
-from .. import crud, schemas
+from ..export import UPLOAD_ID_PLACEHOLDER, XLSX_MEDIA_TYPE, link_builder, write_excel_report
+from .. import cascade, crud, jobs, schemas
 from ..utils.validation import extract_text_fields
-from ..storage import storage_service
+from ..utils.ocr_cache import file_sha256
+from ..utils.similarity import get_metric
+from ..utils.archive import ArchiveError, ArchiveReader, ManifestEntry, load_entries
+from ..storage import UploadTooLarge, storage_service
 
 
 router = APIRouter()
 
+UPLOAD_EXTENSIONS = {".pdf", ".png", ".jpg", ".jpeg", ".tif", ".tiff"}
+
+
+def _check_similarity_metrics(payload: schemas.DocumentCreate | schemas.DocumentUpdate) -> None:
+    names = list((payload.field_metrics or {}).values())
+    if payload.similarity_metric:
+        names.append(payload.similarity_metric)
+    try:
+        for name in names:
+            get_metric(name)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+async def _discard_replaced(previous: Optional[str], current: str) -> None:
+    # A re-upload on another day gets a new date-prefixed key; the old file would be orphaned
+    if previous and previous != current:
+        try:
+            await storage_service.adelete_file(previous)
+        except Exception:
+            pass  # Left for the storage reconciliation job
+
+
+def _reject_oversized(file: UploadFile) -> None:
+    if file.size is not None and file.size > settings.max_upload_bytes:
+        raise HTTPException(
+            status_code=413, detail=f"File exceeds the maximum upload size of {settings.max_upload_bytes} bytes"
+        )
+
 
 @router.post("/", response_model=schemas.DocumentOut)
 def create_document(payload: schemas.DocumentCreate, db: Database = Depends(get_db)):
+    _check_similarity_metrics(payload)
     project = crud.get_project(db, str(payload.project_id)) if isinstance(payload.project_id, str) else crud.get_project(db, payload.project_id)  # type: ignore
     if not project:
         raise HTTPException(status_code=404, detail="Project not found")
@@ -29,6 +68,7 @@ def create_document(payload: schemas.DocumentCreate, db: Database = Depends(get_
 
 @router.patch("/{doc_id}", response_model=schemas.DocumentOut)
 def update_document(doc_id: str, payload: schemas.DocumentUpdate, db: Database = Depends(get_db)):
+    _check_similarity_metrics(payload)
     doc = crud.update_document(db, doc_id, payload)
     if not doc:
         raise HTTPException(status_code=404, detail="Document not found")
@@ -49,48 +89,36 @@ def get_document(doc_id: str, db: Database = Depends(get_db)):
 
 
 @router.delete("/{doc_id}")
-def delete_document(doc_id: str, db: Database = Depends(get_db)):
+def delete_document(
+    doc_id: str,
+    background_tasks: BackgroundTasks,
+    background: bool = False,
+    db: Database = Depends(get_db),
+):
+    """Delete a document with its uploads, results and files (as a `cascade_delete` job with `background=true`)"""
     doc = crud.get_document_raw(db, doc_id)
     if not doc:
         raise HTTPException(status_code=404, detail="Document not found")
-    
-    # Delete sample JSON if exists
-    if doc.get("sample_json_path"):
-        try:
-            storage_service.delete_file(doc["sample_json_path"])
-        except Exception:
-            pass
-    
-    # Get all uploads for this document and delete their files
-    uploads = db["uploads"].find({"document_id": doc_id})
-    for upload in uploads:
-        # Delete uploaded file
-        if upload.get("file_path"):
-            try:
-                storage_service.delete_file(upload["file_path"])
-            except Exception:
-                pass
-        # Delete user input JSON if exists
-        if upload.get("user_input_json_path"):
-            try:
-                storage_service.delete_file(upload["user_input_json_path"])
-            except Exception:
-                pass
-    
-    success = crud.delete_document(db, doc_id)
-    if not success:
+    if background:
+        job = crud.create_cascade_delete_job(db, document_ids=[doc_id])
+        jobs.enqueue(job, background_tasks)
+        return JSONResponse(status_code=202, content=jsonable_encoder(crud.serialize_validation_job(job)))
+
+    summary = cascade.delete_documents(db, [doc_id])
+    if not summary["documents"]:
         raise HTTPException(status_code=404, detail="Document not found")
-    return {"message": "Document deleted successfully"}
+    return {"message": "Document deleted successfully", "deleted": summary}
 
 
 @router.post("/{doc_id}/sample-json", response_model=schemas.DocumentOut)
 async def upload_sample_json(doc_id: str, sample: UploadFile = File(...), db: Database = Depends(get_db)):
     if not sample.filename.endswith(".json"):
         raise HTTPException(status_code=400, detail="Sample must be a JSON file")
-    doc = crud.get_document_raw(db, doc_id)
+    doc = await run_in_threadpool(crud.get_document_raw, db, doc_id)
     if not doc:
         raise HTTPException(status_code=404, detail="Document not found")
 
+    _reject_oversized(sample)
     content = await sample.read()
     # Validate JSON
     try:
@@ -99,10 +127,11 @@ async def upload_sample_json(doc_id: str, sample: UploadFile = File(...), db: Da
         raise HTTPException(status_code=400, detail="Invalid JSON content")
 
     key = f"samples/doc_{doc_id}_sample.json"
-    identifier = storage_service.save_bytes(key, content, content_type="application/json")
-    updated = crud.set_document_sample_json_path(db, doc_id, identifier)
+    identifier = await storage_service.asave_bytes(key, content, content_type="application/json")
+    updated = await run_in_threadpool(crud.set_document_sample_json_path, db, doc_id, identifier, sha256=file_sha256(content))
     if not updated:
         raise HTTPException(status_code=404, detail="Document not found")
+    await _discard_replaced(doc.get("sample_json_path"), identifier)
     serialized = crud.serialize_document(updated)
     if not serialized:
         raise HTTPException(status_code=500, detail="Failed to serialize document")
@@ -127,33 +156,213 @@ def get_text_fields(doc_id: str, db: Database = Depends(get_db)):
 
 @router.post("/{doc_id}/upload", response_model=schemas.UploadOut)
 async def upload_file(doc_id: str, file: UploadFile = File(...), db: Database = Depends(get_db)):
-    doc = crud.get_document_raw(db, doc_id)
+    doc = await run_in_threadpool(crud.get_document_raw, db, doc_id)
     if not doc:
         raise HTTPException(status_code=404, detail="Document not found")
     ext = Path(file.filename).suffix.lower()
-    if ext not in {".pdf", ".png", ".jpg", ".jpeg", ".tif", ".tiff"}:
+    if ext not in UPLOAD_EXTENSIONS:
         raise HTTPException(status_code=400, detail="Unsupported file type")
-    content = await file.read()
+    _reject_oversized(file)
     key = f"uploads/doc_{doc_id}_{file.filename}"
-    identifier = storage_service.save_bytes(key, content, content_type=file.content_type or "application/octet-stream")
-    return crud.create_upload(db, doc_id, identifier)
+    # Stream the spooled upload to storage chunk by chunk instead of reading it into memory
+    try:
+        identifier, sha256, _ = await storage_service.asave_stream(
+            key,
+            file.file,
+            file.content_type or "application/octet-stream",
+            settings.max_upload_bytes,
+        )
+    except UploadTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    return await run_in_threadpool(crud.create_upload, db, doc_id, identifier, file_sha256=sha256)
+
+
+def _archive_user_input(reader: ArchiveReader, entry: ManifestEntry) -> Optional[bytes]:
+    """User input JSON for a manifest entry, re-encoded when given inline"""
+    if entry.user_input is None:
+        return None
+    if isinstance(entry.user_input, dict):
+        return json.dumps(entry.user_input).encode("utf-8")
+    if not isinstance(entry.user_input, str):
+        raise ArchiveError("user_input must be a path inside the archive or a JSON object")
+    if entry.user_input not in reader.sizes:
+        raise ArchiveError(f"User input {entry.user_input} not found in archive")
+    content = reader.read(entry.user_input, settings.max_upload_bytes)
+    try:
+        parsed = json.loads(content.decode("utf-8"))
+    except Exception:
+        raise ArchiveError(f"Invalid JSON content in {entry.user_input}") from None
+    if not isinstance(parsed, dict):
+        raise ArchiveError(f"{entry.user_input} must contain a JSON object")
+    return content
+
+
+def _store_archive_entry(
+    doc_id: str, upload_id: ObjectId, name: str, stream: IO[bytes], user_input: Optional[bytes]
+) -> tuple[dict, int]:
+    """Write one archive member (and its user input) to storage; returns the upload record and file size"""
+    key = f"uploads/doc_{doc_id}_{PurePosixPath(name).name}"
+    with stream:
+        identifier, sha256, size = storage_service.save_stream(
+            key, stream, "application/octet-stream", settings.max_upload_bytes
+        )
+    record = {
+        "_id": upload_id,
+        "document_id": doc_id,
+        "file_path": identifier,
+        "file_sha256": sha256,
+        "user_input_json_path": None,
+    }
+    if user_input is not None:
+        try:
+            record["user_input_json_path"] = storage_service.save_bytes(
+                f"user_inputs/upload_{upload_id}_user.json", user_input, content_type="application/json"
+            )
+        except Exception:
+            storage_service.delete_file(identifier)
+            raise
+        record["user_input_sha256"] = file_sha256(user_input)
+    return record, size
+
+
+@router.post("/{doc_id}/archive", response_model=schemas.ArchiveIngestReport)
+def upload_archive(
+    doc_id: str,
+    background_tasks: BackgroundTasks,
+    archive: UploadFile = File(...),
+    validate: bool = False,
+    db: Database = Depends(get_db),
+):
+    """Create uploads from a ZIP or tar archive of files plus user-input JSON.
+
+    The archive's manifest.json maps each file to its user input, either a JSON
+    file in the archive or an inline object. Without a manifest, `scan.pdf` is
+    paired with `scan.json`. Files are written to storage in parallel, the
+    upload records are inserted together, and entries that cannot be ingested
+    are reported without failing the others. With `validate=true` a validation
+    job is queued for the new uploads that have user input.
+    """
+    doc = crud.get_document_raw(db, doc_id)
+    if not doc:
+        raise HTTPException(status_code=404, detail="Document not found")
+    if archive.size is not None and archive.size > settings.max_archive_bytes:
+        raise HTTPException(
+            status_code=413, detail=f"Archive exceeds the maximum size of {settings.max_archive_bytes} bytes"
+        )
+    try:
+        reader = ArchiveReader(archive.file)
+    except ArchiveError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    with reader:
+        if len(reader.sizes) > settings.max_archive_entries:
+            raise HTTPException(
+                status_code=400, detail=f"Archive has more than {settings.max_archive_entries} files"
+            )
+        try:
+            manifest = load_entries(reader, UPLOAD_EXTENSIONS, settings.max_upload_bytes)
+        except ArchiveError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+        report = [schemas.ArchiveIngestEntry(file=entry.file, status="failed") for entry in manifest]
+        records: dict[int, dict] = {}
+        seen_names: set[str] = set()
+        workers = max(1, settings.archive_ingest_workers)
+        # Members are read in archive order on this thread and written to storage by the pool;
+        # at most two members per worker are extracted ahead of their write
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            pending: dict[Future, int] = {}
+
+            def collect(done: set[Future]) -> None:
+                for future in done:
+                    index = pending.pop(future)
+                    try:
+                        records[index], report[index].size = future.result()
+                    except Exception as e:
+                        report[index].error = str(e)
+
+            for index, entry in enumerate(manifest):
+                name = PurePosixPath(entry.file).name
+                try:
+                    if PurePosixPath(entry.file).suffix.lower() not in UPLOAD_EXTENSIONS:
+                        raise ArchiveError("Unsupported file type")
+                    if entry.file not in reader.sizes:
+                        raise ArchiveError("File not found in archive")
+                    if name in seen_names:
+                        raise ArchiveError(f"Another entry is already stored as {name}")
+                    if reader.sizes[entry.file] > settings.max_upload_bytes:
+                        raise ArchiveError(f"File exceeds the maximum upload size of {settings.max_upload_bytes} bytes")
+                    user_input = _archive_user_input(reader, entry)
+                    stream = reader.extract(entry.file, settings.storage_chunk_bytes)
+                except Exception as e:
+                    report[index].error = str(e)
+                    continue
+                seen_names.add(name)
+                report[index].has_user_input = user_input is not None
+                if len(pending) >= 2 * workers:
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    collect(done)
+                upload_id = ObjectId()
+                pending[pool.submit(_store_archive_entry, doc_id, upload_id, entry.file, stream, user_input)] = index
+            collect(set(pending))
+
+    created_at = datetime.utcnow()
+    ordered = [records[index] for index in sorted(records)]
+    for record in ordered:
+        record["created_at"] = created_at
+    try:
+        crud.create_uploads(db, ordered)
+    except Exception:
+        for record in ordered:
+            for path in (record["file_path"], record["user_input_json_path"]):
+                if path:
+                    try:
+                        storage_service.delete_file(path)
+                    except Exception:
+                        pass
+        raise
+    for index, record in records.items():
+        report[index].status = "ingested"
+        report[index].upload_id = str(record["_id"])
+
+    job = None
+    to_validate = [str(record["_id"]) for record in ordered if record["user_input_json_path"]]
+    if validate and to_validate:
+        job = crud.create_validation_job(db, doc_id, upload_ids=to_validate)
+        jobs.enqueue(job, background_tasks)
+    crud.log_event(
+        db, "INFO", f"Ingested {len(ordered)} of {len(report)} archive entries for document {doc_id}", context=archive.filename
+    )
+    return schemas.ArchiveIngestReport(
+        document_id=doc_id,
+        total=len(report),
+        ingested=len(ordered),
+        failed=len(report) - len(ordered),
+        entries=report,
+        job=crud.serialize_validation_job(job) if job else None,
+    )
 
 
 @router.post("/{upload_id}/user-input", response_model=schemas.UploadOut)
 async def upload_user_input(upload_id: str, form_json: UploadFile = File(...), db: Database = Depends(get_db)):
     if not form_json.filename.endswith(".json"):
         raise HTTPException(status_code=400, detail="User input must be a JSON file")
+    _reject_oversized(form_json)
     content = await form_json.read()
     # Validate JSON
     try:
         _ = json.loads(content.decode("utf-8"))
     except Exception:
         raise HTTPException(status_code=400, detail="Invalid JSON content")
+    upload = await run_in_threadpool(crud.get_upload_raw, db, upload_id)
+    if not upload:
+        raise HTTPException(status_code=404, detail="Upload not found")
     key = f"user_inputs/upload_{upload_id}_user.json"
-    identifier = storage_service.save_bytes(key, content, content_type="application/json")
-    updated = crud.set_upload_user_input(db, upload_id, identifier)
+    identifier = await storage_service.asave_bytes(key, content, content_type="application/json")
+    updated = await run_in_threadpool(crud.set_upload_user_input, db, upload_id, identifier, sha256=file_sha256(content))
     if not updated:
         raise HTTPException(status_code=404, detail="Upload not found")
+    await _discard_replaced(upload.get("user_input_json_path"), identifier)
     serialized = crud.serialize_upload(updated)
     if not serialized:
         raise HTTPException(status_code=500, detail="Failed to serialize upload")
@@ -241,7 +450,7 @@ def get_upload_user_input(upload_id: str, db: Database = Depends(get_db)):
 
 
 @router.get("/upload/{upload_id}/file", name="get_upload_file")
-def get_upload_file(upload_id: str, db: Database = Depends(get_db)):
+def get_upload_file(upload_id: str, request: Request, db: Database = Depends(get_db)):
     upload = crud.get_upload_raw(db, upload_id)
     if not upload:
         raise HTTPException(status_code=404, detail="Upload not found")
@@ -250,7 +459,83 @@ def get_upload_file(upload_id: str, db: Database = Depends(get_db)):
         raise HTTPException(status_code=404, detail="File not found")
     identifier = str(file_path)
     name = identifier.split("/")[-1] if identifier else "download"
-    return storage_service.file_response(identifier, download_name=name)
+    return storage_service.file_response(identifier, download_name=name, request=request)
+
+
+def _export_link_template(request: Request) -> str:
+    # Resolve the download route once instead of once per upload
+    return str(request.url_for("get_upload_file", upload_id=UPLOAD_ID_PLACEHOLDER))
+
+
+def _export_filename(doc: dict, created_at: datetime) -> str:
+    doc_name = doc.get("name", "document").replace(" ", "_")
+    return f"{doc_name}_report_{created_at.strftime('%Y%m%d_%H%M%S')}.xlsx"
+
+
+def _export_out(request: Request, doc_id: str, version: str, artifact: Optional[dict], job: Optional[dict]) -> schemas.ExportOut:
+    if artifact is not None:
+        return schemas.ExportOut(
+            document_id=doc_id,
+            version=version,
+            status="ready",
+            download_url=str(request.url_for("download_export", doc_id=doc_id)),
+            size=artifact.get("size"),
+            created_at=artifact.get("created_at"),
+        )
+    return schemas.ExportOut(
+        document_id=doc_id,
+        version=version,
+        status=job.get("status") if job else "missing",
+        job=crud.serialize_validation_job(job) if job else None,
+    )
+
+
+@router.post(
+    "/{doc_id}/export",
+    response_model=schemas.ExportOut,
+    responses={202: {"model": schemas.ExportOut, "description": "Export job queued or running"}},
+)
+def start_export(doc_id: str, request: Request, background_tasks: BackgroundTasks, db: Database = Depends(get_db)):
+    """Build the Excel report in the background, unless it is already built for the current results"""
+    if not crud.get_document_raw(db, doc_id):
+        raise HTTPException(status_code=404, detail="Document not found")
+    if not crud.document_has_uploads(db, doc_id):
+        raise HTTPException(status_code=400, detail="No uploads found for this document")
+    version = crud.export_version(db, doc_id)
+    artifact = crud.get_export_artifact(db, doc_id, version)
+    if artifact is not None:
+        return _export_out(request, doc_id, version, artifact, None)
+
+    job = crud.latest_export_job(db, doc_id, version)
+    if job is None or job.get("status") not in ("pending", "running"):
+        job = crud.create_export_job(db, doc_id, version, _export_link_template(request))
+        jobs.enqueue(job, background_tasks)
+    out = _export_out(request, doc_id, version, None, job)
+    return JSONResponse(status_code=202, content=jsonable_encoder(out))
+
+
+@router.get("/{doc_id}/export", response_model=schemas.ExportOut)
+def get_export(doc_id: str, request: Request, db: Database = Depends(get_db)):
+    """State of the Excel report for the current results"""
+    if not crud.get_document_raw(db, doc_id):
+        raise HTTPException(status_code=404, detail="Document not found")
+    version = crud.export_version(db, doc_id)
+    artifact = crud.get_export_artifact(db, doc_id, version)
+    job = None if artifact else crud.latest_export_job(db, doc_id, version)
+    return _export_out(request, doc_id, version, artifact, job)
+
+
+@router.get("/{doc_id}/export/download", name="download_export")
+def download_export(doc_id: str, request: Request, db: Database = Depends(get_db)):
+    doc = crud.get_document_raw(db, doc_id)
+    if not doc:
+        raise HTTPException(status_code=404, detail="Document not found")
+    artifact = crud.get_export_artifact(db, doc_id, crud.export_version(db, doc_id))
+    if artifact is None:
+        raise HTTPException(status_code=404, detail="No export for the current results; start one with POST /export")
+    return storage_service.file_response(
+        artifact["file_path"], download_name=_export_filename(doc, artifact["created_at"]), request=request
+    )
 
 
 @router.get("/{doc_id}/export-excel")
@@ -259,185 +544,28 @@ def export_excel_report(doc_id: str, request: Request, db: Database = Depends(ge
     doc = crud.get_document_raw(db, doc_id)
     if not doc:
         raise HTTPException(status_code=404, detail="Document not found")
-    
-    # Get all uploads
-    uploads = crud.list_uploads_by_document(db, doc_id)
-    if not uploads:
+    if not crud.document_has_uploads(db, doc_id):
         raise HTTPException(status_code=400, detail="No uploads found for this document")
-    
-    # Create workbook
-    wb = Workbook()
-    wb.remove(wb.active)  # Remove default sheet
-    
-    # Styles
-    header_fill = PatternFill(start_color="366092", end_color="366092", fill_type="solid")
-    header_font = Font(bold=True, color="FFFFFF")
-    border = Border(
-        left=Side(style='thin'),
-        right=Side(style='thin'),
-        top=Side(style='thin'),
-        bottom=Side(style='thin')
-    )
-    center_align = Alignment(horizontal='center', vertical='center')
-    
-    # Sheet 1: Summary
-    ws_summary = wb.create_sheet("Summary")
-    ws_summary.append(["File Name", "Upload Date", "Overall Accuracy", "Total Fields", "Status", "Download Link"])
-    
-    # Style header
-    for cell in ws_summary[1]:
-        cell.fill = header_fill
-        cell.font = header_font
-        cell.alignment = center_align
-        cell.border = border
-    
-    summary_data = []
-    all_details = []
-    
-    for upload in uploads:
-        upload_id = str(upload.get("_id"))
-        file_name = Path(upload.get("file_path", "")).name
-        upload_date = upload.get("created_at")
-        
-        # Get validation results
-        results = list(db["validation_results"].find({"upload_id": upload_id}).sort("created_at", -1))
-        
-        if results:
-            overall_accuracy = sum(r.get("accuracy", 0) for r in results) / len(results) if results else 0.0
-            status = "Validated"
-        else:
-            overall_accuracy = 0.0
-            status = "Not Validated"
-        
-        download_url = str(request.url_for("get_upload_file", upload_id=upload_id))
-        summary_data.append({
-            "file_name": file_name,
-            "upload_date": upload_date,
-            "overall_accuracy": overall_accuracy,
-            "total_fields": len(results),
-            "status": status,
-            "upload_id": upload_id,
-            "download_url": download_url,
-        })
-        
-        # Collect details
-        for r in results:
-            all_details.append({
-                "file_name": file_name,
-                "upload_date": upload_date,
-                "field_name": r.get("field_name"),
-                "user_value": r.get("user_value"),
-                "ocr_value": r.get("ocr_value"),
-                "accuracy": r.get("accuracy", 0.0),
-            })
-    
-    # Write summary data
-    for row_data in summary_data:
-        ws_summary.append([
-            row_data["file_name"],
-            row_data["upload_date"].strftime("%Y-%m-%d %H:%M:%S") if row_data["upload_date"] else "N/A",
-            f"{row_data['overall_accuracy'] * 100:.2f}%",
-            row_data["total_fields"],
-            row_data["status"],
-            row_data["download_url"],
-        ])
-        row_idx = ws_summary.max_row
-        link_cell = ws_summary.cell(row=row_idx, column=6)
-        link_cell.hyperlink = row_data["download_url"]
-        link_cell.value = "Download"
-        link_cell.style = "Hyperlink"
-    
-    # Style summary rows
-    for row in ws_summary.iter_rows(min_row=2, max_row=ws_summary.max_row):
-        for cell in row:
-            cell.border = border
-            if cell.column == 3:  # Accuracy column
-                cell.alignment = center_align
-                accuracy_val = float(cell.value.replace('%', '')) / 100 if cell.value else 0
-                if accuracy_val >= 0.9:
-                    cell.fill = PatternFill(start_color="C6EFCE", end_color="C6EFCE", fill_type="solid")
-                elif accuracy_val >= 0.7:
-                    cell.fill = PatternFill(start_color="FFEB9C", end_color="FFEB9C", fill_type="solid")
-                else:
-                    cell.fill = PatternFill(start_color="FFC7CE", end_color="FFC7CE", fill_type="solid")
-            if cell.column == 6:
-                cell.alignment = center_align
-    
-    # Auto-adjust column widths for summary
-    for column in ws_summary.columns:
-        max_length = 0
-        column_letter = column[0].column_letter
-        for cell in column:
-            try:
-                if len(str(cell.value)) > max_length:
-                    max_length = len(str(cell.value))
-            except:
-                pass
-        adjusted_width = min(max_length + 2, 50)
-        ws_summary.column_dimensions[column_letter].width = adjusted_width
-    
-    # Sheet 2: Detailed Results
-    ws_details = wb.create_sheet("Detailed Results")
-    ws_details.append(["File Name", "Upload Date", "Field Name", "User Value", "OCR Value", "Accuracy"])
-    
-    # Style header
-    for cell in ws_details[1]:
-        cell.fill = header_fill
-        cell.font = header_font
-        cell.alignment = center_align
-        cell.border = border
-    
-    # Write details
-    for detail in all_details:
-        ws_details.append([
-            detail["file_name"],
-            detail["upload_date"].strftime("%Y-%m-%d %H:%M:%S") if detail["upload_date"] else "N/A",
-            detail["field_name"],
-            detail["user_value"],
-            detail["ocr_value"],
-            f"{detail['accuracy'] * 100:.2f}%",
-        ])
-    
-    # Style details rows
-    for row in ws_details.iter_rows(min_row=2, max_row=ws_details.max_row):
-        for cell in row:
-            cell.border = border
-            if cell.column == 6:  # Accuracy column
-                cell.alignment = center_align
-                accuracy_val = float(cell.value.replace('%', '')) / 100 if cell.value else 0
-                if accuracy_val >= 0.9:
-                    cell.fill = PatternFill(start_color="C6EFCE", end_color="C6EFCE", fill_type="solid")
-                elif accuracy_val >= 0.7:
-                    cell.fill = PatternFill(start_color="FFEB9C", end_color="FFEB9C", fill_type="solid")
-                else:
-                    cell.fill = PatternFill(start_color="FFC7CE", end_color="FFC7CE", fill_type="solid")
-    
-    # Auto-adjust column widths for details
-    for column in ws_details.columns:
-        max_length = 0
-        column_letter = column[0].column_letter
-        for cell in column:
-            try:
-                if len(str(cell.value)) > max_length:
-                    max_length = len(str(cell.value))
-            except:
-                pass
-        adjusted_width = min(max_length + 2, 50)
-        ws_details.column_dimensions[column_letter].width = adjusted_width
-    
-    # Save to BytesIO
-    output = BytesIO()
-    wb.save(output)
-    output.seek(0)
-    
-    # Generate filename
-    doc_name = doc.get("name", "document").replace(" ", "_")
-    filename = f"{doc_name}_report_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx"
-    
-    return StreamingResponse(
-        output,
-        media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-        headers={"Content-Disposition": f"attachment; filename={filename}"}
-    )
 
+    # Served straight from storage when an export job already built this version
+    artifact = crud.get_export_artifact(db, doc_id, crud.export_version(db, doc_id))
+    if artifact is not None:
+        return storage_service.file_response(
+            artifact["file_path"], download_name=_export_filename(doc, artifact["created_at"]), request=request
+        )
 
+    fd, tmp_name = tempfile.mkstemp(prefix="vos-export-", suffix=".xlsx")
+    os.close(fd)
+    try:
+        write_excel_report(db, doc_id, Path(tmp_name), link_builder(_export_link_template(request)))
+    except BaseException:
+        os.unlink(tmp_name)
+        raise
+
+    # The temp file is streamed from disk and removed once the response is sent
+    return FileResponse(
+        tmp_name,
+        media_type=XLSX_MEDIA_TYPE,
+        filename=_export_filename(doc, datetime.now()),
+        background=BackgroundTask(os.unlink, tmp_name),
+    )
@@ -0,0 +1,38 @@
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException
+from pymongo.database import Database
+
+from ..config import settings
+from ..database import get_db
+from .. import crud, jobs, reconcile, schemas  # noqa: F401  (reconcile registers the storage_gc job handler)
+
+
+router = APIRouter()
+
+
+@router.post("/storage-gc", response_model=schemas.ValidationJobOut)
+def start_storage_gc(
+    payload: schemas.StorageGCRequest,
+    background_tasks: BackgroundTasks,
+    db: Database = Depends(get_db),
+):
+    """Start a storage reconciliation job (a dry run unless `dry_run` is false)"""
+    grace = payload.grace_seconds if payload.grace_seconds is not None else settings.storage_gc_grace_seconds
+    job = crud.create_storage_gc_job(db, payload.dry_run, payload.action, grace)
+    jobs.enqueue(job, background_tasks)
+    return crud.serialize_validation_job(job)  # type: ignore
+
+
+@router.get("/storage-gc/{job_id}", response_model=schemas.StorageGCReport)
+def get_storage_gc_report(job_id: str, db: Database = Depends(get_db)):
+    job = crud.get_validation_job(db, job_id)
+    if not job or job.get("kind") != "storage_gc":
+        raise HTTPException(status_code=404, detail="Storage reconciliation job not found")
+    return schemas.StorageGCReport(
+        job_id=job_id,
+        status=job.get("status"),
+        dry_run=bool(job.get("dry_run", True)),
+        action=job.get("action") or "quarantine",
+        error=job.get("error"),
+        summary=job.get("summary"),
+        orphans=(job.get("result") or {}).get("orphans", []),
+    )
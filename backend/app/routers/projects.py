@@ -1,8 +1,10 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
 from pymongo.database import Database
 
 from ..database import get_db
-from .. import crud, schemas
+from .. import cascade, crud, jobs, schemas
 
 
 router = APIRouter()
@@ -27,37 +29,25 @@ def update_project(project_id: str, payload: schemas.ProjectUpdate, db: Database
 
 
 @router.delete("/{project_id}")
-def delete_project(project_id: str, db: Database = Depends(get_db)):
-    from ..storage import storage_service
-    # Get all documents in this project to delete their files
-    docs = db["documents"].find({"project_id": project_id})
-    for doc in docs:
-        doc_id = str(doc["_id"])
-        # Delete sample JSON if exists
-        if doc.get("sample_json_path"):
-            try:
-                storage_service.delete_file(doc["sample_json_path"])
-            except Exception:
-                pass
-        # Get all uploads for this document
-        uploads = db["uploads"].find({"document_id": doc_id})
-        for upload in uploads:
-            # Delete uploaded file
-            if upload.get("file_path"):
-                try:
-                    storage_service.delete_file(upload["file_path"])
-                except Exception:
-                    pass
-            # Delete user input JSON if exists
-            if upload.get("user_input_json_path"):
-                try:
-                    storage_service.delete_file(upload["user_input_json_path"])
-                except Exception:
-                    pass
-    
-    success = crud.delete_project(db, project_id)
-    if not success:
+def delete_project(
+    project_id: str,
+    background_tasks: BackgroundTasks,
+    background: bool = False,
+    db: Database = Depends(get_db),
+):
+    """Delete a project with its documents, uploads, results and files.
+
+    With `background=true` the project disappears at once and its documents are
+    deleted by a `cascade_delete` job, returned with status 202.
+    """
+    if not background:
+        summary = cascade.delete_project(db, project_id)
+        if summary is None:
+            raise HTTPException(status_code=404, detail="Project not found")
+        return {"message": "Project deleted successfully", "deleted": summary}
+
+    if not crud.delete_project(db, project_id):
         raise HTTPException(status_code=404, detail="Project not found")
-    return {"message": "Project deleted successfully"}
-
-
+    job = crud.create_cascade_delete_job(db, project_id=project_id)
+    jobs.enqueue(job, background_tasks)
+    return JSONResponse(status_code=202, content=jsonable_encoder(crud.serialize_validation_job(job)))
@@ -1,28 +1,201 @@
+import asyncio
+import hashlib
 import json
-from typing import Any
+import threading
+import time
+from collections import Counter, deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any, Callable, Optional
 
-from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException
+import httpx
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query
+from fastapi.concurrency import run_in_threadpool
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, StreamingResponse
 from pymongo.database import Database
 
+from ..config import settings
 from ..database import get_db
-from .. import crud, schemas
-from ..utils.ocr import call_ocr
-from ..utils.validation import extract_text_fields, compare_fields
+from .. import crud, jobs, schemas
+from ..metrics import StageTimer
+from ..progress import TERMINAL_STATUSES, LeaseLost, ProgressReporter, broker, job_event
+from ..utils.ocr import OCRDeadlineExceeded, call_ocr, estimated_ocr_latency
+from ..utils.ocr_limits import endpoint_guard
+from ..utils.ocr_cache import compress_payload, decompress_payload, file_sha256, make_cache_key
+from ..utils.compare_pool import comparer
+from ..utils.validation import extract_text_fields
+from ..utils.similarity import ScoringConfig
 from ..storage import storage_service
 
 
 router = APIRouter()
 
 
-def _validate_single_upload(
-    db: Database,
-    document: dict,
-    upload: dict,
-) -> schemas.ValidationUploadResult:
+class OCRBudgetExceeded(Exception):
+    """The OCR call of an inline validation ran out of its latency budget"""
+
+
+def _fetch_ocr(
+    db: Database, ocr_url: str, upload: dict, bypass_cache: bool = False, deadline: Optional[float] = None
+) -> tuple[dict, bool]:
+    """Return (ocr_json, from_cache) for an upload, consulting the OCR cache before calling the service"""
+    identifier = str(upload.get("file_path"))
+    file_bytes: Optional[bytes] = None
+    cache_key: Optional[str] = None
+
+    if settings.ocr_cache_enabled:
+        file_hash = upload.get("file_sha256")
+        if not file_hash:
+            # Uploads stored before hashing was introduced: hash once and remember it
+            file_bytes = storage_service.read_bytes(identifier)
+            file_hash = file_sha256(file_bytes)
+            crud.set_upload_file_hash(db, str(upload.get("_id")), file_hash)
+            upload["file_sha256"] = file_hash
+        cache_key = make_cache_key(file_hash, ocr_url, settings.ocr_model_version)
+        if not bypass_cache:
+            cached = crud.get_cached_ocr(db, cache_key)
+            if cached is not None:
+                return decompress_payload(cached), True
+
+    if file_bytes is None:
+        file_bytes = storage_service.read_bytes(identifier)
+    filename = identifier.split("/")[-1]
+    ocr_json = call_ocr(ocr_url, filename, file_bytes, deadline=deadline)
+
+    if cache_key and isinstance(ocr_json, dict):
+        payload = compress_payload(ocr_json)
+        if len(payload) <= settings.ocr_cache_max_entry_bytes:
+            crud.put_cached_ocr(
+                db,
+                cache_key,
+                payload,
+                ocr_url=ocr_url,
+                ttl_seconds=settings.ocr_cache_ttl_seconds,
+                max_entries=settings.ocr_cache_max_entries,
+            )
+    return ocr_json, False
+
+
+class ValidationContext:
+    """Document-level state shared by every upload validated in one job.
+
+    The document record, its OCR configuration and scoring config are resolved
+    once, and in mock mode the sample JSON is read and parsed once for the whole
+    job instead of once per upload. Use as a context manager so the shared
+    artifacts are released when the job ends.
+    """
+
+    def __init__(
+        self,
+        db: Database,
+        document: dict,
+        *,
+        bypass_ocr_cache: bool = False,
+        incremental: bool = False,
+        ocr_deadline: Optional[float] = None,
+    ) -> None:
+        self.db = db
+        self.document = document
+        self.document_id = str(document.get("_id"))
+        self.ocr_url: Optional[str] = document.get("ocr_url")
+        self.is_mock = str(self.ocr_url).lower() == "mock"
+        self.scoring = ScoringConfig.from_document(document)
+        self.bypass_ocr_cache = bypass_ocr_cache
+        self.incremental = incremental
+        # Set for inline validation (a time.monotonic() instant): an OCR call that cannot
+        # finish before it raises OCRBudgetExceeded
+        self.ocr_deadline = ocr_deadline
+        self._fingerprint_base = {
+            "ocr_url": self.ocr_url,
+            "ocr_model_version": settings.ocr_model_version,
+            "sample": document.get("sample_json_sha256") or document.get("sample_json_path"),
+            "scoring": self.scoring.fingerprint(),
+        }
+        self._sample_lock = threading.Lock()
+        self._sample: Optional[tuple[dict, dict[str, str]]] = None
+        self._sample_error: Optional[Exception] = None
+
+    def __enter__(self) -> "ValidationContext":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self._sample = None
+        self._sample_error = None
+
+    def sample_ocr(self) -> tuple[dict, dict[str, str]]:
+        """Parsed sample JSON and its text fields, loaded once per job (raises if unreadable)"""
+        with self._sample_lock:
+            if self._sample is None and self._sample_error is None:
+                try:
+                    parsed = json.loads(storage_service.read_text(self.document["sample_json_path"]))
+                    self._sample = (parsed, extract_text_fields(parsed))
+                except Exception as e:
+                    self._sample_error = e
+            if self._sample_error is not None:
+                raise self._sample_error
+            assert self._sample is not None
+            return self._sample
+
+    def fingerprint(self, upload: dict, user_input_sha256: str) -> str:
+        """Hash of every input that influences an upload's validation result"""
+        parts = {
+            **self._fingerprint_base,
+            "user_input": user_input_sha256,
+            "file": upload.get("file_sha256") or upload.get("file_path"),
+        }
+        return hashlib.sha256(json.dumps(parts, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def _reuse_previous_result(ctx: ValidationContext, upload: dict) -> Optional[schemas.ValidationUploadResult]:
+    """Return the stored result of an upload whose inputs are unchanged since it was last validated"""
+    stored_fingerprint = upload.get("validation_fingerprint")
+    user_input_sha256 = upload.get("user_input_sha256")
+    if not stored_fingerprint or not user_input_sha256:
+        return None
+    if stored_fingerprint != ctx.fingerprint(upload, user_input_sha256):
+        return None
+
+    upload_id = str(upload.get("_id"))
+    rows = crud.list_upload_validation_results(ctx.db, upload_id)
+    last = upload.get("last_validation") or {}
+    results = [
+        schemas.ValidationFieldResult(
+            field_name=r.get("field_name"),
+            user_value=r.get("user_value"),
+            ocr_value=r.get("ocr_value"),
+            accuracy=r.get("accuracy"),
+        )
+        for r in rows
+    ]
+    overall = last.get("overall_accuracy")
+    if overall is None:
+        overall = sum(r.accuracy for r in results) / len(results) if results else 0.0
+    return schemas.ValidationUploadResult(
+        upload_id=upload_id,
+        results=results,
+        overall_accuracy=overall,
+        ocr_processing_time=last.get("ocr_processing_time"),
+        reused=True,
+    )
+
+
+def _validate_single_upload(ctx: ValidationContext, upload: dict) -> schemas.ValidationUploadResult:
     """Validate a single upload and return results"""
+    db = ctx.db
     upload_id = str(upload.get("_id"))
+    timer = StageTimer()
     
     try:
+        if ctx.incremental:
+            with timer.stage("reuse"):
+                reused = _reuse_previous_result(ctx, upload)
+            if reused is not None:
+                reused.stage_timings = timer.rounded()
+                return reused
+
         # Read user input JSON (already validated when uploaded)
         user_input_path = upload.get("user_input_json_path")
         if not user_input_path:
@@ -33,7 +206,10 @@ def _validate_single_upload(
                 error="Upload has no user input JSON"
             )
         
-        user_fields_obj: dict[str, Any] = json.loads(storage_service.read_text(user_input_path))
+        with timer.stage("read_input"):
+            user_input_bytes = storage_service.read_bytes(user_input_path)
+            user_input_sha256 = file_sha256(user_input_bytes)
+            user_fields_obj: dict[str, Any] = json.loads(user_input_bytes.decode("utf-8"))
 
         # The user input JSON is expected to be a flat dict of key -> value from the generated form
         if not isinstance(user_fields_obj, dict):
@@ -46,7 +222,7 @@ def _validate_single_upload(
         user_text_fields: dict[str, str] = {k: str(v) for k, v in user_fields_obj.items()}
 
         # Call OCR service
-        ocr_url = document.get("ocr_url")
+        ocr_url = ctx.ocr_url
         file_path = upload.get("file_path")
         if not ocr_url:
             return schemas.ValidationUploadResult(
@@ -56,10 +232,10 @@ def _validate_single_upload(
                 error="Document has no OCR URL configured"
             )
         
-        # Mock path: use sample JSON if ocr_url == "mock"
-        if str(ocr_url).lower() == "mock":
-            sample_path = document.get("sample_json_path")
-            if not sample_path:
+        ocr_cached = False
+        # Mock path: use the job's shared sample JSON if ocr_url == "mock"
+        if ctx.is_mock:
+            if not ctx.document.get("sample_json_path"):
                 return schemas.ValidationUploadResult(
                     upload_id=upload_id,
                     results=[],
@@ -67,7 +243,8 @@ def _validate_single_upload(
                     error="Sample JSON not uploaded for document"
                 )
             try:
-                ocr_json = json.loads(storage_service.read_text(sample_path))
+                with timer.stage("ocr"):
+                    ocr_json, ocr_text_fields = ctx.sample_ocr()
             except Exception as e:
                 return schemas.ValidationUploadResult(
                     upload_id=upload_id,
@@ -84,10 +261,20 @@ def _validate_single_upload(
                         overall_accuracy=0.0,
                         error="Upload is missing file path"
                     )
-                identifier = str(file_path)
-                file_bytes = storage_service.read_bytes(identifier)
-                filename = identifier.split("/")[-1]
-                ocr_json = call_ocr(ocr_url, filename, file_bytes)
+                with timer.stage("ocr"):
+                    ocr_json, ocr_cached = _fetch_ocr(
+                        db, str(ocr_url), upload, bypass_cache=ctx.bypass_ocr_cache, deadline=ctx.ocr_deadline
+                    )
+            except (httpx.TimeoutException, OCRDeadlineExceeded) as e:
+                if ctx.ocr_deadline is not None:
+                    raise OCRBudgetExceeded(str(e)) from e
+                crud.log_event(db, "ERROR", f"OCR request failed for upload {upload_id}", context=str(e))
+                return schemas.ValidationUploadResult(
+                    upload_id=upload_id,
+                    results=[],
+                    overall_accuracy=0.0,
+                    error=f"OCR service error: {e}"
+                )
             except Exception as e:
                 crud.log_event(db, "ERROR", f"OCR request failed for upload {upload_id}", context=str(e))
                 return schemas.ValidationUploadResult(
@@ -97,45 +284,55 @@ def _validate_single_upload(
                     error=f"OCR service error: {e}"
                 )
 
-        # Extract text-only fields from OCR response
-        ocr_text_fields = extract_text_fields(ocr_json)
-
-        # Compare fields
-        field_scores, overall = compare_fields(user_text_fields, ocr_text_fields)
+            # Extract text-only fields from OCR response
+            with timer.stage("extract"):
+                ocr_text_fields = extract_text_fields(ocr_json)
 
-        # Remove previous validation results for this upload so we only keep the latest run
-        db["validation_results"].delete_many({"upload_id": upload_id})
+        # Compare fields with the document's scoring configuration
+        with timer.stage("compare"):
+            field_scores, overall = comparer.compare(user_text_fields, ocr_text_fields, ctx.scoring)
 
-        results: list[schemas.ValidationFieldResult] = []
-        for key, user_val in user_text_fields.items():
-            ocr_val = ocr_text_fields.get(key, "")
-            score = field_scores.get(key, 0.0)
-            # Persist per-field results
-            crud.add_validation_result(
-                db,
-                document_id=str(document.get("_id")),
-                upload_id=upload_id,
-                field_name=key,
-                user_value=user_val,
-                ocr_value=ocr_val,
-                accuracy=score,
-            )
-            results.append(
-                schemas.ValidationFieldResult(
-                    field_name=key, user_value=user_val, ocr_value=ocr_val, accuracy=score
+            results: list[schemas.ValidationFieldResult] = []
+            for key, user_val in user_text_fields.items():
+                ocr_val = ocr_text_fields.get(key, "")
+                score = field_scores.get(key, 0.0)
+                results.append(
+                    schemas.ValidationFieldResult(
+                        field_name=key, user_value=user_val, ocr_value=ocr_val, accuracy=score
+                    )
                 )
-            )
 
         processing_time = None
         if isinstance(ocr_json, dict) and isinstance(ocr_json.get("processing_time"), (int, float)):
             processing_time = float(ocr_json["processing_time"])  # type: ignore
 
+        with timer.stage("persist"):
+            # Persist per-field results, replacing the previous run in one batched write
+            crud.replace_validation_results(
+                db,
+                document_id=ctx.document_id,
+                upload_id=upload_id,
+                rows=[r.model_dump() for r in results],
+            )
+            crud.set_upload_validation_state(
+                db,
+                upload_id,
+                fingerprint=ctx.fingerprint(upload, user_input_sha256),
+                user_input_sha256=user_input_sha256,
+                overall_accuracy=overall,
+                ocr_processing_time=processing_time,
+            )
+
         return schemas.ValidationUploadResult(
             upload_id=upload_id,
             results=results,
             overall_accuracy=overall,
             ocr_processing_time=processing_time,
+            ocr_cached=ocr_cached,
+            stage_timings=timer.rounded(),
         )
+    except OCRBudgetExceeded:
+        raise
     except Exception as e:
         crud.log_event(db, "ERROR", f"Validation error for upload {upload_id}", context=str(e))
         return schemas.ValidationUploadResult(
@@ -146,67 +343,330 @@ def _validate_single_upload(
         )
 
 
-def _run_validation_task(job_id: str, document_id: str) -> None:
-    """Background task to run validation"""
+class _DocumentRun:
+    """Bookkeeping of one document's validation job while its uploads are scheduled"""
+
+    def __init__(
+        self,
+        db: Database,
+        job_id: str,
+        ctx: ValidationContext,
+        uploads: list[dict],
+        lease_owner: Optional[str] = None,
+    ) -> None:
+        self.db = db
+        self.job_id = job_id
+        self.lease_owner = lease_owner
+        self.ctx = ctx
+        self.queue: deque[tuple[int, dict]] = deque(enumerate(uploads))
+        self.total = len(uploads)
+        self.processed = 0
+        self.successful = 0
+        self.reused = 0
+        self.finished = False
+        self.reporter = ProgressReporter(db, job_id, self.total, lease_owner=lease_owner)
+        self._pending_results: list[tuple[int, dict]] = []
+        # Uploads of mock documents never reach an OCR endpoint, so they are not capped
+        self.slot_key: Optional[str] = None if ctx.is_mock else str(ctx.ocr_url)
+
+    @property
+    def done(self) -> bool:
+        return self.processed == self.total
+
+    def record(self, index: int, result: schemas.ValidationUploadResult) -> None:
+        self.successful += result.error is None
+        self.reused += result.reused
+        self._pending_results.append((index, result.model_dump()))
+        if len(self._pending_results) >= settings.job_results_batch_size:
+            self.flush_results()
+        self.processed += 1
+        self.reporter.advance(self.processed)
+
+    def flush_results(self) -> None:
+        crud.add_validation_job_results(
+            self.db, self.job_id, self.ctx.document_id, self._pending_results, lease_owner=self.lease_owner
+        )
+        self._pending_results = []
+
+    def summary(self) -> dict:
+        return {
+            "total_uploads": self.processed,
+            "successful_uploads": self.successful,
+            "failed_uploads": self.processed - self.successful,
+            "reused_uploads": self.reused,
+        }
+
+    def finish(self, status: str) -> None:
+        """Store remaining results and the summary, then close the job with `status`"""
+        if self.finished:
+            return
+        self.finished = True
+        self.flush_results()
+        summary = self.summary()
+        crud.update_validation_job_status(
+            self.db, self.job_id, status, summary=summary, processed_uploads=self.processed, lease_owner=self.lease_owner
+        )
+        if status == "cancelled":
+            crud.log_event(self.db, "INFO", f"Validation job {self.job_id} cancelled after {self.processed} uploads")
+        else:
+            crud.log_event(
+                self.db,
+                "INFO",
+                f"Validation job {self.job_id} completed: {summary['successful_uploads']} successful, "
+                f"{summary['failed_uploads']} failed",
+            )
+
+
+def _schedule_uploads(
+    runs: list[_DocumentRun],
+    max_workers: int,
+    should_stop: Optional[Callable[[], bool]] = None,
+    on_result: Optional[Callable[[_DocumentRun], None]] = None,
+) -> bool:
+    """Validate the uploads of every run on one bounded pool.
+
+    Uploads are handed out round-robin across documents, one per document per
+    turn, so a large document cannot starve the others. A document is skipped
+    for a turn while its ocr_url already has as many uploads in flight as the
+    endpoint's current adaptive concurrency limit, which keeps workers free
+    for other endpoints instead of blocking on a saturated one. Returns True if `should_stop` ended the run
+    early; uploads not yet started are then left unprocessed.
+    """
+    in_flight: dict[Future, tuple[_DocumentRun, int]] = {}
+    per_url: Counter[str] = Counter()
+    turn = 0
+    stopped = False
+
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="validation") as executor:
+        while True:
+            submitted = not stopped
+            while submitted and len(in_flight) < max_workers:
+                submitted = False
+                for offset in range(len(runs)):
+                    run = runs[(turn + offset) % len(runs)]
+                    if not run.queue or len(in_flight) >= max_workers:
+                        continue
+                    if run.slot_key is not None and per_url[run.slot_key] >= endpoint_guard(run.slot_key).concurrency:
+                        continue
+                    index, upload = run.queue.popleft()
+                    in_flight[executor.submit(_validate_single_upload, run.ctx, upload)] = (run, index)
+                    if run.slot_key is not None:
+                        per_url[run.slot_key] += 1
+                    submitted = True
+                turn += 1
+
+            if not in_flight:
+                return stopped
+
+            done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                run, index = in_flight.pop(future)
+                if run.slot_key is not None:
+                    per_url[run.slot_key] -= 1
+                # Only this thread records results, so progress stays monotonic
+                run.record(index, future.result())
+                if on_result is not None:
+                    on_result(run)
+            if not stopped and should_stop is not None and should_stop():
+                stopped = True
+
+
+def _start_document_run(
+    db: Database,
+    job_id: str,
+    document_id: str,
+    *,
+    bypass_ocr_cache: bool = False,
+    incremental: bool = False,
+    upload_ids: Optional[list[str]] = None,
+    lease_owner: Optional[str] = None,
+) -> Optional[_DocumentRun]:
+    """Load a document's uploads and prepare its job; marks the job failed and returns None if it cannot run"""
+    # Update job status to running
+    crud.update_validation_job_status(db, job_id, "running", lease_owner=lease_owner)
+
+    document = crud.get_document_raw(db, document_id)
+    if not document:
+        crud.update_validation_job_status(db, job_id, "failed", error="Document not found", lease_owner=lease_owner)
+        return None
+
+    # Get all uploads for this document that have user input
+    uploads = crud.list_uploads_by_document(db, str(document.get("_id")))
+    if upload_ids is not None:
+        wanted = set(upload_ids)
+        uploads = [u for u in uploads if str(u.get("_id")) in wanted]
+    if not uploads:
+        crud.update_validation_job_status(
+            db, job_id, "failed", error="No uploads with user input found for this document", lease_owner=lease_owner
+        )
+        return None
+
+    crud.update_validation_job_status(
+        db, job_id, "running", total_uploads=len(uploads), processed_uploads=0, lease_owner=lease_owner
+    )
+    # A re-claimed job starts over: drop per-upload results of the earlier attempt
+    crud.clear_validation_job_results(db, job_id)
+    ctx = ValidationContext(db, document, bypass_ocr_cache=bypass_ocr_cache, incremental=incremental)
+    return _DocumentRun(db, job_id, ctx, uploads, lease_owner=lease_owner)
+
+
+def _run_validation_task(
+    job_id: str,
+    document_id: str,
+    max_workers: Optional[int] = None,
+    bypass_ocr_cache: bool = False,
+    incremental: bool = False,
+    should_stop: Optional[Callable[[], bool]] = None,
+    upload_ids: Optional[list[str]] = None,
+    lease_owner: Optional[str] = None,
+) -> None:
+    """Background task to run validation.
+
+    Uploads are validated concurrently on a bounded thread pool; per-upload
+    results are stored by upload index in validation_job_results, so the job
+    document only carries a summary. In incremental mode, uploads whose inputs
+    are unchanged since their last validation reuse their stored results.
+    `should_stop` is polled as uploads finish; when it returns True, queued
+    uploads are dropped and the job ends as cancelled. With `lease_owner`,
+    every job write is conditional on the lease; LeaseLost aborts the task
+    without writing anything further.
+    """
     from ..database import get_db as get_db_func
     
     db = get_db_func()
     
     try:
-        # Update job status to running
-        crud.update_validation_job_status(db, job_id, "running")
-        
-        document = crud.get_document_raw(db, document_id)
-        if not document:
-            crud.update_validation_job_status(db, job_id, "failed", error="Document not found")
-            return
-        
-        # Get all uploads for this document that have user input
-        uploads = crud.list_uploads_by_document(db, str(document.get("_id")))
-        
-        if not uploads:
-            crud.update_validation_job_status(db, job_id, "failed", error="No uploads with user input found for this document")
+        run = _start_document_run(
+            db,
+            job_id,
+            document_id,
+            bypass_ocr_cache=bypass_ocr_cache,
+            incremental=incremental,
+            upload_ids=upload_ids,
+            lease_owner=lease_owner,
+        )
+        if run is None:
             return
-        
-        total_uploads = len(uploads)
-        crud.update_validation_job_status(db, job_id, "running", total_uploads=total_uploads, processed_uploads=0)
-        
-        # Validate each upload
-        upload_results: list[schemas.ValidationUploadResult] = []
-        for idx, upload in enumerate(uploads):
-            result = _validate_single_upload(db, document, upload)
-            upload_results.append(result)
-            # Update progress
-            crud.update_validation_job_status(db, job_id, "running", processed_uploads=idx + 1)
-        
-        successful = sum(1 for r in upload_results if r.error is None)
-        failed = len(upload_results) - successful
-        
-        result_data = schemas.ValidationDocumentResult(
-            document_id=str(document.get("_id")),
-            upload_results=upload_results,
-            total_uploads=len(upload_results),
-            successful_uploads=successful,
-            failed_uploads=failed,
+        workers = max(1, min(max_workers or settings.validation_max_workers, run.total))
+        with run.ctx:
+            stopped = _schedule_uploads([run], workers, should_stop)
+        run.finish("cancelled" if stopped else "completed")
+    except LeaseLost:
+        raise
+    except Exception as e:
+        crud.log_event(db, "ERROR", f"Validation job {job_id} failed", context=str(e))
+        crud.update_validation_job_status(db, job_id, "failed", error=str(e), lease_owner=lease_owner)
+
+
+def _run_batch_validation_task(job: dict, should_stop: Optional[Callable[[], bool]] = None) -> None:
+    """Validate several documents as one parent job with one child job per document.
+
+    All documents share one worker pool; `_schedule_uploads` interleaves their
+    uploads fairly and caps in-flight uploads per ocr_url. Each child job is
+    closed as soon as its document is done, and the parent carries roll-up
+    progress and a summary across all children.
+    """
+    from ..database import get_db as get_db_func
+
+    db = get_db_func()
+    job_id = str(job["_id"])
+    owner = job.get("lease_owner")
+    runs: list[_DocumentRun] = []
+
+    try:
+        crud.update_validation_job_status(db, job_id, "running", lease_owner=owner)
+        if owner is not None:
+            # Child writes are checked against the parent's lease holder
+            crud.lease_child_validation_jobs(db, job_id, owner)
+        for child in crud.list_child_validation_jobs(db, job_id):
+            if child.get("status") in TERMINAL_STATUSES:
+                continue
+            run = _start_document_run(
+                db,
+                str(child["_id"]),
+                child["document_id"],
+                bypass_ocr_cache=bool(child.get("bypass_ocr_cache")),
+                incremental=bool(child.get("incremental")),
+                lease_owner=owner,
+            )
+            if run is not None:
+                runs.append(run)
+
+        total = sum(run.total for run in runs)
+        crud.update_validation_job_status(
+            db, job_id, "running", total_uploads=total, processed_uploads=0, lease_owner=owner
         )
-        
-        # Save result and mark as completed
+        parent_reporter = ProgressReporter(db, job_id, total, lease_owner=owner)
+        processed = 0
+
+        def on_result(run: _DocumentRun) -> None:
+            nonlocal processed
+            processed += 1
+            parent_reporter.advance(processed)
+            if run.done:
+                run.finish("completed")
+                run.ctx.close()
+
+        stopped = False
+        if runs:
+            workers = max(1, min(job.get("max_workers") or settings.validation_max_workers, total))
+            stopped = _schedule_uploads(runs, workers, should_stop, on_result)
+
+        for run in runs:
+            run.finish("cancelled" if stopped else "completed")
+            run.ctx.close()
+
+        children = crud.list_child_validation_jobs(db, job_id)
+        summary = {
+            "total_documents": len(children),
+            "completed_documents": sum(1 for c in children if c.get("status") == "completed"),
+            "failed_documents": sum(1 for c in children if c.get("status") == "failed"),
+            "total_uploads": processed,
+            "successful_uploads": sum(run.successful for run in runs),
+            "failed_uploads": sum(run.processed - run.successful for run in runs),
+            "reused_uploads": sum(run.reused for run in runs),
+        }
         crud.update_validation_job_status(
             db,
             job_id,
-            "completed",
-            result=result_data.model_dump(),
-            processed_uploads=total_uploads,
+            "cancelled" if stopped else "completed",
+            summary=summary,
+            processed_uploads=processed,
+            lease_owner=owner,
         )
-        
         crud.log_event(
             db,
             "INFO",
-            f"Validation job {job_id} completed: {successful} successful, {failed} failed"
+            f"Batch validation job {job_id} {'cancelled' if stopped else 'completed'}: "
+            f"{summary['completed_documents']}/{summary['total_documents']} documents, {processed} uploads",
         )
+    except LeaseLost:
+        raise
     except Exception as e:
-        crud.log_event(db, "ERROR", f"Validation job {job_id} failed", context=str(e))
-        crud.update_validation_job_status(db, job_id, "failed", error=str(e))
+        crud.log_event(db, "ERROR", f"Batch validation job {job_id} failed", context=str(e))
+        for run in runs:
+            if not run.finished:
+                crud.update_validation_job_status(db, run.job_id, "failed", error=str(e), lease_owner=owner)
+        crud.update_validation_job_status(db, job_id, "failed", error=str(e), lease_owner=owner)
+
+
+@jobs.register("validation")
+def _handle_validation_job(db: Database, job: dict, should_stop: Callable[[], bool]) -> None:
+    _run_validation_task(
+        str(job["_id"]),
+        job["document_id"],
+        job.get("max_workers"),
+        bool(job.get("bypass_ocr_cache")),
+        bool(job.get("incremental")),
+        should_stop=should_stop,
+        upload_ids=job.get("upload_ids"),
+        lease_owner=job.get("lease_owner"),
+    )
+
+
+@jobs.register("batch_validation")
+def _handle_batch_validation_job(db: Database, job: dict, should_stop: Callable[[], bool]) -> None:
+    _run_batch_validation_task(job, should_stop=should_stop)
 
 
 @router.post("/run", response_model=schemas.ValidationJobOut)
@@ -226,62 +686,293 @@ def run_validation(
         raise HTTPException(status_code=400, detail="No uploads with user input found for this document")
     
     # Create validation job
-    job = crud.create_validation_job(db, str(document.get("_id")))
+    job = crud.create_validation_job(
+        db,
+        str(document.get("_id")),
+        max_workers=payload.max_workers,
+        bypass_ocr_cache=payload.bypass_ocr_cache,
+        incremental=payload.incremental,
+    )
     
-    # Start background task
-    job_id = str(job["_id"])
-    background_tasks.add_task(_run_validation_task, job_id, str(document.get("_id")))
+    # Run in this process or leave it for a worker, depending on VOS_JOB_BACKEND
+    jobs.enqueue(job, background_tasks)
     
     return crud.serialize_validation_job(job)  # type: ignore
 
 
+@router.post("/run-batch", response_model=schemas.ValidationJobOut)
+def run_batch_validation(
+    payload: schemas.ValidationBatchRequest,
+    background_tasks: BackgroundTasks,
+    db: Database = Depends(get_db),
+):
+    """Start one validation job covering every document of a project, or a list of documents"""
+    if payload.document_ids:
+        document_ids = list(dict.fromkeys(payload.document_ids))
+        missing = [doc_id for doc_id in document_ids if not crud.get_document_raw(db, doc_id)]
+        if missing:
+            raise HTTPException(status_code=404, detail=f"Documents not found: {', '.join(missing)}")
+    elif payload.project_id:
+        if not crud.get_project(db, payload.project_id):
+            raise HTTPException(status_code=404, detail="Project not found")
+        document_ids = [doc["id"] for doc in crud.list_documents(db, payload.project_id)]
+    else:
+        raise HTTPException(status_code=400, detail="Either project_id or document_ids is required")
+
+    # Documents without uploads have nothing to validate
+    with_uploads = crud.document_ids_with_uploads(db, document_ids)
+    document_ids = [doc_id for doc_id in document_ids if doc_id in with_uploads]
+    if not document_ids:
+        raise HTTPException(status_code=400, detail="No uploads with user input found for these documents")
+
+    job = crud.create_batch_validation_job(
+        db,
+        document_ids,
+        project_id=payload.project_id,
+        max_workers=payload.max_workers,
+        bypass_ocr_cache=payload.bypass_ocr_cache,
+        incremental=payload.incremental,
+    )
+    jobs.enqueue(job, background_tasks)
+    return crud.serialize_validation_job(job)  # type: ignore
+
+
+@router.get("/batch/{job_id}", response_model=schemas.ValidationBatchResult)
+def get_batch_validation(job_id: str, db: Database = Depends(get_db)):
+    """Roll-up of a batch job: overall progress plus status and summary per document"""
+    job = crud.get_validation_job_status(db, job_id)
+    if not job or job.get("kind") != "batch_validation":
+        raise HTTPException(status_code=404, detail="Batch job not found")
+    return {
+        "job_id": job_id,
+        "status": job.get("status"),
+        "project_id": job.get("project_id"),
+        "error": job.get("error"),
+        "total_uploads": job.get("total_uploads"),
+        "processed_uploads": job.get("processed_uploads"),
+        "summary": job.get("summary"),
+        "documents": [
+            {
+                "job_id": str(child["_id"]),
+                "document_id": child.get("document_id"),
+                "status": child.get("status"),
+                "error": child.get("error"),
+                "total_uploads": child.get("total_uploads"),
+                "processed_uploads": child.get("processed_uploads"),
+                "summary": child.get("summary"),
+            }
+            for child in crud.list_child_validation_jobs(db, job_id)
+        ],
+    }
+
+
 @router.get("/status/{job_id}", response_model=schemas.ValidationJobOut)
 def get_validation_status(job_id: str, db: Database = Depends(get_db)):
     """Get validation job status"""
-    job = crud.get_validation_job(db, job_id)
+    job = crud.get_validation_job_status(db, job_id)
     if not job:
         raise HTTPException(status_code=404, detail="Job not found")
     return crud.serialize_validation_job(job)  # type: ignore
 
 
+@router.get("/stream/{job_id}")
+async def stream_validation_progress(job_id: str, db: Database = Depends(get_db)):
+    """Push job progress as Server-Sent Events until the job finishes.
+
+    Events come from the in-process broker when the job runs in this process.
+    Jobs running in a worker process are followed by re-reading the job every
+    VOS_PROGRESS_STREAM_POLL_SECONDS, which also keeps the connection alive.
+    """
+    job = await run_in_threadpool(crud.get_validation_job_status, db, job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+
+    def _format(event: dict) -> str:
+        return f"event: progress\ndata: {json.dumps(event, default=str)}\n\n"
+
+    async def events():
+        last = job_event(job)
+        yield _format(last)
+        if last["status"] in TERMINAL_STATUSES:
+            return
+        async with broker.subscribe(job_id) as queue:
+            while True:
+                try:
+                    event = await asyncio.wait_for(queue.get(), timeout=settings.progress_stream_poll_seconds)
+                except asyncio.TimeoutError:
+                    current = await run_in_threadpool(crud.get_validation_job_status, db, job_id)
+                    if not current:
+                        return
+                    event = job_event(current)
+                    if event == last:
+                        yield ": keep-alive\n\n"
+                        continue
+                last = event
+                yield _format(event)
+                if event["status"] in TERMINAL_STATUSES:
+                    return
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.post("/cancel/{job_id}", response_model=schemas.ValidationJobOut)
+def cancel_validation(job_id: str, db: Database = Depends(get_db)):
+    """Cancel a pending job, or ask the worker running it to stop"""
+    job = crud.get_validation_job_status(db, job_id)
+    if job and job.get("parent_job_id"):
+        raise HTTPException(status_code=409, detail=f"Job is part of batch {job['parent_job_id']}; cancel the batch job")
+    job = jobs.request_cancel(db, job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    if job.get("status") in ("completed", "failed"):
+        raise HTTPException(status_code=409, detail=f"Job already {job.get('status')}")
+    return crud.serialize_validation_job(job)  # type: ignore
+
+
+# Where the outcome of jobs that are not per-document validations is read
+_JOB_SUMMARY_ENDPOINTS = {
+    "batch_validation": "/api/validation/batch/{job_id}",
+    "export": "/api/documents/{document_id}/export",
+    "storage_gc": "/api/maintenance/storage-gc/{job_id}",
+}
+
+
 @router.get("/result/{job_id}", response_model=schemas.ValidationJobResult)
-def get_validation_result(job_id: str, db: Database = Depends(get_db)):
-    """Get validation job result"""
-    job = crud.get_validation_job(db, job_id)
+def get_validation_result(
+    job_id: str,
+    cursor: Optional[str] = None,
+    limit: int = Query(100, ge=1, le=1000),
+    include_field_results: bool = True,
+    fields: Optional[str] = Query(None, description="Comma-separated field names to keep in each upload's results"),
+    db: Database = Depends(get_db),
+):
+    """Get one page of a validation job's per-upload results.
+
+    Pages are ordered by upload position; pass `next_cursor` back as `cursor`
+    to fetch the next one. `include_field_results=false` returns only each
+    upload's summary, and `fields` restricts the per-field results returned.
+    """
+    job = crud.get_validation_job_status(db, job_id)
     if not job:
         raise HTTPException(status_code=404, detail="Job not found")
-    
+    kind = job.get("kind") or "validation"
+    if kind != "validation":
+        # Other job kinds keep a summary of their own, not per-upload results
+        where = _JOB_SUMMARY_ENDPOINTS.get(kind, "/api/validation/status/{job_id}").format(
+            job_id=job_id, document_id=job.get("document_id")
+        )
+        raise HTTPException(
+            status_code=409, detail=f"Job {job_id} is a {kind} job with no validation results; see {where}"
+        )
+    try:
+        after = int(cursor) if cursor is not None else None
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    field_names = sorted({f.strip() for f in fields.split(",") if f.strip()}) if fields else None
+
     result = None
-    if job.get("status") == "completed" and job.get("result"):
-        result = schemas.ValidationDocumentResult(**job["result"])
+    next_cursor = None
+    summary = job.get("summary")
+    if job.get("status") == "completed" and summary:
+        rows = crud.list_validation_job_results(
+            db,
+            job_id,
+            after=after,
+            limit=limit + 1,
+            include_field_results=include_field_results,
+            field_names=field_names,
+        )
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = str(rows[-1]["index"])
+        upload_results = [
+            schemas.ValidationUploadResult(**{"results": [], **r["result"]})
+            for r in rows
+        ]
+        result = schemas.ValidationDocumentResult(
+            document_id=job.get("document_id"),
+            upload_results=upload_results,
+            **summary,
+        )
+    elif job.get("status") == "completed":
+        # Jobs from before results moved out of the job document
+        legacy = crud.get_validation_job(db, job_id) or {}
+        if legacy.get("result"):
+            result = schemas.ValidationDocumentResult(**legacy["result"])
     
     return schemas.ValidationJobResult(
         job_id=str(job["_id"]),
         status=job.get("status", "unknown"),
         result=result,
         error=job.get("error"),
+        next_cursor=next_cursor,
     )
 
 
+def _inline_is_viable(ctx: ValidationContext, upload: dict, budget: float) -> bool:
+    """Whether an upload can be expected to validate within `budget` seconds inside the request"""
+    if ctx.is_mock or not ctx.ocr_url:
+        return True
+    file_hash = upload.get("file_sha256")
+    if settings.ocr_cache_enabled and file_hash and not ctx.bypass_ocr_cache:
+        if crud.has_cached_ocr(ctx.db, make_cache_key(file_hash, str(ctx.ocr_url), settings.ocr_model_version)):
+            return True
+    estimate = estimated_ocr_latency(str(ctx.ocr_url))
+    # Without an estimate yet, try inline: the OCR deadline still enforces the budget
+    return estimate is None or estimate <= budget
+
+
+@router.post(
+    "/upload/{upload_id}",
+    response_model=schemas.ValidationUploadResult,
+    responses={202: {"model": schemas.ValidationJobOut, "description": "Budget exceeded, validation queued as a job"}},
+)
+def validate_upload(
+    upload_id: str,
+    background_tasks: BackgroundTasks,
+    budget_ms: Optional[int] = Query(None, ge=100, le=60000),
+    db: Database = Depends(get_db),
+):
+    """Validate one upload inline within a latency budget, or queue a job for it when the budget cannot be met"""
+    started = time.monotonic()
+    upload = crud.get_upload_raw(db, upload_id)
+    if not upload:
+        raise HTTPException(status_code=404, detail="Upload not found")
+    if not upload.get("user_input_json_path"):
+        raise HTTPException(status_code=400, detail="Upload has no user input JSON")
+    document = crud.get_document_raw(db, str(upload.get("document_id")))
+    if not document:
+        raise HTTPException(status_code=404, detail="Document not found")
+
+    budget = (budget_ms or settings.sync_validation_budget_ms) / 1000.0
+    with ValidationContext(db, document) as ctx:
+        if _inline_is_viable(ctx, upload, budget):
+            ctx.ocr_deadline = started + budget
+            try:
+                return _validate_single_upload(ctx, upload)
+            except OCRBudgetExceeded:
+                crud.log_event(db, "INFO", f"Inline validation of upload {upload_id} exceeded its budget, queued a job")
+
+    job = crud.create_validation_job(db, str(document.get("_id")), upload_ids=[upload_id])
+    jobs.enqueue(job, background_tasks)
+    return JSONResponse(status_code=202, content=jsonable_encoder(crud.serialize_validation_job(job)))
+
+
 @router.get("/upload/{upload_id}/results", response_model=list[schemas.ValidationFieldResult])
 def get_upload_validation_results(upload_id: str, db: Database = Depends(get_db)):
     """Get validation results for a specific upload"""
-    results = db["validation_results"].find({"upload_id": upload_id}).sort("created_at", -1)
-    out: list[schemas.ValidationFieldResult] = []
-    seen_fields: set[str] = set()
-    for r in results:
-        field_name = r.get("field_name")
-        if field_name in seen_fields:
-            continue
-        seen_fields.add(field_name)
-        out.append(
-            schemas.ValidationFieldResult(
-                field_name=field_name,
-                user_value=r.get("user_value"),
-                ocr_value=r.get("ocr_value"),
-                accuracy=r.get("accuracy"),
-            )
+    return [
+        schemas.ValidationFieldResult(
+            field_name=r.get("field_name"),
+            user_value=r.get("user_value"),
+            ocr_value=r.get("ocr_value"),
+            accuracy=r.get("accuracy"),
         )
-    return out
+        for r in crud.list_upload_validation_results(db, upload_id)
+    ]
 
 
@@ -1,5 +1,5 @@
 from datetime import datetime
-from typing import Optional, Any
+from typing import Literal, Optional, Any
 
 from pydantic import BaseModel, Field
 
@@ -22,11 +22,15 @@ class DocumentCreate(BaseModel):
     project_id: str
     name: str
     ocr_url: Optional[str] = None
+    similarity_metric: Optional[str] = None
+    field_metrics: Optional[dict[str, str]] = None
 
 
 class DocumentUpdate(BaseModel):
     name: Optional[str] = None
     ocr_url: Optional[str] = None
+    similarity_metric: Optional[str] = None
+    field_metrics: Optional[dict[str, str]] = None
 
 
 class DocumentOut(BaseModel):
@@ -35,6 +39,8 @@ class DocumentOut(BaseModel):
     name: str
     ocr_url: Optional[str]
     sample_json_path: Optional[str]
+    similarity_metric: Optional[str] = None
+    field_metrics: Optional[dict[str, str]] = None
     created_at: datetime
 
 
@@ -48,6 +54,18 @@ class UploadOut(BaseModel):
 
 class ValidationRequest(BaseModel):
     document_id: str
+    max_workers: Optional[int] = Field(default=None, ge=1, le=64)
+    bypass_ocr_cache: bool = False
+    incremental: bool = False
+
+
+class ValidationBatchRequest(BaseModel):
+    # Validate every document of project_id, or exactly the given document_ids
+    project_id: Optional[str] = None
+    document_ids: Optional[list[str]] = None
+    max_workers: Optional[int] = Field(default=None, ge=1, le=64)
+    bypass_ocr_cache: bool = False
+    incremental: bool = False
 
 
 class ValidationFieldResult(BaseModel):
@@ -69,7 +87,10 @@ class ValidationUploadResult(BaseModel):
     results: list[ValidationFieldResult]
     overall_accuracy: float
     ocr_processing_time: Optional[float] = None
+    ocr_cached: bool = False
+    reused: bool = False
     error: Optional[str] = None
+    stage_timings: Optional[dict[str, float]] = None  # seconds per stage: read_input, ocr, extract, compare, persist
 
 
 class ValidationDocumentResult(BaseModel):
@@ -78,6 +99,7 @@ class ValidationDocumentResult(BaseModel):
     total_uploads: int
     successful_uploads: int
     failed_uploads: int
+    reused_uploads: int = 0
 
 
 class ValidationJobCreate(BaseModel):
@@ -86,14 +108,39 @@ class ValidationJobCreate(BaseModel):
 
 class ValidationJobOut(BaseModel):
     job_id: str
-    document_id: str
-    status: str  # "pending", "running", "completed", "failed"
+    kind: str = "validation"  # "validation", "batch_validation", "cascade_delete", "storage_gc" or "export"
+    document_id: Optional[str] = None
+    upload_ids: Optional[list[str]] = None  # set when the job covers only some of the document's uploads
+    project_id: Optional[str] = None
+    parent_job_id: Optional[str] = None
+    child_job_ids: Optional[list[str]] = None
+    status: str  # "pending", "running", "completed", "failed", "cancelled"
     created_at: datetime
     started_at: Optional[datetime] = None
     completed_at: Optional[datetime] = None
     error: Optional[str] = None
     total_uploads: Optional[int] = None
     processed_uploads: Optional[int] = None
+    attempts: Optional[int] = None
+    cancel_requested: bool = False
+
+
+class ArchiveIngestEntry(BaseModel):
+    file: str
+    status: str  # "ingested" or "failed"
+    upload_id: Optional[str] = None
+    has_user_input: bool = False
+    size: Optional[int] = None
+    error: Optional[str] = None
+
+
+class ArchiveIngestReport(BaseModel):
+    document_id: str
+    total: int
+    ingested: int
+    failed: int
+    entries: list[ArchiveIngestEntry]
+    job: Optional[ValidationJobOut] = None  # set when validation was requested
 
 
 class ValidationJobResult(BaseModel):
@@ -101,5 +148,57 @@ class ValidationJobResult(BaseModel):
     status: str
     result: Optional[ValidationDocumentResult] = None
     error: Optional[str] = None
+    next_cursor: Optional[str] = None  # pass as ?cursor= to fetch the next page of upload_results
+
+
+class ValidationBatchDocument(BaseModel):
+    job_id: str
+    document_id: str
+    status: str
+    error: Optional[str] = None
+    total_uploads: Optional[int] = None
+    processed_uploads: Optional[int] = None
+    summary: Optional[dict[str, int]] = None
+
+
+class ValidationBatchResult(BaseModel):
+    job_id: str
+    status: str
+    project_id: Optional[str] = None
+    error: Optional[str] = None
+    total_uploads: Optional[int] = None
+    processed_uploads: Optional[int] = None
+    summary: Optional[dict[str, int]] = None
+    documents: list[ValidationBatchDocument]
+
+
+class StorageGCRequest(BaseModel):
+    dry_run: bool = True
+    action: Literal["quarantine", "delete"] = "quarantine"
+    grace_seconds: Optional[int] = Field(default=None, ge=0)  # defaults to VOS_STORAGE_GC_GRACE_SECONDS
 
 
+class StorageOrphan(BaseModel):
+    key: str
+    size: int
+    modified: datetime
+
+
+class StorageGCReport(BaseModel):
+    job_id: str
+    status: str
+    dry_run: bool
+    action: str
+    error: Optional[str] = None
+    summary: Optional[dict[str, int]] = None
+    orphans: list[StorageOrphan] = []  # first VOS_STORAGE_GC_REPORT_LIMIT orphans found
+
+
+class ExportOut(BaseModel):
+    document_id: str
+    version: str  # changes whenever validation results or uploads change
+    status: str  # "ready", "pending", "running", "failed" or "missing"
+    job: Optional[ValidationJobOut] = None
+    download_url: Optional[str] = None  # set when ready
+    size: Optional[int] = None
+    created_at: Optional[datetime] = None
@@ -1,14 +1,41 @@
 from __future__ import annotations
 
+import asyncio
+import functools
+import hashlib
+import os
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Optional
-from datetime import datetime
+from typing import Any, BinaryIO, Callable, Iterable, Iterator, NamedTuple, Optional, TypeVar
+from datetime import datetime, timezone
+from email.utils import formatdate
+from urllib.parse import quote
 
 import boto3
 from botocore.exceptions import ClientError
-from fastapi.responses import FileResponse, StreamingResponse
+from fastapi import Request
+from fastapi.responses import FileResponse, RedirectResponse, Response, StreamingResponse
 
 from .config import settings
+from .metrics import STORAGE_SECONDS
+
+
+T = TypeVar("T")
+
+# S3 DeleteObjects accepts at most 1000 keys per request
+DELETE_OBJECTS_BATCH = 1000
+
+
+class StoredFile(NamedTuple):
+    key: str
+    size: int
+    modified: datetime  # timezone-aware UTC
+
+
+class UploadTooLarge(ValueError):
+    """A streamed upload exceeded the configured maximum size"""
 
 
 class StorageService:
@@ -17,6 +44,8 @@ class StorageService:
     MINIO_PREFIX = "minio://"
 
     def __init__(self) -> None:
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._executor_lock = threading.Lock()
         self.backend = settings.storage_backend.upper()
         if self.backend not in {"LOCAL", "MINIO"}:
             raise ValueError("Unsupported storage backend: %s" % self.backend)
@@ -25,18 +54,22 @@ class StorageService:
             if not settings.minio_endpoint or not settings.minio_bucket:
                 raise ValueError("MINIO backend requires endpoint and bucket configuration")
             self.bucket = settings.minio_bucket
-            self.client = boto3.client(
-                "s3",
-                endpoint_url=settings.minio_endpoint,
-                aws_access_key_id=settings.minio_access_key,
-                aws_secret_access_key=settings.minio_secret_key,
-                region_name=settings.minio_region,
-                use_ssl=settings.minio_secure,
-            )
+            self.client = self._make_client(settings.minio_endpoint)
+            self._public_client = None
             # Ensure bucket exists
             self._ensure_bucket()
 
     # ---------- Utility helpers ----------
+    def _make_client(self, endpoint: str):
+        return boto3.client(
+            "s3",
+            endpoint_url=endpoint,
+            aws_access_key_id=settings.minio_access_key,
+            aws_secret_access_key=settings.minio_secret_key,
+            region_name=settings.minio_region,
+            use_ssl=settings.minio_secure,
+        )
+
     def _ensure_bucket(self) -> None:
         try:
             self.client.head_bucket(Bucket=self.bucket)
@@ -79,9 +112,8 @@ class StorageService:
         except ValueError:
             return False
 
-    # ---------- Save operations ----------
-    def save_bytes(self, key: str, data: bytes, content_type: Optional[str] = None) -> str:
-        """Save bytes. Key format: subfolder/filename (will auto-add date prefix)"""
+    def _dated_key(self, key: str) -> str:
+        """Key format: subfolder/filename (will auto-add date prefix)"""
         # If key doesn't have date prefix, add it
         if not self._has_date_prefix(key):
             # Extract subfolder and filename
@@ -93,22 +125,125 @@ class StorageService:
                 subfolder = "uploads"
                 filename = key
             key = self._make_key_with_date(subfolder, filename)
+        return key
+
+    # ---------- Save operations ----------
+    def save_bytes(self, key: str, data: bytes, content_type: Optional[str] = None) -> str:
+        """Save bytes. Key format: subfolder/filename (will auto-add date prefix)"""
+        key = self._dated_key(key)
         
-        if self.backend == "MINIO":
-            args = {
-                "Bucket": self.bucket,
-                "Key": key,
-                "Body": data,
-            }
-            if content_type:
-                args["ContentType"] = content_type
-            self.client.put_object(**args)
-            return self._make_identifier(key)
+        with STORAGE_SECONDS.labels("save", self.backend.lower()).time():
+            if self.backend == "MINIO":
+                args = {
+                    "Bucket": self.bucket,
+                    "Key": key,
+                    "Body": data,
+                }
+                if content_type:
+                    args["ContentType"] = content_type
+                self.client.put_object(**args)
+                return self._make_identifier(key)
 
+            path = self._local_path(key)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_bytes(data)
+            return str(path)
+
+    def save_stream(
+        self,
+        key: str,
+        stream: BinaryIO,
+        content_type: Optional[str] = None,
+        max_bytes: Optional[int] = None,
+    ) -> tuple[str, str, int]:
+        """Save a file-like object chunk by chunk; returns (identifier, sha256, size).
+
+        Memory use is bounded by one chunk (LOCAL) or one multipart part (MINIO)
+        whatever the file size. LOCAL writes go to a temp file in the target
+        directory that is renamed into place once complete, so readers never see
+        a partial file. Raises UploadTooLarge past `max_bytes`, leaving nothing behind.
+        """
+        key = self._dated_key(key)
+        with STORAGE_SECONDS.labels("save_stream", self.backend.lower()).time():
+            if self.backend == "MINIO":
+                return self._save_stream_minio(key, stream, content_type, max_bytes)
+            return self._save_stream_local(key, stream, max_bytes)
+
+    def _read_chunks(self, stream: BinaryIO, size: int, max_bytes: Optional[int], digest) -> Iterator[bytes]:
+        total = 0
+        while True:
+            chunk = stream.read(size)
+            if not chunk:
+                return
+            total += len(chunk)
+            if max_bytes is not None and total > max_bytes:
+                raise UploadTooLarge(f"File exceeds the maximum upload size of {max_bytes} bytes")
+            digest.update(chunk)
+            yield chunk
+
+    def _save_stream_local(self, key: str, stream: BinaryIO, max_bytes: Optional[int]) -> tuple[str, str, int]:
         path = self._local_path(key)
         path.parent.mkdir(parents=True, exist_ok=True)
-        path.write_bytes(data)
-        return str(path)
+        digest = hashlib.sha256()
+        size = 0
+        fd, tmp_name = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".part")
+        try:
+            with os.fdopen(fd, "wb") as out:
+                for chunk in self._read_chunks(stream, settings.storage_chunk_bytes, max_bytes, digest):
+                    out.write(chunk)
+                    size += len(chunk)
+            os.replace(tmp_name, path)
+        except BaseException:
+            Path(tmp_name).unlink(missing_ok=True)
+            raise
+        return str(path), digest.hexdigest(), size
+
+    def _save_stream_minio(
+        self, key: str, stream: BinaryIO, content_type: Optional[str], max_bytes: Optional[int]
+    ) -> tuple[str, str, int]:
+        # S3 parts must be at least 5 MiB, except the last one
+        part_size = max(5 * 1024 * 1024, settings.storage_multipart_part_bytes)
+        digest = hashlib.sha256()
+        extra = {"ContentType": content_type} if content_type else {}
+        buffer = bytearray()
+        size = 0
+        upload_id: Optional[str] = None
+        parts: list[dict] = []
+        try:
+            for chunk in self._read_chunks(stream, settings.storage_chunk_bytes, max_bytes, digest):
+                buffer += chunk
+                size += len(chunk)
+                if len(buffer) >= part_size:
+                    if upload_id is None:
+                        upload_id = self.client.create_multipart_upload(Bucket=self.bucket, Key=key, **extra)["UploadId"]
+                    part_number = len(parts) + 1
+                    resp = self.client.upload_part(
+                        Bucket=self.bucket, Key=key, UploadId=upload_id, PartNumber=part_number, Body=bytes(buffer)
+                    )
+                    parts.append({"ETag": resp["ETag"], "PartNumber": part_number})
+                    buffer.clear()
+
+            if upload_id is None:
+                # Small file: a single PUT is cheaper than a multipart upload
+                self.client.put_object(Bucket=self.bucket, Key=key, Body=bytes(buffer), **extra)
+            else:
+                if buffer:
+                    part_number = len(parts) + 1
+                    resp = self.client.upload_part(
+                        Bucket=self.bucket, Key=key, UploadId=upload_id, PartNumber=part_number, Body=bytes(buffer)
+                    )
+                    parts.append({"ETag": resp["ETag"], "PartNumber": part_number})
+                self.client.complete_multipart_upload(
+                    Bucket=self.bucket, Key=key, UploadId=upload_id, MultipartUpload={"Parts": parts}
+                )
+        except BaseException:
+            if upload_id is not None:
+                try:
+                    self.client.abort_multipart_upload(Bucket=self.bucket, Key=key, UploadId=upload_id)
+                except ClientError:
+                    pass
+            raise
+        return self._make_identifier(key), digest.hexdigest(), size
 
     def save_text(self, key: str, text: str, content_type: Optional[str] = "application/json") -> str:
         return self.save_bytes(key, text.encode("utf-8"), content_type=content_type)
@@ -116,12 +251,14 @@ class StorageService:
     # ---------- Read operations ----------
     def read_bytes(self, identifier: str) -> bytes:
         if self._is_minio(identifier):
-            key = self._key_from_identifier(identifier)
-            obj = self.client.get_object(Bucket=self.bucket, Key=key)
-            return obj["Body"].read()
+            with STORAGE_SECONDS.labels("read", "minio").time():
+                key = self._key_from_identifier(identifier)
+                obj = self.client.get_object(Bucket=self.bucket, Key=key)
+                return obj["Body"].read()
 
-        path = Path(identifier)
-        return path.read_bytes()
+        with STORAGE_SECONDS.labels("read", "local").time():
+            path = Path(identifier)
+            return path.read_bytes()
 
     def read_text(self, identifier: str) -> str:
         return self.read_bytes(identifier).decode("utf-8")
@@ -131,41 +268,334 @@ class StorageService:
         """Delete a file by its identifier"""
         if self._is_minio(identifier):
             key = self._key_from_identifier(identifier)
-            try:
-                self.client.delete_object(Bucket=self.bucket, Key=key)
-            except ClientError:
-                pass  # File might not exist, ignore
+            with STORAGE_SECONDS.labels("delete", "minio").time():
+                try:
+                    self.client.delete_object(Bucket=self.bucket, Key=key)
+                except ClientError:
+                    pass  # File might not exist, ignore
         else:
-            path = Path(identifier)
-            if path.exists():
-                path.unlink()
+            with STORAGE_SECONDS.labels("delete", "local").time():
+                path = Path(identifier)
+                if path.exists():
+                    path.unlink()
 
-    # ---------- Response helpers ----------
-    def file_response(self, identifier: str, download_name: Optional[str] = None):
+    def delete_files(self, identifiers: Iterable[str]) -> list[str]:
+        """Delete many files; returns the identifiers that could not be deleted.
+
+        MINIO objects go in DeleteObjects requests of up to 1000 keys; local files
+        are unlinked in parallel. Missing files count as deleted.
+        """
+        keys: list[str] = []
+        paths: list[str] = []
+        for identifier in identifiers:
+            if self._is_minio(identifier):
+                keys.append(self._key_from_identifier(identifier))
+            else:
+                paths.append(identifier)
+        failed: list[str] = []
+        if keys:
+            with STORAGE_SECONDS.labels("delete_many", "minio").time():
+                for start in range(0, len(keys), DELETE_OBJECTS_BATCH):
+                    batch = keys[start : start + DELETE_OBJECTS_BATCH]
+                    try:
+                        resp = self.client.delete_objects(
+                            Bucket=self.bucket,
+                            Delete={"Objects": [{"Key": key} for key in batch], "Quiet": True},
+                        )
+                    except ClientError:
+                        failed.extend(self.MINIO_PREFIX + key for key in batch)
+                        continue
+                    failed.extend(self.MINIO_PREFIX + err["Key"] for err in resp.get("Errors", []))
+        if paths:
+            with STORAGE_SECONDS.labels("delete_many", "local").time():
+                with ThreadPoolExecutor(max_workers=max(1, settings.storage_io_workers)) as pool:
+                    for path, ok in zip(paths, pool.map(_unlink, paths)):
+                        if not ok:
+                            failed.append(path)
+        return failed
+
+    # ---------- Listing / reconciliation ----------
+    def key_of(self, identifier: str) -> Optional[str]:
+        """Storage key of an identifier held by this backend, None when it points elsewhere"""
         if self._is_minio(identifier):
-            key = self._key_from_identifier(identifier)
-            obj = self.client.get_object(Bucket=self.bucket, Key=key)
+            return self._key_from_identifier(identifier) if self.backend == "MINIO" else None
+        if self.backend != "LOCAL":
+            return None
+        try:
+            return Path(identifier).relative_to(settings.storage_dir).as_posix()
+        except ValueError:
+            return None
+
+    def iter_files(self, page_size: int = 1000) -> Iterator[StoredFile]:
+        """Every stored file, listed page by page; in-progress temp files are skipped"""
+        if self.backend == "MINIO":
+            paginator = self.client.get_paginator("list_objects_v2")
+            for page in paginator.paginate(Bucket=self.bucket, PaginationConfig={"PageSize": page_size}):
+                for obj in page.get("Contents", []):
+                    yield StoredFile(obj["Key"], obj["Size"], obj["LastModified"])
+            return
 
-            def iter_chunks():
+        root = Path(settings.storage_dir)
+        for dirpath, _, filenames in os.walk(root):
+            for name in filenames:
+                if name.startswith("."):
+                    continue
+                path = Path(dirpath) / name
                 try:
-                    for chunk in iter(lambda: obj["Body"].read(8192), b""):
-                        if chunk:
-                            yield chunk
-                finally:
-                    obj["Body"].close()
-
-            return StreamingResponse(
-                iter_chunks(),
-                media_type=obj.get("ContentType", "application/octet-stream"),
-                headers={
-                    "Content-Disposition": f"attachment; filename={download_name}" if download_name else "attachment",
-                },
-            )
+                    stat_result = path.stat()
+                except FileNotFoundError:
+                    continue
+                modified = datetime.fromtimestamp(stat_result.st_mtime, timezone.utc)
+                yield StoredFile(path.relative_to(root).as_posix(), stat_result.st_size, modified)
+
+    def delete_keys(self, keys: list[str]) -> list[str]:
+        """delete_files for keys of this backend; returns the keys that could not be deleted"""
+        failed = self.delete_files(self._make_identifier(key) for key in keys)
+        return [self.key_of(identifier) or identifier for identifier in failed]
+
+    def quarantine_keys(self, keys: list[str]) -> list[str]:
+        """Move files under VOS_STORAGE_QUARANTINE_PREFIX; returns the keys that could not be moved"""
+        prefix = settings.storage_quarantine_prefix.strip("/")
+        failed: list[str] = []
+        with STORAGE_SECONDS.labels("quarantine", self.backend.lower()).time():
+            if self.backend == "MINIO":
+                # S3 has no rename: copy, then delete the originals in one batch
+                copied = []
+                for key in keys:
+                    try:
+                        self.client.copy_object(
+                            Bucket=self.bucket, Key=f"{prefix}/{key}", CopySource={"Bucket": self.bucket, "Key": key}
+                        )
+                        copied.append(key)
+                    except ClientError:
+                        failed.append(key)
+                return failed + self.delete_keys(copied)
+
+            root = Path(settings.storage_dir)
+            for key in keys:
+                target = root / prefix / key
+                try:
+                    target.parent.mkdir(parents=True, exist_ok=True)
+                    os.replace(root / key, target)
+                except OSError:
+                    failed.append(key)
+            return failed
+
+    # ---------- Async API ----------
+    # boto3 and file I/O are blocking, so async routes run them on a dedicated bounded
+    # executor: slow storage cannot stall the event loop, nor starve the threadpool
+    # that serves sync routes.
+    def _io_executor(self) -> ThreadPoolExecutor:
+        with self._executor_lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=max(1, settings.storage_io_workers), thread_name_prefix="storage-io"
+                )
+            return self._executor
+
+    async def _run(self, func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._io_executor(), functools.partial(func, *args, **kwargs))
+
+    async def asave_bytes(self, key: str, data: bytes, content_type: Optional[str] = None) -> str:
+        return await self._run(self.save_bytes, key, data, content_type=content_type)
+
+    async def asave_text(self, key: str, text: str, content_type: Optional[str] = "application/json") -> str:
+        return await self._run(self.save_text, key, text, content_type=content_type)
+
+    async def asave_stream(
+        self,
+        key: str,
+        stream: BinaryIO,
+        content_type: Optional[str] = None,
+        max_bytes: Optional[int] = None,
+    ) -> tuple[str, str, int]:
+        return await self._run(self.save_stream, key, stream, content_type, max_bytes)
+
+    async def aread_bytes(self, identifier: str) -> bytes:
+        return await self._run(self.read_bytes, identifier)
+
+    async def aread_text(self, identifier: str) -> str:
+        return await self._run(self.read_text, identifier)
+
+    async def adelete_file(self, identifier: str) -> None:
+        await self._run(self.delete_file, identifier)
+
+    def close(self) -> None:
+        with self._executor_lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True)
+
+    # ---------- Response helpers ----------
+    def _presign_client(self):
+        # Presigned URLs must use the endpoint browsers reach, which can differ from the internal one
+        if not settings.minio_public_endpoint:
+            return self.client
+        if self._public_client is None:
+            self._public_client = self._make_client(settings.minio_public_endpoint)
+        return self._public_client
+
+    def file_response(self, identifier: str, download_name: Optional[str] = None, request: Optional[Request] = None):
+        """Response serving a stored file, honouring Range, If-Range and If-None-Match from `request`.
+
+        With VOS_DOWNLOAD_MODE=redirect, MINIO files are not proxied: the client is
+        redirected to a presigned GET URL valid for VOS_PRESIGN_TTL_SECONDS.
+        """
+        request_headers = request.headers if request is not None else {}
+        if self._is_minio(identifier):
+            key = self._key_from_identifier(identifier)
+            if settings.download_mode.lower() == "redirect":
+                params = {"Bucket": self.bucket, "Key": key}
+                if download_name:
+                    params["ResponseContentDisposition"] = _content_disposition(download_name)
+                url = self._presign_client().generate_presigned_url(
+                    "get_object", Params=params, ExpiresIn=settings.presign_ttl_seconds
+                )
+                return RedirectResponse(url, status_code=307)
+            return self._proxy_minio_object(key, download_name, request_headers)
 
         path = Path(identifier)
         if not download_name:
             download_name = path.name
-        return FileResponse(path, filename=download_name)
+        # FileResponse serves Range / If-Range itself; conditional GETs are answered here
+        response = FileResponse(path, filename=download_name, stat_result=path.stat())
+        response.chunk_size = settings.download_chunk_bytes
+        if _etag_matches(request_headers.get("if-none-match"), response.headers["etag"]):
+            return Response(
+                status_code=304,
+                headers={"ETag": response.headers["etag"], "Last-Modified": response.headers["last-modified"]},
+            )
+        return response
+
+    def _proxy_minio_object(self, key: str, download_name: Optional[str], request_headers) -> Response:
+        # If the object is replaced between the HEAD and the GET, the GET's IfMatch fails;
+        # the HEAD is then redone once so the response describes the new object
+        for _ in range(2):
+            try:
+                return self._proxy_minio_once(key, download_name, request_headers)
+            except ClientError as e:
+                if not _is_precondition_failed(e):
+                    raise
+        return Response(status_code=503, headers={"Retry-After": "1"})
+
+    def _proxy_minio_once(self, key: str, download_name: Optional[str], request_headers) -> Response:
+        head = self.client.head_object(Bucket=self.bucket, Key=key)
+        etag = head["ETag"]
+        size = head["ContentLength"]
+        last_modified = formatdate(head["LastModified"].timestamp(), usegmt=True)
+        headers = {
+            "Accept-Ranges": "bytes",
+            "ETag": etag,
+            "Last-Modified": last_modified,
+            "Content-Disposition": _content_disposition(download_name) if download_name else "attachment",
+        }
+        if _etag_matches(request_headers.get("if-none-match"), etag):
+            return Response(status_code=304, headers={"ETag": etag, "Last-Modified": last_modified})
+
+        byte_range = None
+        range_header = request_headers.get("range")
+        if_range = request_headers.get("if-range")
+        if range_header and (if_range is None or if_range.strip() in (etag, last_modified)):
+            try:
+                byte_range = _single_byte_range(range_header, size)
+            except _RangeNotSatisfiable:
+                return Response(status_code=416, headers={"Content-Range": f"bytes */{size}"})
+
+        # IfMatch makes S3 refuse the read if the object was replaced since the HEAD above
+        args = {"Bucket": self.bucket, "Key": key, "IfMatch": etag}
+        status_code = 200
+        if byte_range is not None:
+            start, end = byte_range
+            args["Range"] = f"bytes={start}-{end}"
+            headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+            headers["Content-Length"] = str(end - start + 1)
+            status_code = 206
+        else:
+            headers["Content-Length"] = str(size)
+        obj = self.client.get_object(**args)
+        chunk_size = settings.download_chunk_bytes
+
+        def iter_chunks():
+            try:
+                for chunk in iter(lambda: obj["Body"].read(chunk_size), b""):
+                    if chunk:
+                        yield chunk
+            finally:
+                obj["Body"].close()
+
+        return StreamingResponse(
+            iter_chunks(),
+            status_code=status_code,
+            media_type=head.get("ContentType") or "application/octet-stream",
+            headers=headers,
+        )
+
+
+def _unlink(path: str) -> bool:
+    try:
+        Path(path).unlink(missing_ok=True)
+        return True
+    except OSError:
+        return False
+
+
+class _RangeNotSatisfiable(Exception):
+    pass
+
+
+def _single_byte_range(header: str, size: int) -> Optional[tuple[int, int]]:
+    """Inclusive (start, end) of a single `bytes=` range, or None to serve the whole file.
+
+    Malformed and multi-range headers are ignored, as RFC 9110 allows.
+    """
+    unit, _, spec = header.partition("=")
+    start_text, dash, end_text = spec.strip().partition("-")
+    if unit.strip().lower() != "bytes" or "," in spec or not dash:
+        return None
+    try:
+        if not start_text:
+            suffix = int(end_text)
+            # An empty object has no last bytes to select
+            if suffix <= 0 or size == 0:
+                raise _RangeNotSatisfiable()
+            return max(0, size - suffix), size - 1
+        start = int(start_text)
+        end = int(end_text) if end_text else size - 1
+    except ValueError:
+        return None
+    if start >= size:
+        raise _RangeNotSatisfiable()
+    if start > end:
+        return None
+    return start, min(end, size - 1)
+
+
+def _is_precondition_failed(error: ClientError) -> bool:
+    return (
+        error.response.get("Error", {}).get("Code") in ("PreconditionFailed", "412")
+        or error.response.get("ResponseMetadata", {}).get("HTTPStatusCode") == 412
+    )
+
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    # Weak comparison, as required for If-None-Match
+    return _opaque_tag(etag) in {_opaque_tag(tag) for tag in if_none_match.split(",")}
+
+
+def _opaque_tag(tag: str) -> str:
+    return tag.strip().removeprefix("W/")
+
+
+def _content_disposition(filename: str) -> str:
+    quoted = quote(filename)
+    if quoted != filename:
+        return f"attachment; filename*=utf-8''{quoted}"
+    return f'attachment; filename="{filename}"'
 
 
 storage_service = StorageService()
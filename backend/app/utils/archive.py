@@ -0,0 +1,156 @@
+"""Reading upload archives (ZIP or tar) and their manifest."""
+from __future__ import annotations
+
+import json
+import shutil
+import tarfile
+import tempfile
+import zipfile
+from dataclasses import dataclass
+from pathlib import PurePosixPath
+from typing import IO, Dict, Iterable, List, Optional, Union
+
+
+MANIFEST_NAMES = ("manifest.json",)
+
+
+class ArchiveError(ValueError):
+    """The archive or its manifest cannot be used"""
+
+
+@dataclass
+class ManifestEntry:
+    file: str
+    # Path of the user-input JSON inside the archive, or the user input itself
+    user_input: Union[str, Dict[str, object], None]
+
+
+class ArchiveReader:
+    """Regular files of a ZIP or tar archive, opened one at a time from a seekable file"""
+
+    def __init__(self, fileobj: IO[bytes]) -> None:
+        self._zip: Optional[zipfile.ZipFile] = None
+        self._tar: Optional[tarfile.TarFile] = None
+        if zipfile.is_zipfile(fileobj):
+            fileobj.seek(0)
+            self._zip = zipfile.ZipFile(fileobj)
+            self.sizes = {i.filename: i.file_size for i in self._zip.infolist() if not i.is_dir()}
+        else:
+            fileobj.seek(0)
+            try:
+                self._tar = tarfile.open(fileobj=fileobj, mode="r:*")
+            except tarfile.TarError:
+                raise ArchiveError("Archive must be a ZIP or tar file") from None
+            self._tar_members = {m.name: m for m in self._tar.getmembers() if m.isfile()}
+            self.sizes = {name: m.size for name, m in self._tar_members.items()}
+        # macOS resource forks and similar metadata are never uploads
+        self.sizes = {
+            name: size
+            for name, size in self.sizes.items()
+            if not name.startswith("__MACOSX/") and not PurePosixPath(name).name.startswith(".")
+        }
+
+    def names(self) -> List[str]:
+        return list(self.sizes)
+
+    def open(self, name: str) -> IO[bytes]:
+        if self._zip is not None:
+            return self._zip.open(name)
+        assert self._tar is not None
+        extracted = self._tar.extractfile(self._tar_members[name])
+        if extracted is None:
+            raise ArchiveError(f"{name} is not a regular file")
+        return extracted
+
+    def extract(self, name: str, spool_bytes: int) -> IO[bytes]:
+        """Stream for one member that can be read from another thread.
+
+        ZIP members decompress independently, so the member itself is returned.
+        A tar stream is shared by all members, so the member is copied to a
+        spooled temp file (in memory up to `spool_bytes`) by the calling thread.
+        """
+        if self._zip is not None:
+            return self._zip.open(name)
+        spooled = tempfile.SpooledTemporaryFile(max_size=spool_bytes)
+        with self.open(name) as fh:
+            shutil.copyfileobj(fh, spooled, spool_bytes)
+        spooled.seek(0)
+        return spooled  # type: ignore[return-value]
+
+    def read(self, name: str, max_bytes: int) -> bytes:
+        if self.sizes.get(name, 0) > max_bytes:
+            raise ArchiveError(f"{name} is larger than {max_bytes} bytes")
+        with self.open(name) as fh:
+            data = fh.read(max_bytes + 1)
+        if len(data) > max_bytes:
+            raise ArchiveError(f"{name} is larger than {max_bytes} bytes")
+        return data
+
+    def close(self) -> None:
+        if self._zip is not None:
+            self._zip.close()
+        if self._tar is not None:
+            self._tar.close()
+
+    def __enter__(self) -> "ArchiveReader":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+def find_manifest(names: Iterable[str]) -> Optional[str]:
+    """The least nested manifest.json, so an archive of one top-level folder works too"""
+    found = [name for name in names if PurePosixPath(name).name in MANIFEST_NAMES]
+    return min(found, key=lambda name: name.count("/")) if found else None
+
+
+def parse_manifest(data: bytes) -> List[ManifestEntry]:
+    """Accepts {"entries": [{"file": ..., "user_input": ...}]} or a {file: user_input} mapping"""
+    try:
+        obj = json.loads(data.decode("utf-8"))
+    except Exception:
+        raise ArchiveError("manifest.json is not valid JSON") from None
+    if isinstance(obj, dict) and isinstance(obj.get("entries"), list):
+        entries = []
+        for item in obj["entries"]:
+            if not isinstance(item, dict) or not isinstance(item.get("file"), str):
+                raise ArchiveError("Every manifest entry needs a 'file' path")
+            entries.append(ManifestEntry(item["file"], item.get("user_input")))
+        return entries
+    if isinstance(obj, dict):
+        return [ManifestEntry(str(file), user_input) for file, user_input in obj.items()]
+    raise ArchiveError("manifest.json must be an object")
+
+
+def pair_by_stem(names: Iterable[str], upload_extensions: Iterable[str]) -> List[ManifestEntry]:
+    """Without a manifest, pair each upload with the JSON file of the same name (scan_01.pdf + scan_01.json)"""
+    extensions = set(upload_extensions)
+    json_by_stem = {}
+    files = []
+    for name in names:
+        path = PurePosixPath(name)
+        if path.suffix.lower() == ".json":
+            json_by_stem[str(path.with_suffix(""))] = name
+        elif path.suffix.lower() in extensions:
+            files.append(name)
+    return [ManifestEntry(name, json_by_stem.get(str(PurePosixPath(name).with_suffix("")))) for name in files]
+
+
+def load_entries(reader: ArchiveReader, upload_extensions: Iterable[str], max_manifest_bytes: int) -> List[ManifestEntry]:
+    """Entries of the archive's manifest, with paths resolved against the manifest's folder"""
+    manifest = find_manifest(reader.names())
+    if manifest is None:
+        return pair_by_stem(reader.names(), upload_extensions)
+    base = PurePosixPath(manifest).parent
+    entries = parse_manifest(reader.read(manifest, max_manifest_bytes))
+    for entry in entries:
+        entry.file = _resolve(base, entry.file)
+        if isinstance(entry.user_input, str):
+            entry.user_input = _resolve(base, entry.user_input)
+    return entries
+
+
+def _resolve(base: PurePosixPath, path: str) -> str:
+    # Paths are only looked up among the archive's members, never on disk
+    return str(base / path.lstrip("/")) if str(base) != "." else path.lstrip("/")
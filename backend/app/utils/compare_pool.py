@@ -0,0 +1,178 @@
+"""Execution backends for the field comparison stage.
+
+With VOS_COMPARE_BACKEND=thread (the default) fields are scored in the calling
+validation thread. With VOS_COMPARE_BACKEND=process, scoring runs in a pool of
+worker processes so CPU-bound metrics do not hold the API process's GIL: a
+dispatcher thread gathers the comparisons requested by validation threads into
+chunks of up to VOS_COMPARE_CHUNK_SIZE pairs (waiting at most
+VOS_COMPARE_LINGER_MS for a chunk to fill) and ships each chunk as one task.
+If a pool process dies, the broken pool is replaced and the chunk re-run; a
+chunk that breaks the replacement pool too is scored in this process.
+"""
+from __future__ import annotations
+
+import logging
+import multiprocessing
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, List, Optional, Tuple
+
+from ..config import settings
+from .similarity import ScoringConfig
+from .validation import compare_fields
+
+
+Comparison = Tuple[Dict[str, str], Dict[str, str], ScoringConfig]
+
+# Pool rebuilds tried for one chunk before it is scored in this process
+CHUNK_POOL_RETRIES = 1
+
+logger = logging.getLogger("app.compare_pool")
+
+
+def _score_chunk(items: List[Comparison]) -> List[Tuple[dict, float]]:
+    # Runs in a pool process
+    return [compare_fields(user_fields, ocr_fields, config) for user_fields, ocr_fields, config in items]
+
+
+class InlineComparer:
+    """Scores fields in the calling thread"""
+
+    def compare(
+        self, user_fields: Dict[str, str], ocr_fields: Dict[str, str], config: ScoringConfig
+    ) -> Tuple[dict, float]:
+        return compare_fields(user_fields, ocr_fields, config)
+
+    def close(self) -> None:
+        pass
+
+
+class ProcessComparer:
+    """Scores fields in a process pool, batching concurrent calls into chunks"""
+
+    def __init__(self, pool_size: int, chunk_size: int, linger_ms: int) -> None:
+        self.pool_size = pool_size if pool_size > 0 else (os.cpu_count() or 1)
+        self.chunk_size = max(1, chunk_size)
+        self.linger = max(0, linger_ms) / 1000.0
+        self._queue: "queue.Queue[Optional[tuple[Comparison, Future]]]" = queue.Queue()
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._dispatcher: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def _new_executor(self) -> ProcessPoolExecutor:
+        # spawn: forking a process that runs threads and a Mongo client is unsafe
+        return ProcessPoolExecutor(max_workers=self.pool_size, mp_context=multiprocessing.get_context("spawn"))
+
+    def _start(self) -> None:
+        # Started on first use, so importing this module (as pool processes do) stays cheap
+        with self._lock:
+            if self._executor is None:
+                self._executor = self._new_executor()
+                self._dispatcher = threading.Thread(target=self._dispatch, name="compare-dispatch", daemon=True)
+                self._dispatcher.start()
+
+    def compare(
+        self, user_fields: Dict[str, str], ocr_fields: Dict[str, str], config: ScoringConfig
+    ) -> Tuple[dict, float]:
+        self._start()
+        future: Future = Future()
+        self._queue.put(((user_fields, ocr_fields, config), future))
+        return future.result()
+
+    def _dispatch(self) -> None:
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            chunk = [item]
+            stopping = False
+            deadline = time.monotonic() + self.linger
+            while len(chunk) < self.chunk_size:
+                try:
+                    nxt = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+                except queue.Empty:
+                    break
+                if nxt is None:
+                    stopping = True
+                    break
+                chunk.append(nxt)
+            self._submit(chunk)
+            if stopping:
+                return
+
+    def _replace_broken(self, broken: Optional[ProcessPoolExecutor]) -> bool:
+        """Swap a broken pool for a fresh one; False once the comparer has been closed"""
+        with self._lock:
+            if self._executor is None:
+                return False
+            if self._executor is broken:
+                logger.warning("Compare process pool broke, starting a new one")
+                self._executor = self._new_executor()
+                if broken is not None:
+                    broken.shutdown(wait=False, cancel_futures=True)
+            return True
+
+    def _retry(
+        self, chunk: List[tuple[Comparison, Future]], broken: Optional[ProcessPoolExecutor], retries: int
+    ) -> None:
+        if retries > 0 and self._replace_broken(broken):
+            self._submit(chunk, retries - 1)
+            return
+        logger.warning("Scoring a chunk of %d comparisons inline after the process pool broke", len(chunk))
+        for (user_fields, ocr_fields, config), future in chunk:
+            try:
+                future.set_result(compare_fields(user_fields, ocr_fields, config))
+            except Exception as e:
+                future.set_exception(e)
+
+    def _submit(self, chunk: List[tuple[Comparison, Future]], retries: int = CHUNK_POOL_RETRIES) -> None:
+        futures = [future for _, future in chunk]
+        executor = self._executor
+        try:
+            assert executor is not None
+            task = executor.submit(_score_chunk, [comparison for comparison, _ in chunk])
+        except BrokenProcessPool:
+            self._retry(chunk, executor, retries)
+            return
+        except Exception as e:
+            for future in futures:
+                future.set_exception(e)
+            return
+
+        def _resolve(task: Future) -> None:
+            error = task.exception()
+            if isinstance(error, BrokenProcessPool):
+                self._retry(chunk, executor, retries)
+                return
+            if error is not None:
+                for future in futures:
+                    future.set_exception(error)
+                return
+            for future, result in zip(futures, task.result()):
+                future.set_result(result)
+
+        task.add_done_callback(_resolve)
+
+    def close(self) -> None:
+        with self._lock:
+            executor, dispatcher = self._executor, self._dispatcher
+            self._executor = self._dispatcher = None
+        if executor is None:
+            return
+        self._queue.put(None)
+        if dispatcher is not None:
+            dispatcher.join()
+        executor.shutdown(wait=True)
+
+
+def comparer_from_settings() -> InlineComparer | ProcessComparer:
+    if settings.compare_backend.lower() == "process":
+        return ProcessComparer(settings.compare_pool_size, settings.compare_chunk_size, settings.compare_linger_ms)
+    return InlineComparer()
+
+
+comparer = comparer_from_settings()
@@ -1,14 +1,281 @@
-from typing import Any, Dict
+from __future__ import annotations
 
-from io import BytesIO
-import requests
+import asyncio
+import random
+import threading
+import time
+from typing import Any, Dict, Optional
+from urllib.parse import urlsplit
 
+import httpx
 
-def call_ocr(ocr_url: str, filename: str, file_bytes: bytes, timeout: int = 60) -> Dict[str, Any]:
-    buffer = BytesIO(file_bytes)
-    files = {"file": (filename, buffer, "application/octet-stream")}
-    resp = requests.post(ocr_url, files=files, timeout=timeout)
-    resp.raise_for_status()
-    return resp.json()
+from ..config import settings
+from ..metrics import OCR_ERRORS, OCR_REQUEST_SECONDS, ocr_error_reason
+from .ocr_limits import SlotTimeout, endpoint_guard
 
 
+# Status codes worth retrying: the OCR service is overloaded or restarting
+RETRYABLE_STATUS_CODES = {500, 502, 503, 504}
+
+# Transport failures where the request never reached (or never left) the OCR service
+RETRYABLE_ERRORS = (
+    httpx.ConnectError,
+    httpx.ConnectTimeout,
+    httpx.PoolTimeout,
+    httpx.RemoteProtocolError,
+)
+
+
+class OCRDeadlineExceeded(Exception):
+    """The caller's deadline passed before the OCR call could be made or retried"""
+
+
+_latency: Dict[str, float] = {}
+_latency_lock = threading.Lock()
+
+# Weight of the newest sample in the per-endpoint latency average
+LATENCY_EWMA_ALPHA = 0.3
+
+
+def record_ocr_latency(ocr_url: str, seconds: float) -> None:
+    with _latency_lock:
+        previous = _latency.get(ocr_url)
+        _latency[ocr_url] = seconds if previous is None else previous + LATENCY_EWMA_ALPHA * (seconds - previous)
+
+
+def estimated_ocr_latency(ocr_url: str) -> Optional[float]:
+    """Moving average of successful OCR call durations in this process, None until one completes"""
+    with _latency_lock:
+        return _latency.get(ocr_url)
+
+
+def _origin(url: str) -> str:
+    parts = urlsplit(url)
+    return f"{parts.scheme}://{parts.netloc}"
+
+
+class OCRClient:
+    """Pooled keep-alive HTTP client for OCR endpoints.
+
+    One connection pool is kept per endpoint origin so a slow OCR backend cannot
+    starve connections to another. Both a sync path (used by the validation
+    thread pool) and an async path are provided; failed requests are retried
+    with full-jitter exponential backoff on connection errors and 5xx responses.
+    A call given a `deadline` caps every timeout to the time left and only
+    retries when the backoff still ends before the deadline.
+    """
+
+    def __init__(
+        self,
+        *,
+        connect_timeout: float,
+        read_timeout: float,
+        max_connections: int,
+        max_keepalive_connections: int,
+        keepalive_expiry: float,
+        max_retries: int,
+        backoff_base: float,
+        backoff_max: float,
+        http2: bool = False,
+    ) -> None:
+        self.timeout = httpx.Timeout(read_timeout, connect=connect_timeout)
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry,
+        )
+        self.max_retries = max(0, max_retries)
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.http2 = http2
+        self._clients: Dict[str, httpx.Client] = {}
+        self._async_clients: Dict[str, httpx.AsyncClient] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_settings(cls) -> "OCRClient":
+        return cls(
+            connect_timeout=settings.ocr_connect_timeout,
+            read_timeout=settings.ocr_read_timeout,
+            max_connections=settings.ocr_pool_max_connections,
+            max_keepalive_connections=settings.ocr_pool_max_keepalive,
+            keepalive_expiry=settings.ocr_keepalive_expiry,
+            max_retries=settings.ocr_max_retries,
+            backoff_base=settings.ocr_retry_backoff_base,
+            backoff_max=settings.ocr_retry_backoff_max,
+            http2=settings.ocr_http2,
+        )
+
+    # ---------- Pool management ----------
+    def _client(self, ocr_url: str) -> httpx.Client:
+        origin = _origin(ocr_url)
+        with self._lock:
+            client = self._clients.get(origin)
+            if client is None:
+                client = httpx.Client(timeout=self.timeout, limits=self.limits, http2=self.http2)
+                self._clients[origin] = client
+            return client
+
+    def _async_client(self, ocr_url: str) -> httpx.AsyncClient:
+        # Async pools are bound to the event loop that first uses them (the app loop)
+        origin = _origin(ocr_url)
+        with self._lock:
+            client = self._async_clients.get(origin)
+            if client is None:
+                client = httpx.AsyncClient(timeout=self.timeout, limits=self.limits, http2=self.http2)
+                self._async_clients[origin] = client
+            return client
+
+    def close(self) -> None:
+        with self._lock:
+            clients = list(self._clients.values())
+            self._clients.clear()
+        for client in clients:
+            client.close()
+
+    async def aclose(self) -> None:
+        with self._lock:
+            clients = list(self._async_clients.values())
+            self._async_clients.clear()
+        for client in clients:
+            await client.aclose()
+
+    # ---------- Retry helpers ----------
+    def _backoff(self, attempt: int) -> float:
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+
+    def _retry_delay(
+        self, attempt: int, resp: Optional[httpx.Response], deadline: Optional[float]
+    ) -> Optional[float]:
+        """Seconds to back off before the next attempt, None when the call must not be retried"""
+        if attempt >= self.max_retries:
+            return None
+        if resp is not None and resp.status_code not in RETRYABLE_STATUS_CODES:
+            return None
+        delay = self._backoff(attempt)
+        if deadline is not None and time.monotonic() + delay >= deadline:
+            return None
+        return delay
+
+    def _timeout(self, read_timeout: Optional[float], deadline: Optional[float] = None) -> httpx.Timeout:
+        timeout = self.timeout if read_timeout is None else httpx.Timeout(read_timeout, connect=self.timeout.connect)
+        if deadline is None:
+            return timeout
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            raise OCRDeadlineExceeded("deadline passed before the OCR request was sent")
+        return httpx.Timeout(
+            connect=min(timeout.connect, remaining),
+            read=min(timeout.read, remaining),
+            write=min(timeout.write, remaining),
+            pool=min(timeout.pool, remaining),
+        )
+
+    # ---------- Calls ----------
+    def post_file(
+        self,
+        ocr_url: str,
+        filename: str,
+        file_bytes: bytes,
+        read_timeout: Optional[float] = None,
+        deadline: Optional[float] = None,
+    ) -> Dict[str, Any]:
+        client = self._client(ocr_url)
+        attempt = 0
+        while True:
+            files = {"file": (filename, file_bytes, "application/octet-stream")}
+            timeout = self._timeout(read_timeout, deadline)
+            try:
+                resp = client.post(ocr_url, files=files, timeout=timeout)
+            except RETRYABLE_ERRORS:
+                delay = self._retry_delay(attempt, None, deadline)
+                if delay is None:
+                    raise
+            else:
+                delay = self._retry_delay(attempt, resp, deadline)
+                if delay is None:
+                    resp.raise_for_status()
+                    return resp.json()
+            time.sleep(delay)
+            attempt += 1
+
+    async def apost_file(
+        self,
+        ocr_url: str,
+        filename: str,
+        file_bytes: bytes,
+        read_timeout: Optional[float] = None,
+        deadline: Optional[float] = None,
+    ) -> Dict[str, Any]:
+        client = self._async_client(ocr_url)
+        attempt = 0
+        while True:
+            files = {"file": (filename, file_bytes, "application/octet-stream")}
+            timeout = self._timeout(read_timeout, deadline)
+            try:
+                resp = await client.post(ocr_url, files=files, timeout=timeout)
+            except RETRYABLE_ERRORS:
+                delay = self._retry_delay(attempt, None, deadline)
+                if delay is None:
+                    raise
+            else:
+                delay = self._retry_delay(attempt, resp, deadline)
+                if delay is None:
+                    resp.raise_for_status()
+                    return resp.json()
+            await asyncio.sleep(delay)
+            attempt += 1
+
+
+ocr_client = OCRClient.from_settings()
+
+
+def call_ocr(ocr_url: str, filename: str, file_bytes: bytes, deadline: Optional[float] = None) -> Dict[str, Any]:
+    """POST a file to an OCR endpoint under its concurrency limit and circuit breaker.
+
+    `deadline` is an absolute time.monotonic() instant: the wait for a slot,
+    every timeout and every retry are fitted before it, and OCRDeadlineExceeded
+    (or an httpx timeout) is raised when the call cannot finish in time.
+    """
+    try:
+        wait = None if deadline is None else max(0.0, deadline - time.monotonic())
+        try:
+            # A caller-imposed deadline is a budget, not a sign of an unhealthy endpoint
+            with endpoint_guard(ocr_url).call(timeouts_are_failures=deadline is None, wait=wait):
+                started = time.monotonic()
+                result = ocr_client.post_file(ocr_url, filename, file_bytes, deadline=deadline)
+        except SlotTimeout as e:
+            raise OCRDeadlineExceeded(str(e)) from e
+    except Exception as e:
+        OCR_ERRORS.labels(ocr_url, ocr_error_reason(e)).inc()
+        raise
+    elapsed = time.monotonic() - started
+    OCR_REQUEST_SECONDS.labels(ocr_url).observe(elapsed)
+    record_ocr_latency(ocr_url, elapsed)
+    return result
+
+
+async def acall_ocr(ocr_url: str, filename: str, file_bytes: bytes, timeout: Optional[float] = None) -> Dict[str, Any]:
+    guard = endpoint_guard(ocr_url)
+    try:
+        guard.breaker.before_call()
+        # Poll instead of blocking so the event loop stays free and cancellation cannot leak a slot
+        while not guard.limiter.try_acquire():
+            await asyncio.sleep(0.05)
+        guard.check_after_wait()
+    except Exception as e:
+        OCR_ERRORS.labels(ocr_url, ocr_error_reason(e)).inc()
+        raise
+    started = time.monotonic()
+    try:
+        result = await ocr_client.apost_file(ocr_url, filename, file_bytes, read_timeout=timeout)
+    except BaseException as e:
+        guard.finish(started, e, timeouts_are_failures=timeout is None)
+        if isinstance(e, Exception):
+            OCR_ERRORS.labels(ocr_url, ocr_error_reason(e)).inc()
+        raise
+    guard.finish(started, None)
+    elapsed = time.monotonic() - started
+    OCR_REQUEST_SECONDS.labels(ocr_url).observe(elapsed)
+    record_ocr_latency(ocr_url, elapsed)
+    return result
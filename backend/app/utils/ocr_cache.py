@@ -0,0 +1,28 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import zlib
+from typing import Any, Dict, Optional
+
+
+def file_sha256(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def make_cache_key(file_hash: str, ocr_url: str, model_version: Optional[str] = None) -> str:
+    """Content address for an OCR response: same file + same endpoint + same model => same output"""
+    h = hashlib.sha256()
+    for part in (file_hash, ocr_url.strip(), model_version or ""):
+        h.update(part.encode("utf-8"))
+        h.update(b"\0")
+    return h.hexdigest()
+
+
+def compress_payload(ocr_json: Dict[str, Any]) -> bytes:
+    raw = json.dumps(ocr_json, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    return zlib.compress(raw, 6)
+
+
+def decompress_payload(blob: bytes) -> Dict[str, Any]:
+    return json.loads(zlib.decompress(blob).decode("utf-8"))
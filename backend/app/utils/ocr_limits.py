@@ -0,0 +1,225 @@
+"""Adaptive concurrency limit and circuit breaker per OCR endpoint.
+
+Every process keeps one `EndpointGuard` per ocr_url, shared by all jobs and
+requests in that process. The limiter follows AIMD: each call that succeeds
+within the latency target raises the limit by 1/limit (about +1 per window of
+calls), while a failure or a slow call multiplies it by the decrease factor,
+at most once per latency target so one burst of errors counts once. The
+breaker opens after consecutive failures, fails calls fast while open, and
+after its reset period lets a few probe calls through (half-open) to decide
+whether to close again.
+"""
+from __future__ import annotations
+
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional
+
+import httpx
+
+from ..config import settings
+from ..metrics import OCR_CIRCUIT_STATE, OCR_CONCURRENCY_LIMIT
+
+
+class CircuitOpenError(Exception):
+    """The endpoint's circuit is open: the call was rejected without contacting the service"""
+
+
+class SlotTimeout(Exception):
+    """No concurrency slot of the endpoint freed up within the caller's wait limit"""
+
+
+def is_endpoint_failure(exc: BaseException) -> bool:
+    """Errors that indicate an unhealthy endpoint (as opposed to a bad request)"""
+    if isinstance(exc, httpx.HTTPStatusError):
+        return exc.response.status_code >= 500 or exc.response.status_code == 429
+    return isinstance(exc, httpx.TransportError)
+
+
+class AdaptiveLimiter:
+    def __init__(
+        self,
+        *,
+        initial: int,
+        minimum: int,
+        maximum: int,
+        latency_target: float,
+        decrease_factor: float,
+    ) -> None:
+        self.minimum = max(1, minimum)
+        self.maximum = max(self.minimum, maximum)
+        self.limit = float(min(self.maximum, max(self.minimum, initial)))
+        self.latency_target = latency_target
+        self.decrease_factor = decrease_factor
+        self.in_flight = 0
+        self._last_decrease = 0.0
+        self._cond = threading.Condition()
+
+    def try_acquire(self) -> bool:
+        with self._cond:
+            if self.in_flight < int(self.limit):
+                self.in_flight += 1
+                return True
+            return False
+
+    def acquire(self, timeout: Optional[float] = None) -> bool:
+        """Wait for a slot, at most `timeout` seconds when given; False if none freed up in time"""
+        with self._cond:
+            if not self._cond.wait_for(lambda: self.in_flight < int(self.limit), timeout):
+                return False
+            self.in_flight += 1
+            return True
+
+    def cancel(self) -> None:
+        """Give back a slot that was never used for a call"""
+        with self._cond:
+            self.in_flight -= 1
+            self._cond.notify_all()
+
+    def release(self, latency: float, ok: bool) -> None:
+        with self._cond:
+            self.in_flight -= 1
+            if ok and latency <= self.latency_target:
+                self.limit = min(float(self.maximum), self.limit + 1.0 / self.limit)
+            else:
+                now = time.monotonic()
+                if now - self._last_decrease >= self.latency_target:
+                    self._last_decrease = now
+                    self.limit = max(float(self.minimum), self.limit * self.decrease_factor)
+            self._cond.notify_all()
+
+
+class CircuitBreaker:
+    CLOSED, HALF_OPEN, OPEN = "closed", "half_open", "open"
+
+    def __init__(self, *, failure_threshold: int, reset_seconds: float, half_open_probes: int) -> None:
+        self.failure_threshold = max(1, failure_threshold)
+        self.reset_seconds = reset_seconds
+        self.half_open_probes = max(1, half_open_probes)
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._probes = 0
+        self._lock = threading.Lock()
+
+    def before_call(self) -> None:
+        """Raise CircuitOpenError unless a call may go out now"""
+        with self._lock:
+            if self.state == self.OPEN:
+                if time.monotonic() - self.opened_at < self.reset_seconds:
+                    raise CircuitOpenError(f"circuit open, retrying the endpoint in {self._retry_in():.0f}s")
+                self.state = self.HALF_OPEN
+                self._probes = 0
+            if self.state == self.HALF_OPEN:
+                if self._probes >= self.half_open_probes:
+                    raise CircuitOpenError("circuit half-open, probe in progress")
+                self._probes += 1
+
+    def cancel_call(self) -> None:
+        """Hand back a half-open probe for a call that never went out"""
+        with self._lock:
+            if self.state == self.HALF_OPEN and self._probes > 0:
+                self._probes -= 1
+
+    def is_open(self) -> bool:
+        with self._lock:
+            return self.state == self.OPEN and time.monotonic() - self.opened_at < self.reset_seconds
+
+    def record(self, ok: bool) -> None:
+        with self._lock:
+            if ok:
+                self.state = self.CLOSED
+                self.failures = 0
+                return
+            self.failures += 1
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+
+    def _retry_in(self) -> float:
+        return max(0.0, self.reset_seconds - (time.monotonic() - self.opened_at))
+
+
+_STATE_VALUES = {CircuitBreaker.CLOSED: 0, CircuitBreaker.HALF_OPEN: 1, CircuitBreaker.OPEN: 2}
+
+
+class EndpointGuard:
+    def __init__(self, ocr_url: str, limiter: AdaptiveLimiter, breaker: CircuitBreaker) -> None:
+        self.ocr_url = ocr_url
+        self.limiter = limiter
+        self.breaker = breaker
+
+    @classmethod
+    def from_settings(cls, ocr_url: str) -> "EndpointGuard":
+        return cls(
+            ocr_url,
+            AdaptiveLimiter(
+                initial=settings.ocr_initial_concurrency_per_url,
+                minimum=settings.ocr_min_concurrency_per_url,
+                maximum=settings.ocr_max_concurrency_per_url,
+                latency_target=settings.ocr_latency_target_seconds,
+                decrease_factor=settings.ocr_concurrency_decrease_factor,
+            ),
+            CircuitBreaker(
+                failure_threshold=settings.ocr_breaker_failure_threshold,
+                reset_seconds=settings.ocr_breaker_reset_seconds,
+                half_open_probes=settings.ocr_breaker_half_open_probes,
+            ),
+        )
+
+    @property
+    def concurrency(self) -> int:
+        return int(self.limiter.limit)
+
+    def finish(self, started: float, exc: Optional[BaseException], timeouts_are_failures: bool = True) -> None:
+        """Feed the outcome of a call that held a limiter slot back into the limiter and breaker"""
+        failed = exc is not None and is_endpoint_failure(exc)
+        if failed and not timeouts_are_failures and isinstance(exc, httpx.TimeoutException):
+            failed = False
+        self.limiter.release(time.monotonic() - started, ok=not failed)
+        # A client-side error says nothing about endpoint health, but it ends a half-open probe
+        self.breaker.record(ok=not failed)
+        OCR_CONCURRENCY_LIMIT.labels(self.ocr_url).set(self.limiter.limit)
+        OCR_CIRCUIT_STATE.labels(self.ocr_url).set(_STATE_VALUES[self.breaker.state])
+
+    def check_after_wait(self) -> None:
+        """Reject a call whose circuit opened while it waited for a slot"""
+        if self.breaker.is_open():
+            self.limiter.cancel()
+            raise CircuitOpenError("circuit opened while waiting for a slot")
+
+    @contextmanager
+    def call(self, timeouts_are_failures: bool = True, wait: Optional[float] = None) -> Iterator[None]:
+        """Hold a concurrency slot for one OCR call; raises CircuitOpenError while the circuit is open.
+
+        Pass timeouts_are_failures=False when the caller imposed a timeout shorter
+        than the endpoint's normal one, so that hitting it does not count against the endpoint.
+        With `wait`, SlotTimeout is raised when no slot frees up within that many seconds.
+        """
+        self.breaker.before_call()
+        if not self.limiter.acquire(wait):
+            self.breaker.cancel_call()
+            raise SlotTimeout(f"no OCR slot for {self.ocr_url} within {wait:.2f}s")
+        self.check_after_wait()
+        started = time.monotonic()
+        try:
+            yield
+        except BaseException as e:
+            self.finish(started, e, timeouts_are_failures)
+            raise
+        self.finish(started, None)
+
+
+_guards: Dict[str, EndpointGuard] = {}
+_guards_lock = threading.Lock()
+
+
+def endpoint_guard(ocr_url: str) -> EndpointGuard:
+    """Process-wide limiter and breaker of one OCR endpoint"""
+    with _guards_lock:
+        guard = _guards.get(ocr_url)
+        if guard is None:
+            guard = EndpointGuard.from_settings(ocr_url)
+            _guards[ocr_url] = guard
+        return guard
@@ -0,0 +1,206 @@
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass, field
+from datetime import datetime
+from difflib import SequenceMatcher
+from typing import Callable, Dict, Mapping, Optional
+
+
+Metric = Callable[[str, str], float]
+
+DEFAULT_METRIC = "sequence_matcher"
+
+
+# ---------- Edit distance ----------
+def levenshtein_distance(a: str, b: str) -> int:
+    """Levenshtein distance using the Myers/Hyyrö bit-parallel algorithm.
+
+    The shorter string is encoded as bit vectors (Python ints), so the cost is
+    O(len(longer)) big-int operations instead of an O(n*m) dynamic programme.
+    """
+    if a == b:
+        return 0
+    if len(a) < len(b):
+        a, b = b, a
+    m = len(b)
+    if m == 0:
+        return len(a)
+
+    peq: Dict[str, int] = {}
+    for i, ch in enumerate(b):
+        peq[ch] = peq.get(ch, 0) | (1 << i)
+
+    mask = (1 << m) - 1
+    last = 1 << (m - 1)
+    pv, mv, score = mask, 0, m
+    for ch in a:
+        eq = peq.get(ch, 0)
+        xv = eq | mv
+        xh = (((eq & pv) + pv) ^ pv) | eq
+        ph = mv | ~(xh | pv)
+        mh = pv & xh
+        if ph & last:
+            score += 1
+        elif mh & last:
+            score -= 1
+        ph = (ph << 1) | 1
+        mh = mh << 1
+        pv = (mh | ~(xv | ph)) & mask
+        mv = ph & xv & mask
+    return score
+
+
+def normalized_levenshtein(a: str, b: str) -> float:
+    longest = max(len(a), len(b))
+    if longest == 0:
+        return 1.0
+    return 1.0 - levenshtein_distance(a, b) / longest
+
+
+# ---------- Jaro-Winkler ----------
+def jaro(a: str, b: str) -> float:
+    if a == b:
+        return 1.0
+    la, lb = len(a), len(b)
+    if la == 0 or lb == 0:
+        return 0.0
+    window = max(la, lb) // 2 - 1
+    a_flags = [False] * la
+    b_flags = [False] * lb
+    matches = 0
+    for i, ch in enumerate(a):
+        lo = max(0, i - window)
+        hi = min(i + window + 1, lb)
+        for j in range(lo, hi):
+            if not b_flags[j] and b[j] == ch:
+                a_flags[i] = b_flags[j] = True
+                matches += 1
+                break
+    if matches == 0:
+        return 0.0
+    transpositions = 0
+    j = 0
+    for i in range(la):
+        if a_flags[i]:
+            while not b_flags[j]:
+                j += 1
+            if a[i] != b[j]:
+                transpositions += 1
+            j += 1
+    t = transpositions / 2
+    return (matches / la + matches / lb + (matches - t) / matches) / 3
+
+
+def jaro_winkler(a: str, b: str, prefix_scale: float = 0.1, max_prefix: int = 4) -> float:
+    sim = jaro(a, b)
+    prefix = 0
+    for ca, cb in zip(a[:max_prefix], b[:max_prefix]):
+        if ca != cb:
+            break
+        prefix += 1
+    return sim + prefix * prefix_scale * (1.0 - sim)
+
+
+# ---------- Typed matchers ----------
+def sequence_matcher(a: str, b: str) -> float:
+    """difflib ratio, kept for scores compatible with earlier releases"""
+    return SequenceMatcher(None, a, b).ratio()
+
+
+def exact(a: str, b: str) -> float:
+    return 1.0 if a == b else 0.0
+
+
+_NUMBER_CLEAN = re.compile(r"[^\d,.\-]")
+
+
+def _parse_number(value: str) -> Optional[float]:
+    cleaned = _NUMBER_CLEAN.sub("", value)
+    if not cleaned or not any(ch.isdigit() for ch in cleaned):
+        return None
+    # A lone separator followed by 1-2 digits is a decimal mark; anything else groups thousands
+    last_sep = max(cleaned.rfind(","), cleaned.rfind("."))
+    if last_sep != -1 and 0 < len(cleaned) - last_sep - 1 <= 2:
+        integer = cleaned[:last_sep].replace(",", "").replace(".", "")
+        cleaned = f"{integer}.{cleaned[last_sep + 1:]}"
+    else:
+        cleaned = cleaned.replace(",", "").replace(".", "")
+    try:
+        return float(cleaned)
+    except ValueError:
+        return None
+
+
+def numeric(a: str, b: str) -> float:
+    """Relative closeness of two numbers; falls back to edit distance for non-numeric text"""
+    na, nb = _parse_number(a), _parse_number(b)
+    if na is None or nb is None:
+        return normalized_levenshtein(a, b)
+    if na == nb:
+        return 1.0
+    return max(0.0, 1.0 - abs(na - nb) / max(abs(na), abs(nb)))
+
+
+DATE_FORMATS = ("%d/%m/%Y", "%d-%m-%Y", "%d.%m.%Y", "%Y-%m-%d", "%Y/%m/%d", "%d/%m/%y", "%d %B %Y", "%d %b %Y")
+
+
+def _parse_date(value: str) -> Optional[datetime]:
+    for fmt in DATE_FORMATS:
+        try:
+            return datetime.strptime(value, fmt)
+        except ValueError:
+            continue
+    return None
+
+
+def date(a: str, b: str) -> float:
+    """1.0 when both values denote the same calendar day; edit distance when either is unparseable"""
+    da, db = _parse_date(a), _parse_date(b)
+    if da is None or db is None:
+        return normalized_levenshtein(a, b)
+    return 1.0 if da.date() == db.date() else 0.0
+
+
+METRICS: Dict[str, Metric] = {
+    "sequence_matcher": sequence_matcher,
+    "levenshtein": normalized_levenshtein,
+    "jaro_winkler": jaro_winkler,
+    "exact": exact,
+    "numeric": numeric,
+    "date": date,
+}
+
+
+def get_metric(name: str) -> Metric:
+    try:
+        return METRICS[name]
+    except KeyError:
+        raise ValueError(f"Unknown similarity metric: {name}") from None
+
+
+@dataclass(frozen=True)
+class ScoringConfig:
+    """Which metric scores which field: a document-wide default plus per-field overrides"""
+
+    metric: str = DEFAULT_METRIC
+    field_metrics: Mapping[str, str] = field(default_factory=dict)
+
+    def __post_init__(self) -> None:
+        get_metric(self.metric)
+        for name in self.field_metrics.values():
+            get_metric(name)
+
+    @classmethod
+    def from_document(cls, document: Mapping) -> "ScoringConfig":
+        return cls(
+            metric=document.get("similarity_metric") or DEFAULT_METRIC,
+            field_metrics=dict(document.get("field_metrics") or {}),
+        )
+
+    def fingerprint(self) -> str:
+        overrides = ",".join(f"{k}={v}" for k, v in sorted(self.field_metrics.items()))
+        return f"{self.metric}|{overrides}"
+
+    def metric_for(self, field_name: str) -> Metric:
+        return get_metric(self.field_metrics.get(field_name, self.metric))
@@ -1,7 +1,8 @@
 from __future__ import annotations
 
-from difflib import SequenceMatcher
-from typing import Any, Dict, Tuple
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from .similarity import DEFAULT_METRIC, ScoringConfig, get_metric
 
 
 def extract_text_fields(ocr_json: Dict[str, Any]) -> Dict[str, str]:
@@ -20,19 +21,31 @@ def extract_text_fields(ocr_json: Dict[str, Any]) -> Dict[str, str]:
     return fields
 
 
-def string_similarity(a: str, b: str) -> float:
-    return SequenceMatcher(None, (a or "").strip(), (b or "").strip()).ratio()
+def string_similarity(a: str, b: str, metric: str = DEFAULT_METRIC) -> float:
+    return get_metric(metric)((a or "").strip(), (b or "").strip())
 
 
-def compare_fields(user_fields: Dict[str, str], ocr_fields: Dict[str, str]) -> Tuple[dict, float]:
+def compare_fields(
+    user_fields: Dict[str, str],
+    ocr_fields: Dict[str, str],
+    config: Optional[ScoringConfig] = None,
+) -> Tuple[dict, float]:
+    config = config or ScoringConfig()
     results: dict[str, float] = {}
     scores: list[float] = []
     for key, user_val in user_fields.items():
         ocr_val = ocr_fields.get(key, "")
-        score = string_similarity(user_val, ocr_val)
+        score = config.metric_for(key)((user_val or "").strip(), (ocr_val or "").strip())
         results[key] = score
         scores.append(score)
     overall = sum(scores) / len(scores) if scores else 0.0
     return results, overall
 
 
+def compare_fields_batch(
+    items: Iterable[Tuple[Dict[str, str], Dict[str, str]]],
+    config: Optional[ScoringConfig] = None,
+) -> List[Tuple[dict, float]]:
+    """Score many (user_fields, ocr_fields) pairs in one call, in input order"""
+    config = config or ScoringConfig()
+    return [compare_fields(user_fields, ocr_fields, config) for user_fields, ocr_fields in items]
@@ -0,0 +1,93 @@
+"""Standalone job worker: `python -m app.worker`.
+
+Claims jobs from the validation_jobs collection and runs them outside the HTTP
+tier. Run as many worker processes, on as many hosts, as needed; leases make
+sure each job is processed by one worker at a time.
+"""
+from __future__ import annotations
+
+import argparse
+import logging
+import signal
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from prometheus_client import start_http_server
+
+from .config import settings
+from .database import get_db, init_db
+from . import crud, jobs
+from . import cascade, export, reconcile  # noqa: F401  (register the cascade_delete, export and storage_gc job handlers)
+from .routers import validation  # noqa: F401  (registers the validation job handler)
+from .utils.compare_pool import comparer
+
+
+logger = logging.getLogger("app.worker")
+
+
+def _run_one(db, job: dict, worker_id: str, slots: threading.Semaphore) -> None:
+    job_id = str(job["_id"])
+    try:
+        logger.info("Running job %s (attempt %s)", job_id, job.get("attempts"))
+        jobs.run_job(db, job, worker_id)
+    except Exception as e:
+        logger.exception("Job %s crashed", job_id)
+        crud.log_event(db, "ERROR", f"Worker {worker_id} crashed on job {job_id}", context=str(e))
+        try:
+            crud.update_validation_job_status(db, job_id, "failed", error=str(e), lease_owner=worker_id)
+        except jobs.LeaseLost:
+            pass
+    finally:
+        slots.release()
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Validation job worker")
+    parser.add_argument("--concurrency", type=int, default=settings.worker_concurrency, help="jobs run in parallel")
+    parser.add_argument("--poll-interval", type=float, default=settings.worker_poll_interval, help="seconds between polls when idle")
+    parser.add_argument("--worker-id", default=jobs.default_worker_id())
+    parser.add_argument("--metrics-port", type=int, default=settings.worker_metrics_port, help="serve Prometheus metrics on this port (0 = off)")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    init_db()
+    db = get_db()
+    if args.metrics_port:
+        start_http_server(args.metrics_port)
+
+    stopping = threading.Event()
+
+    def _stop(signum, frame) -> None:
+        logger.info("Received signal %s, finishing in-flight jobs", signum)
+        stopping.set()
+
+    signal.signal(signal.SIGTERM, _stop)
+    signal.signal(signal.SIGINT, _stop)
+
+    concurrency = max(1, args.concurrency)
+    slots = threading.Semaphore(concurrency)
+    logger.info("Worker %s started (concurrency=%s)", args.worker_id, concurrency)
+
+    with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="job") as executor:
+        while not stopping.is_set():
+            if not slots.acquire(timeout=args.poll_interval):
+                continue
+            try:
+                jobs.fail_exhausted_jobs(db)
+                job = jobs.claim_job(db, args.worker_id)
+            except Exception:
+                logger.exception("Failed to poll for jobs")
+                job = None
+            if job is None:
+                slots.release()
+                stopping.wait(args.poll_interval)
+                continue
+            executor.submit(_run_one, db, job, args.worker_id, slots)
+
+    comparer.close()
+    logger.info("Worker %s stopped", args.worker_id)
+
+
+if __name__ == "__main__":
+    main()
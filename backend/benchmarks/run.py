@@ -0,0 +1,219 @@
+"""Validation engine micro-benchmarks.
+
+Run from the backend directory:
+
+    pip install -r benchmarks/requirements.txt
+    python -m benchmarks.run --output bench.json
+    python -m benchmarks.run --baseline bench.json   # compare against an earlier run
+
+Benchmarks extract_text_fields, string_similarity and compare_fields on
+synthetic OCR payloads, and _validate_single_upload end to end against
+mongomock and in-memory storage, with the per-stage timings recorded by
+app.metrics.StageTimer. Results are written
+as JSON (stdout unless --output is given).
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from .synthetic import make_case
+from .stand_ins import install
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, timeout=5)
+        return out.stdout.strip() or None
+    except Exception:
+        return None
+
+
+def _summarize(name: str, samples: List[float], ops_per_sample: int = 1, **extra: Any) -> Dict[str, Any]:
+    ordered = sorted(samples)
+    total = sum(samples)
+    ops = len(samples) * ops_per_sample
+
+    def pct(p: float) -> float:
+        return ordered[min(len(ordered) - 1, int(p * len(ordered)))] * 1000
+
+    return {
+        "name": name,
+        "ops": ops,
+        "total_s": round(total, 6),
+        "ops_per_s": round(ops / total, 2) if total else None,
+        "mean_ms": round(statistics.fmean(samples) * 1000, 4),
+        "p50_ms": round(pct(0.50), 4),
+        "p95_ms": round(pct(0.95), 4),
+        **extra,
+    }
+
+
+def _time_each(fn: Callable[[Any], Any], items: Iterable[Any], repeat: int) -> List[float]:
+    samples = []
+    for _ in range(repeat):
+        for item in items:
+            started = time.perf_counter()
+            fn(item)
+            samples.append(time.perf_counter() - started)
+    return samples
+
+
+def bench_validate_single_upload(args, cases, mode: str) -> List[Dict[str, Any]]:
+    from app import crud, schemas
+    from app.config import settings
+    from app.routers import validation
+    from app.utils.ocr_cache import compress_payload, file_sha256, make_cache_key
+
+    db, storage = install()
+    ocr_url = "mock" if mode == "mock" else "http://ocr.bench.invalid/ocr"
+    project = crud.create_project(db, schemas.ProjectCreate(name=f"bench-{mode}-{time.time_ns()}"))
+    document = crud.create_document(
+        db, schemas.DocumentCreate(project_id=project["id"], name=mode, ocr_url=ocr_url, similarity_metric=args.metric)
+    )
+    sample_path = storage.save_text("samples/sample.json", json.dumps(cases[0][0]))
+    crud.set_document_sample_json_path(db, document["id"], sample_path)
+
+    uploads = []
+    for i, (ocr_json, user_input) in enumerate(cases):
+        content = f"synthetic-file-{i}".encode()
+        upload = crud.create_upload(db, document["id"], storage.save_bytes(f"uploads/{i}.pdf", content), file_sha256(content))
+        user_bytes = json.dumps(user_input).encode("utf-8")
+        crud.set_upload_user_input(db, upload["id"], storage.save_bytes(f"user_inputs/{i}.json", user_bytes), file_sha256(user_bytes))
+        if mode == "cached":
+            # Every OCR lookup is a cache hit, so no OCR service is contacted
+            crud.put_cached_ocr(
+                db,
+                make_cache_key(file_sha256(content), ocr_url, settings.ocr_model_version),
+                compress_payload(ocr_json),
+                ocr_url=ocr_url,
+                ttl_seconds=3600,
+                max_entries=len(cases) + 1,
+            )
+        uploads.append(crud.get_upload_raw(db, upload["id"]))
+
+    # Per-stage durations come from the app's own StageTimer (app.metrics), which
+    # _validate_single_upload reports in each result's stage_timings
+    stage_samples: Dict[str, List[float]] = defaultdict(list)
+    errors = 0
+    with validation.ValidationContext(db, crud.get_document_raw(db, document["id"])) as ctx:
+
+        def run(upload):
+            nonlocal errors
+            result = validation._validate_single_upload(ctx, upload)
+            errors += result.error is not None
+            for stage, seconds in (result.stage_timings or {}).items():
+                stage_samples[stage].append(seconds)
+
+        samples = _time_each(run, uploads, args.repeat)
+
+    results = [_summarize(f"validate_single_upload[{mode}]", samples, errors=errors)]
+    for stage, timings in sorted(stage_samples.items()):
+        results.append(_summarize(f"validate_single_upload[{mode}].{stage}", timings))
+    return results
+
+
+def run_benchmarks(args) -> Dict[str, Any]:
+    from app.utils.similarity import METRICS, ScoringConfig
+    from app.utils.validation import compare_fields, extract_text_fields, string_similarity
+
+    rng = random.Random(args.seed)
+    cases = [make_case(rng, args.fields, args.value_length, args.noise) for _ in range(args.uploads)]
+    field_pairs = [
+        (ocr_value, user_input[key])
+        for ocr_json, user_input in cases
+        for key, ocr_value in extract_text_fields(ocr_json).items()
+    ]
+    results: List[Dict[str, Any]] = []
+
+    results.append(_summarize("extract_text_fields", _time_each(extract_text_fields, [c[0] for c in cases], args.repeat)))
+
+    metrics = sorted(METRICS) if args.metric == "all" else [args.metric]
+    for metric in metrics:
+        samples = _time_each(lambda pair: string_similarity(pair[0], pair[1], metric), field_pairs, args.repeat)
+        results.append(_summarize(f"string_similarity[{metric}]", samples))
+
+    for metric in metrics:
+        config = ScoringConfig(metric=metric)
+        ocr_fields = [(user_input, extract_text_fields(ocr_json)) for ocr_json, user_input in cases]
+        samples = _time_each(lambda item: compare_fields(item[0], item[1], config), ocr_fields, args.repeat)
+        results.append(_summarize(f"compare_fields[{metric}]", samples, fields_per_op=args.fields))
+
+    if not args.skip_e2e:
+        if args.metric == "all":
+            args.metric = "sequence_matcher"
+        for mode in ("mock", "cached"):
+            results.extend(bench_validate_single_upload(args, cases, mode))
+
+    return {
+        "meta": {
+            "commit": _git_commit(),
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "params": {
+                "uploads": args.uploads,
+                "fields": args.fields,
+                "value_length": args.value_length,
+                "noise": args.noise,
+                "repeat": args.repeat,
+                "seed": args.seed,
+            },
+        },
+        "results": results,
+    }
+
+
+def compare_to_baseline(report: Dict[str, Any], baseline: Dict[str, Any]) -> List[str]:
+    """One line per benchmark present in both runs: throughput ratio current/baseline"""
+    previous = {r["name"]: r for r in baseline.get("results", [])}
+    lines = []
+    for r in report["results"]:
+        old = previous.get(r["name"])
+        if not old or not old.get("ops_per_s") or not r.get("ops_per_s"):
+            continue
+        ratio = r["ops_per_s"] / old["ops_per_s"]
+        lines.append(f"{r['name']:<48} {old['ops_per_s']:>12.1f} -> {r['ops_per_s']:>12.1f} ops/s  x{ratio:.2f}")
+    return lines
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Validation engine micro-benchmarks")
+    parser.add_argument("--uploads", type=int, default=200, help="synthetic uploads (OCR payloads) to generate")
+    parser.add_argument("--fields", type=int, default=25, help="fields per OCR payload")
+    parser.add_argument("--value-length", type=int, default=40, help="mean length of field values")
+    parser.add_argument("--noise", type=float, default=0.1, help="per-character edit probability of user input")
+    parser.add_argument("--metric", default="all", help="similarity metric to benchmark, or 'all'")
+    parser.add_argument("--repeat", type=int, default=3, help="passes over the synthetic data")
+    parser.add_argument("--seed", type=int, default=1234)
+    parser.add_argument("--skip-e2e", action="store_true", help="skip the _validate_single_upload benchmarks")
+    parser.add_argument("--output", help="write the JSON report to this file instead of stdout")
+    parser.add_argument("--baseline", help="earlier JSON report to compare throughput against")
+    args = parser.parse_args(argv)
+
+    report = run_benchmarks(args)
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as fh:
+            fh.write(text + "\n")
+    else:
+        print(text)
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as fh:
+            for line in compare_to_baseline(report, json.load(fh)):
+                print(line, file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
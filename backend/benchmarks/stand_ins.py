@@ -0,0 +1,52 @@
+"""In-memory stand-ins for MongoDB and object storage, so benchmarks run without services."""
+from __future__ import annotations
+
+import itertools
+from typing import Dict, Optional
+
+
+class MemoryStorage:
+    """Drop-in for StorageService's byte API, backed by a dict"""
+
+    PREFIX = "mem://"
+
+    def __init__(self) -> None:
+        self._objects: Dict[str, bytes] = {}
+        self._counter = itertools.count()
+
+    def save_bytes(self, key: str, data: bytes, content_type: Optional[str] = None) -> str:
+        identifier = f"{self.PREFIX}{next(self._counter)}/{key}"
+        self._objects[identifier] = data
+        return identifier
+
+    def save_text(self, key: str, text: str, content_type: Optional[str] = "application/json") -> str:
+        return self.save_bytes(key, text.encode("utf-8"), content_type=content_type)
+
+    def read_bytes(self, identifier: str) -> bytes:
+        return self._objects[identifier]
+
+    def read_text(self, identifier: str) -> str:
+        return self.read_bytes(identifier).decode("utf-8")
+
+    def delete_file(self, identifier: str) -> None:
+        self._objects.pop(identifier, None)
+
+
+def install():
+    """Point the app at mongomock and MemoryStorage; returns (db, storage)"""
+    try:
+        import mongomock
+    except ImportError as e:
+        raise SystemExit("benchmarks need mongomock: pip install -r benchmarks/requirements.txt") from e
+
+    from app import database
+    from app.routers import validation
+
+    database.client = mongomock.MongoClient()
+    database.db = database.client["benchmark"]
+    database._transactions_supported = False
+    database.init_db()
+
+    storage = MemoryStorage()
+    validation.storage_service = storage
+    return database.db, storage
@@ -0,0 +1,76 @@
+"""Synthetic OCR payloads shaped like demo.json, and matching user input with controlled noise."""
+from __future__ import annotations
+
+import random
+import string
+import uuid
+from typing import Dict, Tuple
+
+
+_ALPHABET = string.ascii_letters + string.digits + "  /-.,"
+
+
+def random_value(rng: random.Random, length: int) -> str:
+    return "".join(rng.choice(_ALPHABET) for _ in range(length)).strip() or "x"
+
+
+def add_noise(rng: random.Random, value: str, noise: float) -> str:
+    """Substitute, drop or insert characters with total probability `noise` per character"""
+    if noise <= 0:
+        return value
+    out = []
+    for ch in value:
+        roll = rng.random()
+        if roll < noise / 3:
+            out.append(rng.choice(_ALPHABET))  # substitution
+        elif roll < 2 * noise / 3:
+            continue  # deletion
+        elif roll < noise:
+            out.append(ch + rng.choice(_ALPHABET))  # insertion
+        else:
+            out.append(ch)
+    return "".join(out)
+
+
+def make_ocr_payload(
+    rng: random.Random,
+    n_fields: int,
+    value_length: int,
+    non_text_ratio: float = 0.1,
+) -> Dict:
+    """OCR response with `n_fields` entries in information[0], most of them of type "text" """
+    info: Dict[str, Dict] = {}
+    for i in range(n_fields):
+        length = max(1, int(rng.gauss(value_length, value_length / 4)))
+        field_type = "table" if rng.random() < non_text_ratio else "text"
+        info[f"field_{i:03d}"] = {
+            "confidence": round(rng.uniform(0.5, 1.0), 4),
+            "value": random_value(rng, length) if field_type == "text" else [],
+            "type": field_type,
+            "bbox_ids": [],
+            "available": 1,
+        }
+    return {
+        "information": [info],
+        "processing_time": round(rng.uniform(1.0, 30.0), 4),
+        "core_id": "",
+        "request_id": str(uuid.UUID(int=rng.getrandbits(128))),
+        "version": "v0.0.9",
+        "errorCode": 2000,
+        "errorMessage": "Success",
+    }
+
+
+def make_user_input(rng: random.Random, ocr_fields: Dict[str, str], noise: float) -> Dict[str, str]:
+    """Form values a reviewer would type for `ocr_fields`, each perturbed by `noise`"""
+    return {key: add_noise(rng, value, noise) for key, value in ocr_fields.items()}
+
+
+def make_case(
+    rng: random.Random, n_fields: int, value_length: int, noise: float
+) -> Tuple[Dict, Dict[str, str]]:
+    """(ocr_json, user_input) pair for one upload"""
+    from app.utils.validation import extract_text_fields
+
+    ocr_json = make_ocr_payload(rng, n_fields, value_length)
+    return ocr_json, make_user_input(rng, extract_text_fields(ocr_json), noise)
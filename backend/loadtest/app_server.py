@@ -0,0 +1,110 @@
+"""Run the API in-process on uvicorn against mongomock and an S3 stand-in (or a LOCAL storage directory).
+
+The default storage is a moto S3 server on a local port, so uploads, reads and
+exports go through boto3 and the MINIO code paths exactly as in production,
+paying for HTTP round trips, request signing and multipart uploads. It does not
+model a real MinIO's disk and network latency, and moto runs in this process,
+sharing the GIL with the API. Storage-bound numbers are therefore a lower bound.
+`storage="local"` uses a temporary directory instead.
+"""
+from __future__ import annotations
+
+import os
+import socket
+import tempfile
+import threading
+import time
+from typing import Optional
+
+
+S3_BUCKET = "vos-loadtest"
+
+
+class LocalAppServer:
+    def __init__(
+        self, host: str = "127.0.0.1", port: int = 0, storage: str = "s3", storage_dir: Optional[str] = None
+    ) -> None:
+        if storage not in ("s3", "local"):
+            raise ValueError(f"Unknown storage: {storage}")
+        self.host = host
+        self.port = port or _free_port(host)
+        self.storage = storage
+        self._tmp = None if storage_dir else tempfile.TemporaryDirectory(prefix="vos-loadtest-")
+        self.storage_dir = storage_dir or self._tmp.name  # type: ignore[union-attr]
+        self._s3 = None
+        self._server = None
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    def start(self) -> "LocalAppServer":
+        # Settings are read when app.config is first imported, so set the environment first
+        os.environ["VOS_STORAGE_DIR"] = self.storage_dir
+        os.environ.setdefault("VOS_JOB_BACKEND", "background")
+        if self.storage == "s3":
+            self._start_s3()
+        else:
+            os.environ["VOS_STORAGE_BACKEND"] = "LOCAL"
+
+        try:
+            import mongomock
+        except ImportError as e:
+            raise SystemExit("the load test needs mongomock: pip install -r loadtest/requirements.txt") from e
+        import uvicorn
+
+        from app import database
+
+        database.client = mongomock.MongoClient()
+        database.db = database.client["loadtest"]
+        database._transactions_supported = False
+
+        from app.main import app
+
+        config = uvicorn.Config(app, host=self.host, port=self.port, log_level="warning", lifespan="on")
+        self._server = uvicorn.Server(config)
+        self._thread = threading.Thread(target=self._server.run, name="uvicorn", daemon=True)
+        self._thread.start()
+        deadline = time.monotonic() + 15
+        while not self._server.started:
+            if time.monotonic() > deadline or not self._thread.is_alive():
+                raise RuntimeError("API server did not start")
+            time.sleep(0.05)
+        return self
+
+    def _start_s3(self) -> None:
+        try:
+            from moto.server import ThreadedMotoServer
+        except ImportError as e:
+            raise SystemExit("the S3 stand-in needs moto[server]: pip install -r loadtest/requirements.txt") from e
+        s3_port = _free_port(self.host)
+        self._s3 = ThreadedMotoServer(ip_address=self.host, port=s3_port, verbose=False)
+        self._s3.start()
+        os.environ.update(
+            {
+                "VOS_STORAGE_BACKEND": "MINIO",
+                "VOS_MINIO_ENDPOINT": f"http://{self.host}:{s3_port}",
+                "VOS_MINIO_ACCESS_KEY": "loadtest",
+                "VOS_MINIO_SECRET_KEY": "loadtest",
+                "VOS_MINIO_BUCKET": S3_BUCKET,
+                "VOS_MINIO_REGION": "us-east-1",
+                "VOS_MINIO_SECURE": "false",
+            }
+        )
+
+    def stop(self) -> None:
+        if self._server is not None:
+            self._server.should_exit = True
+        if self._thread is not None:
+            self._thread.join(timeout=10)
+        if self._s3 is not None:
+            self._s3.stop()
+        if self._tmp is not None:
+            self._tmp.cleanup()
+
+
+def _free_port(host: str) -> int:
+    with socket.socket() as s:
+        s.bind((host, 0))
+        return s.getsockname()[1]
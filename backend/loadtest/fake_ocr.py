@@ -0,0 +1,137 @@
+"""Fake OCR service with configurable latency and error distributions.
+
+Answers every POST with a synthetic OCR response shaped like demo.json. Run it
+standalone (`python -m loadtest.fake_ocr --port 9100 --latency-ms 800`) or let
+`loadtest.run` start it in-process.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import threading
+import time
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+
+from benchmarks.synthetic import make_ocr_payload
+
+
+@dataclass
+class OCRProfile:
+    latency_ms: float = 500.0  # mean service time
+    latency_dist: str = "lognormal"  # fixed, exponential or lognormal
+    latency_sigma: float = 0.5  # lognormal shape: larger means a heavier tail
+    error_rate: float = 0.0  # share of requests answered with 503
+    hang_rate: float = 0.0  # share of requests that stall for hang_ms before answering
+    hang_ms: float = 70_000.0
+    fields: int = 25
+    value_length: int = 40
+
+    def sample_latency(self, rng: random.Random) -> float:
+        mean = self.latency_ms / 1000.0
+        if self.latency_dist == "fixed":
+            return mean
+        if self.latency_dist == "exponential":
+            return rng.expovariate(1.0 / mean) if mean > 0 else 0.0
+        # lognormal with the requested mean
+        mu = -0.5 * self.latency_sigma ** 2
+        return mean * rng.lognormvariate(mu, self.latency_sigma)
+
+
+class FakeOCRServer:
+    def __init__(self, profile: OCRProfile, host: str = "127.0.0.1", port: int = 0, seed: int = 0) -> None:
+        self.profile = profile
+        self.requests = 0
+        self.errors = 0
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_POST(self) -> None:
+                self.rfile.read(int(self.headers.get("Content-Length") or 0))
+                status, body, delay = server._plan()
+                time.sleep(delay)
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args) -> None:
+                pass
+
+        self._httpd = ThreadingHTTPServer((host, port), Handler)
+        self._httpd.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}/ocr"
+
+    def _plan(self) -> tuple[int, bytes, float]:
+        with self._lock:
+            self.requests += 1
+            roll = self._rng.random()
+            delay = self.profile.sample_latency(self._rng)
+            if roll < self.profile.error_rate:
+                self.errors += 1
+                return 503, b'{"errorCode": 5030, "errorMessage": "Service busy"}', delay
+            if roll < self.profile.error_rate + self.profile.hang_rate:
+                delay = self.profile.hang_ms / 1000.0
+            payload = make_ocr_payload(self._rng, self.profile.fields, self.profile.value_length)
+        return 200, json.dumps(payload).encode("utf-8"), delay
+
+    def start(self) -> "FakeOCRServer":
+        self._thread = threading.Thread(target=self._httpd.serve_forever, name="fake-ocr", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+
+def add_profile_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("--latency-ms", type=float, default=500.0, help="mean OCR service time")
+    parser.add_argument("--latency-dist", choices=["fixed", "exponential", "lognormal"], default="lognormal")
+    parser.add_argument("--latency-sigma", type=float, default=0.5, help="lognormal tail weight")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="share of OCR calls answered with 503")
+    parser.add_argument("--hang-rate", type=float, default=0.0, help="share of OCR calls that stall for --hang-ms")
+    parser.add_argument("--hang-ms", type=float, default=70_000.0)
+    parser.add_argument("--ocr-fields", type=int, default=25, help="fields per OCR response")
+
+
+def profile_from_args(args: argparse.Namespace) -> OCRProfile:
+    return OCRProfile(
+        latency_ms=args.latency_ms,
+        latency_dist=args.latency_dist,
+        latency_sigma=args.latency_sigma,
+        error_rate=args.error_rate,
+        hang_rate=args.hang_rate,
+        hang_ms=args.hang_ms,
+        fields=args.ocr_fields,
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Fake OCR service")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9100)
+    add_profile_arguments(parser)
+    args = parser.parse_args()
+    server = FakeOCRServer(profile_from_args(args), args.host, args.port)
+    print(f"Fake OCR listening on {server.url}", flush=True)
+    try:
+        server._httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,245 @@
+"""End-to-end load test for the HTTP API.
+
+Run from the backend directory; everything runs offline by default:
+
+    pip install -r loadtest/requirements.txt
+    python -m loadtest.run --users 1,4,16 --uploads 20 --latency-ms 800 --output load.json
+
+Unless --base-url is given, the API is started in-process against mongomock
+and a moto S3 server standing in for MinIO (--storage local uses a temporary
+directory instead), and a fake OCR server is started with
+the requested latency/error distribution. Each virtual user repeatedly plays
+the reviewer flow: create a document, bulk upload files, attach user input,
+run validation, poll it to completion, and export the Excel report. One stage
+runs per --users value; the report holds p50/p90/p99 latency per request type
+and throughput per stage, so saturation shows up as the stage where
+throughput stops growing while latency climbs.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import random
+import sys
+import time
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+import httpx
+
+from benchmarks.synthetic import make_case
+from .fake_ocr import FakeOCRServer, add_profile_arguments, profile_from_args
+
+
+TERMINAL = ("completed", "failed", "cancelled")
+
+
+@dataclass
+class Stats:
+    latencies: Dict[str, List[float]] = field(default_factory=lambda: defaultdict(list))
+    errors: Dict[str, int] = field(default_factory=lambda: defaultdict(int))
+    scenarios: int = 0
+    failed_scenarios: int = 0
+
+    async def call(self, op: str, request) -> httpx.Response:
+        started = time.perf_counter()
+        try:
+            resp = await request
+        except httpx.HTTPError:
+            self.errors[op] += 1
+            self.latencies[op].append(time.perf_counter() - started)
+            raise
+        self.latencies[op].append(time.perf_counter() - started)
+        if resp.status_code >= 400:
+            self.errors[op] += 1
+            resp.raise_for_status()
+        return resp
+
+    def report(self, elapsed: float) -> Dict[str, Any]:
+        ops = {}
+        for op, samples in sorted(self.latencies.items()):
+            ordered = sorted(samples)
+
+            def pct(p: float) -> float:
+                return round(ordered[min(len(ordered) - 1, int(p * len(ordered)))] * 1000, 2)
+
+            ops[op] = {
+                "count": len(samples),
+                "errors": self.errors.get(op, 0),
+                "p50_ms": pct(0.50),
+                "p90_ms": pct(0.90),
+                "p99_ms": pct(0.99),
+                "max_ms": round(ordered[-1] * 1000, 2),
+                "per_s": round(len(samples) / elapsed, 2),
+            }
+        requests = sum(len(s) for op, s in self.latencies.items() if op != "job")
+        return {
+            "elapsed_s": round(elapsed, 3),
+            "scenarios": self.scenarios,
+            "failed_scenarios": self.failed_scenarios,
+            "requests": requests,
+            "requests_per_s": round(requests / elapsed, 2),
+            "uploads_validated_per_s": None,
+            "ops": ops,
+        }
+
+
+async def scenario(client: httpx.AsyncClient, stats: Stats, args, project_id: str, ocr_url: str, rng: random.Random) -> int:
+    """One reviewer flow; returns the number of uploads validated"""
+    sample, user_input = make_case(rng, args.ocr_fields, 40, args.noise)
+    doc = (
+        await stats.call(
+            "create_document",
+            client.post("/api/documents/", json={"project_id": project_id, "name": f"load-{rng.getrandbits(48):x}", "ocr_url": ocr_url}),
+        )
+    ).json()
+    doc_id = doc["id"]
+    await stats.call(
+        "sample_json",
+        client.post(f"/api/documents/{doc_id}/sample-json", files={"sample": ("sample.json", json.dumps(sample).encode(), "application/json")}),
+    )
+
+    limit = asyncio.Semaphore(args.upload_concurrency)
+
+    async def upload_one(i: int) -> None:
+        async with limit:
+            content = rng.randbytes(args.file_kb * 1024)
+            up = (
+                await stats.call(
+                    "upload",
+                    client.post(f"/api/documents/{doc_id}/upload", files={"file": (f"scan_{i}.pdf", content, "application/pdf")}),
+                )
+            ).json()
+            await stats.call(
+                "user_input",
+                client.post(f"/api/documents/{up['id']}/user-input", files={"form_json": ("input.json", json.dumps(user_input).encode(), "application/json")}),
+            )
+
+    await asyncio.gather(*(upload_one(i) for i in range(args.uploads)))
+
+    started = time.perf_counter()
+    job = (await stats.call("run", client.post("/api/validation/run", json={"document_id": doc_id}))).json()
+    while job["status"] not in TERMINAL:
+        await asyncio.sleep(args.poll_interval)
+        job = (await stats.call("status", client.get(f"/api/validation/status/{job['job_id']}"))).json()
+    stats.latencies["job"].append(time.perf_counter() - started)
+    if job["status"] != "completed":
+        stats.errors["job"] += 1
+
+    resp = await stats.call("export_excel", client.get(f"/api/documents/{doc_id}/export-excel"))
+    await resp.aread()
+    return job.get("processed_uploads") or 0
+
+
+async def run_stage(args, base_url: str, ocr_url: str, users: int) -> Dict[str, Any]:
+    stats = Stats()
+    validated = 0
+    limits = httpx.Limits(max_connections=users * (args.upload_concurrency + 1))
+    timeout = httpx.Timeout(args.request_timeout)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=timeout) as client:
+        project = (await stats.call("create_project", client.post("/api/projects/", json={"name": f"loadtest-{time.time_ns()}"}))).json()
+
+        async def user(n: int) -> None:
+            nonlocal validated
+            rng = random.Random(args.seed * 1000 + n)
+            for _ in range(args.iterations):
+                stats.scenarios += 1
+                try:
+                    validated += await scenario(client, stats, args, project["id"], ocr_url, rng)
+                except httpx.HTTPError as e:
+                    stats.failed_scenarios += 1
+                    print(f"scenario failed: {e!r}", file=sys.stderr)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(user(n) for n in range(users)))
+        elapsed = time.perf_counter() - started
+
+    report = stats.report(elapsed)
+    report["users"] = users
+    report["uploads_validated_per_s"] = round(validated / elapsed, 2)
+    return report
+
+
+def print_table(stages: List[Dict[str, Any]]) -> None:
+    for stage in stages:
+        print(
+            f"\nusers={stage['users']}  {stage['requests_per_s']} req/s  "
+            f"{stage['uploads_validated_per_s']} uploads validated/s  "
+            f"failed scenarios {stage['failed_scenarios']}/{stage['scenarios']}",
+            file=sys.stderr,
+        )
+        print(f"  {'op':<16}{'count':>7}{'err':>6}{'p50 ms':>10}{'p90 ms':>10}{'p99 ms':>10}{'max ms':>10}", file=sys.stderr)
+        for op, s in stage["ops"].items():
+            print(
+                f"  {op:<16}{s['count']:>7}{s['errors']:>6}{s['p50_ms']:>10}{s['p90_ms']:>10}{s['p99_ms']:>10}{s['max_ms']:>10}",
+                file=sys.stderr,
+            )
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="End-to-end API load test")
+    parser.add_argument("--base-url", help="target an already running API instead of starting one in-process")
+    parser.add_argument("--ocr-url", help="OCR URL for created documents (default: an in-process fake OCR server)")
+    parser.add_argument("--users", default="1,4,16", help="comma-separated virtual user counts, one stage each")
+    parser.add_argument("--iterations", type=int, default=1, help="scenarios per virtual user per stage")
+    parser.add_argument("--uploads", type=int, default=20, help="files uploaded per scenario")
+    parser.add_argument("--upload-concurrency", type=int, default=4, help="parallel uploads per virtual user")
+    parser.add_argument("--file-kb", type=int, default=64, help="size of each uploaded file")
+    parser.add_argument("--noise", type=float, default=0.1, help="edit noise of user input against OCR values")
+    parser.add_argument("--poll-interval", type=float, default=0.5)
+    parser.add_argument("--request-timeout", type=float, default=120.0)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument(
+        "--storage", choices=("s3", "local"), default="s3", help="storage of the in-process API: moto S3 or a temp dir"
+    )
+    parser.add_argument("--output", help="write the JSON report to this file")
+    add_profile_arguments(parser)
+    args = parser.parse_args(argv)
+
+    fake_ocr = None
+    ocr_url = args.ocr_url
+    if not ocr_url:
+        fake_ocr = FakeOCRServer(profile_from_args(args), seed=args.seed).start()
+        ocr_url = fake_ocr.url
+
+    app_server = None
+    base_url = args.base_url
+    if not base_url:
+        from .app_server import LocalAppServer
+
+        app_server = LocalAppServer(storage=args.storage).start()
+        base_url = app_server.base_url
+
+    try:
+        stages = []
+        for users in [int(u) for u in args.users.split(",") if u.strip()]:
+            stages.append(asyncio.run(run_stage(args, base_url, ocr_url, users)))
+    finally:
+        if app_server is not None:
+            app_server.stop()
+        if fake_ocr is not None:
+            fake_ocr.stop()
+
+    for previous, stage in zip(stages, stages[1:]):
+        # More users without ~proportionally more throughput: the system is saturated
+        stage["saturated"] = stage["uploads_validated_per_s"] < previous["uploads_validated_per_s"] * 1.1
+
+    report = {
+        "params": {k: v for k, v in vars(args).items() if k != "output"},
+        "ocr_requests": fake_ocr.requests if fake_ocr else None,
+        "ocr_errors": fake_ocr.errors if fake_ocr else None,
+        "stages": stages,
+    }
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as fh:
+            fh.write(text + "\n")
+    else:
+        print(text)
+    print_table(stages)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,31 @@
+import os
+import tempfile
+
+import pytest
+
+# Settings are read when app.config is first imported
+os.environ.setdefault("VOS_STORAGE_BACKEND", "LOCAL")
+os.environ.setdefault("VOS_STORAGE_DIR", tempfile.mkdtemp(prefix="vos-tests-"))
+os.environ.setdefault("VOS_JOB_BACKEND", "background")
+
+
+@pytest.fixture
+def db():
+    mongomock = pytest.importorskip("mongomock")
+    from app import database
+
+    database.client = mongomock.MongoClient()
+    database.db = database.client["tests"]
+    database._transactions_supported = False
+    yield database.db
+    database.client = database.db = None
+
+
+@pytest.fixture
+def client(db):
+    from fastapi.testclient import TestClient
+
+    from app.main import app
+
+    with TestClient(app) as c:
+        yield c
@@ -0,0 +1,105 @@
+import random
+
+import pytest
+
+from app.utils.similarity import ScoringConfig, levenshtein_distance, sequence_matcher
+from app.utils.validation import compare_fields
+
+
+def _levenshtein_reference(a: str, b: str) -> int:
+    """Plain O(n*m) dynamic programme"""
+    previous = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        current = [i]
+        for j, cb in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ca != cb)))
+        previous = current
+    return previous[-1]
+
+
+@pytest.mark.parametrize(
+    "a, b, expected",
+    [
+        ("", "", 1.0),
+        ("", "abc", 0.0),
+        ("abc", "", 0.0),
+        ("Hà Nội", "Hà Nội", 1.0),
+        ("Nguyễn Văn A", "Nguyen Van A", 0.8333333333333334),
+        ("1,234.56", "1234.56", 0.9333333333333333),
+        ("1.000.000", "1000000", 0.875),
+        ("27/09/2024", "2024-09-27", 0.4),
+        ("01/VIETTEL-ZTE/2024", "01/VIETTEL-ZTE/2O24", 0.9473684210526315),
+        ("Project of investing", "Project of investment", 0.8780487804878049),
+    ],
+)
+def test_sequence_matcher_scores(a, b, expected):
+    assert sequence_matcher(a, b) == pytest.approx(expected, abs=1e-12)
+
+
+def test_compare_fields_scores():
+    user = {
+        "contract_no": " 01/VIETTEL-ZTE/2024 ",
+        "amount": "1,234.56",
+        "date": "27/09/2024",
+        "name": "Nguyễn Văn A",
+        "missing": "x",
+    }
+    ocr = {
+        "contract_no": "01/VIETTEL-ZTE/2O24",
+        "amount": "1234.56",
+        "date": "2024-09-27",
+        "name": "Nguyen Van A",
+    }
+    config = ScoringConfig(field_metrics={"amount": "numeric", "date": "date"})
+
+    scores, overall = compare_fields(user, ocr, config)
+
+    assert scores == pytest.approx(
+        {
+            "contract_no": 0.9473684210526315,
+            "amount": 1.0,
+            "date": 1.0,
+            "name": 0.8333333333333334,
+            "missing": 0.0,
+        },
+        abs=1e-12,
+    )
+    assert overall == pytest.approx(0.756140350877193, abs=1e-12)
+
+
+def test_compare_fields_default_metric():
+    scores, overall = compare_fields(
+        {"amount": "1,234.56", "date": "27/09/2024"}, {"amount": "1234.56", "date": "2024-09-27"}
+    )
+    assert scores == pytest.approx({"amount": 0.9333333333333333, "date": 0.4}, abs=1e-12)
+    assert overall == pytest.approx(0.6666666666666666, abs=1e-12)
+
+
+def test_compare_fields_empty():
+    assert compare_fields({}, {}) == ({}, 0.0)
+    assert compare_fields({"a": ""}, {}) == ({"a": 1.0}, 1.0)
+
+
+@pytest.mark.parametrize(
+    "a, b, expected",
+    [
+        ("", "", 0),
+        ("", "abc", 3),
+        ("kitten", "sitting", 3),
+        ("Nguyễn Văn A", "Nguyen Van A", 2),
+        ("27/09/2024", "2024-09-27", 8),
+    ],
+)
+def test_levenshtein_known_distances(a, b, expected):
+    assert levenshtein_distance(a, b) == expected
+    assert levenshtein_distance(b, a) == expected
+
+
+def test_levenshtein_matches_reference_on_random_strings():
+    rng = random.Random(20240927)
+    alphabet = "ab01 /-.ễăđ😀"
+    for _ in range(500):
+        # Lengths straddle 64 so multi-word bit vectors are exercised as well
+        a = "".join(rng.choices(alphabet, k=rng.randint(0, 150)))
+        b = "".join(rng.choices(alphabet, k=rng.randint(0, 150)))
+        assert levenshtein_distance(a, b) == _levenshtein_reference(a, b), (a, b)
@@ -0,0 +1,37 @@
+from app import crud, schemas
+
+
+def _document(db) -> str:
+    project = crud.create_project(db, schemas.ProjectCreate(name="results"))
+    document = crud.create_document(db, schemas.DocumentCreate(project_id=project["id"], name="doc", ocr_url="mock"))
+    return document["id"]
+
+
+def test_result_of_batch_job_points_to_batch_endpoint(client, db):
+    job = crud.create_batch_validation_job(db, [_document(db)])
+    job_id = str(job["_id"])
+    summary = {"total_documents": 1, "completed_documents": 1, "failed_documents": 0, "total_uploads": 0}
+    crud.update_validation_job_status(db, job_id, "completed", summary=summary)
+
+    r = client.get(f"/api/validation/result/{job_id}")
+
+    assert r.status_code == 409
+    assert f"/api/validation/batch/{job_id}" in r.json()["detail"]
+    assert client.get(f"/api/validation/batch/{job_id}").status_code == 200
+
+
+def test_result_of_other_job_kinds_is_a_conflict(client, db):
+    document_id = _document(db)
+    jobs = [
+        (crud.create_export_job(db, document_id, "v1", "http://x/{upload_id}"), {"bytes": 10, "uploads": 1}),
+        (crud.create_cascade_delete_job(db, document_ids=[document_id]), {"documents": 1, "uploads": 0, "files": 0}),
+        (crud.create_storage_gc_job(db, True, "quarantine", 0), {"scanned": 3, "orphaned": 0}),
+    ]
+    for job, summary in jobs:
+        job_id = str(job["_id"])
+        crud.update_validation_job_status(db, job_id, "completed", summary=summary)
+
+        r = client.get(f"/api/validation/result/{job_id}")
+
+        assert r.status_code == 409, job["kind"]
+        assert job["kind"] in r.json()["detail"]